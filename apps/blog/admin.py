@@ -16,17 +16,22 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 class HeadingInline(admin.TabularInline):
+    # Los encabezados se extraen del contenido al guardar el post
     model = Heading
-    extra = 1
+    extra = 0
     fields = (
         "title",
         "level",
         "order",
         "slug",
     )
-    prepopulated_fields = {"slug": ("title",)}
+    readonly_fields = fields
+    can_delete = False
     ordering = ("order",)
 
+    def has_add_permission(self, request, obj=None):
+        return False
+
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
@@ -99,6 +104,8 @@ class PostAnalyticsAdmin(admin.ModelAdmin):
         "clicks",  # Corregido
         "click_through_rate",  # Corregido
         "avg_time_on_page",
+        "time_on_page_samples",
+        "time_on_page_histogram",
     )
 
     def post_title(self, obj):
@@ -0,0 +1,32 @@
+import asyncio
+import weakref
+
+from django.conf import settings
+from redis import asyncio as aioredis
+
+# Un pool por event loop: las conexiones de redis.asyncio no se comparten entre loops
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_redis(url):
+    """
+    Cliente redis.asyncio con un pool de conexiones compartido por las vistas
+    async del proceso
+    """
+    clients = _clients.setdefault(asyncio.get_running_loop(), {})
+    if url not in clients:
+        pool = aioredis.ConnectionPool.from_url(
+            url, max_connections=getattr(settings, "BLOG_ASYNC_REDIS_POOL_SIZE", 50)
+        )
+        clients[url] = aioredis.Redis(connection_pool=pool)
+    return clients[url]
+
+
+def cache_redis():
+    # La cache de Django (versiones y entradas de apps.blog.caching)
+    return get_async_redis(settings.CACHES["default"]["LOCATION"])
+
+
+def counters_redis():
+    # Los contadores de apps.blog.tasks (impresiones, visitantes unicos)
+    return get_async_redis(f"redis://{settings.REDIS_HOST}:6379/0")
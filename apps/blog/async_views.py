@@ -0,0 +1,353 @@
+from collections import Counter
+
+import redis
+from apps.blog import caching as blog_cache
+from apps.blog import events, read_model, time_on_page, trending
+from apps.blog.models import Category, Post, PostAnalytics
+from apps.blog.tasks import (
+    arecord_post_impressions,
+    arecord_time_on_page,
+    arecord_unique_view,
+)
+from apps.blog.utils import get_client_ip
+from apps.blog.views import (
+    PostListView,
+    PostTrendingView,
+    check_conditional,
+    serialize_post_detail,
+)
+from asgiref.sync import sync_to_async
+from core.permissions import HasValidApiKey
+from django.conf import settings
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework_api.pagination import CustomPagination
+
+# Vistas async del blog (BLOG_ASYNC_VIEWS=True bajo uvicorn): redis.asyncio y el
+# ORM async en lugar de ocupar un hilo de sync_to_async por peticion. Devuelven
+# el mismo JSON que las vistas DRF de apps.blog.views.
+
+
+def json_response(data, status=status.HTTP_200_OK):
+    return HttpResponse(
+        JSONRenderer().render(data), status=status, content_type="application/json"
+    )
+
+
+def api_response(data, status=status.HTTP_200_OK, **extra):
+    # Mismo sobre que StandardAPIView.response / paginate
+    return json_response(
+        {"success": True, "status": status, "results": data, **extra}, status=status
+    )
+
+
+def forbidden():
+    return json_response(
+        {"detail": "You do not have permission to perform this action."},
+        status=status.HTTP_403_FORBIDDEN,
+    )
+
+
+def has_valid_api_key(request):
+    return HasValidApiKey().has_permission(request, None)
+
+
+def with_headers(response, headers):
+    for name, value in headers.items():
+        response.headers.setdefault(name, value)
+    return response
+
+
+async def conditional(request, namespace):
+    """
+    Como @condition: devuelve (304/412 o None, cabeceras para la respuesta)
+    """
+    version = await blog_cache.aget_version(namespace)
+    response, headers = check_conditional(request, version)
+    if response is not None:
+        response = with_headers(response, headers)
+    return response, headers
+
+
+async def conditional_response(request, namespace, get_response, record_not_modified):
+    """
+    Como views.conditional_response: un 304 solo registra vistas o impresiones
+    en redis, con ETag debil
+    """
+    version = await blog_cache.aget_version(namespace)
+    conditional, headers = check_conditional(request, version, weak=True)
+    if conditional is not None and (
+        conditional.status_code != status.HTTP_304_NOT_MODIFIED
+        or await record_not_modified()
+    ):
+        return with_headers(conditional, headers)
+
+    response = await get_response()
+    if response.status_code != status.HTTP_200_OK:
+        return response
+    return with_headers(conditional or response, headers)
+
+
+class AsyncPostListView(View):
+    async def get(self, request):
+        if not has_valid_api_key(request):
+            return forbidden()
+
+        # Filtros y cursor usan la vista sync (keyset pagination y facetas)
+        if any(name in request.GET for name in ("cursor", "category", "keyword")):
+            return await sync_to_async(PostListView.as_view())(request)
+
+        return await conditional_response(
+            request,
+            blog_cache.POST_LIST,
+            lambda: self.list_posts(request),
+            lambda: self.record_cached_impressions(request),
+        )
+
+    async def record_cached_impressions(self, request):
+        # Para un 304: las impresiones salen de la pagina en cache
+        posts = await blog_cache.apeek(
+            await blog_cache.acache_key(blog_cache.POST_LIST, "all")
+        )
+        if posts is None:
+            return False
+        try:
+            page = CustomPagination().paginate_data(posts, Request(request))
+        except NotFound:
+            return False
+        await arecord_post_impressions([post["id"] for post in page])
+        return True
+
+    async def list_posts(self, request):
+        try:
+            posts = await blog_cache.aget_or_compute(
+                await blog_cache.acache_key(blog_cache.POST_LIST, "all"),
+                read_model.aget_list,
+            )
+        except Exception as e:
+            return json_response(
+                {"detail": f"An unexpected error occurred: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+        if not posts:
+            return json_response(
+                {"detail": "Not posts found"}, status=status.HTTP_404_NOT_FOUND
+            )
+
+        try:
+            paginator = CustomPagination()
+            page = paginator.paginate_data(posts, Request(request))
+        except Exception as e:
+            return json_response(
+                {"success": False, "status": 400, "error": str(e)},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        await arecord_post_impressions([post["id"] for post in page])
+        return api_response(
+            await read_model.awith_view_counts(page),
+            count=paginator.count,
+            next=paginator.get_next_link(),
+            previous=paginator.get_previous_link(),
+        )
+
+
+class AsyncPostDetailView(View):
+    async def get(self, request, slug):
+        # Un 304 tambien cuenta la vista, sin leer ni armar el post
+        return await conditional_response(
+            request,
+            blog_cache.post_detail(slug),
+            lambda: self.retrieve(request, slug),
+            lambda: self.record_cached_view(request, slug),
+        )
+
+    async def record_cached_view(self, request, slug):
+        serialized_post = await blog_cache.apeek(
+            await blog_cache.acache_key(blog_cache.post_detail(slug), "json")
+        )
+        if serialized_post is None:
+            return False
+        await events.arecord_resolved(
+            Counter({("view", slug): 1}),
+            {slug: serialized_post["id"]},
+            get_client_ip(request),
+        )
+        return True
+
+    async def retrieve(self, request, slug):
+        async def serialize_post():
+            row = await read_model.aget_detail(slug)
+            if row is not None:
+                return {"id": str(row[0]), "json": row[1]}
+            return await sync_to_async(serialize_post_detail)(slug)
+
+        try:
+            serialized_post = await blog_cache.aget_or_compute(
+                await blog_cache.acache_key(blog_cache.post_detail(slug), "json"),
+                serialize_post,
+            )
+        except NotFound as e:
+            return json_response({"detail": e.detail}, status=e.status_code)
+
+        post_id = serialized_post["id"]
+        ip_address = get_client_ip(request)
+        try:
+            if settings.BLOG_VIEW_TRACKING == "hll":
+                await arecord_unique_view(post_id, ip_address)
+                views = (await read_model.aget_view_counts([post_id])).get(post_id, 0)
+            else:
+                analytics, created = await PostAnalytics.objects.aget_or_create(
+                    post_id=post_id
+                )
+                await analytics.aincrement_views(ip_address)
+                views = analytics.views
+        except Exception as e:
+            return json_response(
+                {"detail": f"An error ocurred while updating post analytics: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        detail = read_model.merge_detail(serialized_post["json"], views)
+        return HttpResponse(
+            f'{{"success":true,"status":200,"results":{detail}}}',
+            content_type="application/json",
+        )
+
+
+class AsyncPostHeadingView(View):
+    async def get(self, request):
+        post_slug = request.GET.get("slug")
+        if not post_slug:
+            return api_response(
+                {"detail": "Slug parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        response, headers = await conditional(
+            request, blog_cache.post_headings(post_slug)
+        )
+        if response is not None:
+            return response
+
+        async def serialize_headings():
+            toc = Post.objects.filter(slug=post_slug).values_list("toc", flat=True)
+            return await toc.afirst() or []
+
+        headings = await blog_cache.aget_or_compute(
+            await blog_cache.acache_key(blog_cache.post_headings(post_slug), "list"),
+            serialize_headings,
+        )
+        return with_headers(api_response(headings), headers)
+
+
+class AsyncIncrementPostClickView(View):
+    async def post(self, request, slug):
+        post_id = (
+            await Post.post_objects.filter(slug=slug)
+            .values_list("pk", flat=True)
+            .afirst()
+        )
+        if post_id is None:
+            return json_response(
+                {"detail": "The requested post does not exist increment clicks! "},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        try:
+            analytics, created = await PostAnalytics.objects.aget_or_create(
+                post_id=post_id
+            )
+            clicks, impressions, click_through_rate = await analytics.aincrement_click()
+        except Exception as e:
+            return json_response(
+                {"detail": f"Error while updating post analytics: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        return json_response(
+            {
+                "message": "Click incremented successfully!",
+                "clicks": clicks,
+                "click_through_rate": click_through_rate,
+            }
+        )
+
+
+class AsyncPostTimeOnPageView(View):
+    async def post(self, request, slug):
+        max_length = Post._meta.get_field("slug").max_length
+        if len(slug) > max_length:
+            return json_response(
+                {"detail": f"slug must be at most {max_length} characters"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        seconds = time_on_page.parse_beacon(request.body)
+        if seconds is None:
+            return json_response(
+                {"detail": "seconds must be a non-negative number"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        await arecord_time_on_page(slug, seconds)
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+
+
+class AsyncPostEventsView(View):
+    async def post(self, request):
+        try:
+            counts = events.parse(request)
+        except events.BatchTooLarge as e:
+            return json_response(
+                {"detail": str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        except ValueError as e:
+            return json_response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = await events.arecord(counts, get_client_ip(request))
+        except redis.RedisError as e:
+            return json_response(
+                {"detail": f"Error while enqueuing events: {str(e)}"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        return json_response(result, status=status.HTTP_202_ACCEPTED)
+
+
+class AsyncPostTrendingView(View):
+    async def get(self, request):
+        if not has_valid_api_key(request):
+            return forbidden()
+
+        limit = PostTrendingView.parse_limit(request.GET.get("limit"))
+        if limit is None:
+            return api_response(
+                {"detail": f"limit must be between 1 and {PostTrendingView.max_limit}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        scope = trending.ALL
+        slug = request.GET.get("category")
+        if slug:
+            category_id = (
+                await Category.objects.filter(slug=slug)
+                .order_by("depth")
+                .values_list("pk", flat=True)
+                .afirst()
+            )
+            if category_id is None:
+                return json_response(
+                    {"detail": "The requested category does not exist"},
+                    status=status.HTTP_404_NOT_FOUND,
+                )
+            scope = category_id.hex
+
+        ranking = await trending.atop(scope, limit)
+        items = await read_model.aget_list_items(
+            [post_id for post_id, score in ranking]
+        )
+        return api_response(PostTrendingView.with_scores(items, ranking))
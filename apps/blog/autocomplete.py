@@ -0,0 +1,140 @@
+import json
+import logging
+import re
+import unicodedata
+
+import redis
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+redis_client = redis.StrictRedis(host=settings.REDIS_HOST, port=6379, db=0)
+
+# "post:autocomplete:<prefijo>" -> ZSET {post_id: fecha de creacion}
+PREFIX_KEY = "post:autocomplete"
+# post_id -> {"title", "slug"} del titulo indexado (para sugerir y para limpiar)
+TITLES_KEY = "post:autocomplete_titles"
+MAX_PREFIX_LENGTH = 10
+# Candidatos que se leen por round trip al recorrer el prefijo mas chico
+SUGGEST_CHUNK_SIZE = 100
+
+
+def tokenize(text):
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return re.findall(r"\w+", text)
+
+
+def prefixes(title):
+    result = set()
+    for word in tokenize(title):
+        for length in range(1, min(len(word), MAX_PREFIX_LENGTH) + 1):
+            result.add(word[:length])
+    return result
+
+
+def _remove(pipe, post_id, indexed):
+    if indexed:
+        for prefix in prefixes(json.loads(indexed)["title"]):
+            pipe.zrem(f"{PREFIX_KEY}:{prefix}", post_id)
+    pipe.hdel(TITLES_KEY, post_id)
+
+
+def index_posts(posts):
+    """
+    Indexa (o reindexa) los titulos de los posts en un solo pipeline
+    """
+    posts = list(posts)
+    if not posts:
+        return
+    ids = [str(post.pk) for post in posts]
+    indexed = redis_client.hmget(TITLES_KEY, ids)
+
+    pipe = redis_client.pipeline(transaction=True)
+    for post_id, post, old in zip(ids, posts, indexed):
+        # Quitar los prefijos del titulo anterior (renombrado)
+        _remove(pipe, post_id, old)
+        score = post.created_at.timestamp()
+        for prefix in prefixes(post.title):
+            pipe.zadd(f"{PREFIX_KEY}:{prefix}", {post_id: score})
+        pipe.hset(
+            TITLES_KEY, post_id, json.dumps({"title": post.title, "slug": post.slug})
+        )
+    pipe.execute()
+
+
+def remove_posts(post_ids):
+    ids = [str(post_id) for post_id in post_ids]
+    if not ids:
+        return
+    indexed = redis_client.hmget(TITLES_KEY, ids)
+
+    pipe = redis_client.pipeline(transaction=True)
+    for post_id, old in zip(ids, indexed):
+        _remove(pipe, post_id, old)
+    pipe.execute()
+
+
+def sync_post(post):
+    """
+    Publicado: indexar con el titulo actual; borrador: quitar del indice
+    """
+    try:
+        if post.status == "published":
+            index_posts([post])
+        else:
+            remove_posts([post.pk])
+    except redis.RedisError as e:
+        # El indice se puede reconstruir con rebuild_autocomplete
+        logger.info(f"Error updating autocomplete for Post ID {post.pk}: {str(e)}")
+
+
+def unindex_post(post_id):
+    try:
+        remove_posts([post_id])
+    except redis.RedisError as e:
+        logger.info(f"Error updating autocomplete for Post ID {post_id}: {str(e)}")
+
+
+def matches(title, terms):
+    words = tokenize(title)
+    return all(any(word.startswith(term) for word in words) for term in terms)
+
+
+def suggest(query, limit=10):
+    """
+    Titulos (mas recientes primero) que contienen palabras que empiezan con
+    cada termino de la consulta
+    """
+    terms = tokenize(query)
+    if not terms:
+        return []
+
+    # Sin ZINTERSTORE (O(N*K) sobre sets completos): se recorre el prefijo con
+    # menos posts, del mas reciente al mas viejo, filtrando los demas terminos
+    # contra el titulo, y se corta al llegar a limit. Los prefijos se indexan
+    # hasta MAX_PREFIX_LENGTH; el filtro tambien cubre terminos mas largos.
+    keys = sorted({f"{PREFIX_KEY}:{term[:MAX_PREFIX_LENGTH]}" for term in terms})
+    pipe = redis_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.zcard(key)
+    sizes = pipe.execute()
+    if not all(sizes):
+        return []
+    smallest = keys[sizes.index(min(sizes))]
+    check_titles = len(keys) > 1 or any(len(t) > MAX_PREFIX_LENGTH for t in terms)
+
+    suggestions = []
+    start = 0
+    while len(suggestions) < limit:
+        chunk = max(SUGGEST_CHUNK_SIZE, limit)
+        post_ids = redis_client.zrevrange(smallest, start, start + chunk - 1)
+        if not post_ids:
+            break
+        start += chunk
+        for post_id, indexed in zip(post_ids, redis_client.hmget(TITLES_KEY, post_ids)):
+            if not indexed:
+                continue
+            suggestion = {"id": post_id.decode("utf-8"), **json.loads(indexed)}
+            if not check_titles or matches(suggestion["title"], terms):
+                suggestions.append(suggestion)
+    return suggestions[:limit]
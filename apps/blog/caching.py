@@ -0,0 +1,237 @@
+import asyncio
+import math
+import random
+import time
+from datetime import datetime, timezone
+
+from apps.blog import locks
+from apps.blog.async_redis import cache_redis
+from django.conf import settings
+from django.core.cache import cache
+from django_redis import get_redis_connection
+
+STATS_KEY = "blog_cache:stats"
+LOCK_TIMEOUT = 30
+LOCK_WAIT = 2
+
+POST_LIST = "post_list"
+CATEGORY_TREE = "category_tree"
+
+
+def post_detail(slug):
+    return f"post_detail:{slug}"
+
+
+def post_headings(slug):
+    return f"post_headings:{slug}"
+
+
+def get_version(namespace):
+    # La version se inicializa con el tiempo actual: si vence o redis la
+    # expulsa, la nueva nunca coincide con claves viejas
+    return cache.get_or_set(
+        f"{namespace}:version", time.time_ns, timeout=get_version_timeout()
+    )
+
+
+def get_last_modified(namespace):
+    # La version es el instante (ns) del ultimo cambio del namespace
+    return datetime.fromtimestamp(get_version(namespace) / 1e9, tz=timezone.utc)
+
+
+def cache_key(namespace, *parts):
+    """
+    Clave versionada; cambiar la version invalida todo el namespace
+    """
+    return ":".join([namespace, str(get_version(namespace)), *map(str, parts)])
+
+
+def invalidate(*namespaces):
+    version = time.time_ns()
+    cache.set_many(
+        {f"{ns}:version": version for ns in namespaces},
+        timeout=get_version_timeout(),
+    )
+
+
+def get_timeout():
+    return getattr(settings, "BLOG_CACHE_TIMEOUT", 60 * 5)
+
+
+def get_stale_timeout():
+    return getattr(settings, "BLOG_CACHE_STALE_TIMEOUT", 60 * 10)
+
+
+def get_version_timeout():
+    # Ninguna entrada vive mas que esto, asi que una version vencida es segura
+    return get_timeout() + get_stale_timeout()
+
+
+def record(event):
+    try:
+        get_redis_connection("default").hincrby(STATS_KEY, event, 1)
+    except Exception:
+        pass  # las metricas nunca deben romper una respuesta
+
+
+def get_stats():
+    stats = get_redis_connection("default").hgetall(STATS_KEY)
+    return {event.decode("utf-8"): int(count) for event, count in stats.items()}
+
+
+def reset_stats():
+    get_redis_connection("default").delete(STATS_KEY)
+
+
+def get_or_compute(key, compute, timeout=None, beta=1.0):
+    """
+    Cache protegida contra estampidas: un solo proceso recalcula (lock en
+    redis), los demas reciben el valor anterior mientras tanto, y el valor se
+    recalcula un poco antes de vencer de forma probabilistica (XFetch).
+    """
+    timeout = timeout or get_timeout()
+    entry = cache.get(key)
+
+    if entry is not None:
+        value, expires, delta = entry
+        # -log(u) con u en (0, 1]: adelanta la expiracion segun lo que costo calcular
+        if time.time() - delta * beta * math.log(1 - random.random()) < expires:
+            record("hit")
+            return value
+        lock = recompute_lock(key)
+        if not lock.acquire():
+            record("stale")
+            return value
+        return _recompute(key, compute, timeout, lock)
+
+    record("miss")
+    lock = recompute_lock(key)
+    if lock.acquire():
+        return _recompute(key, compute, timeout, lock)
+
+    # Otro proceso ya esta calculando: esperar su resultado un momento
+    deadline = time.time() + LOCK_WAIT
+    while time.time() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            record("hit")
+            return entry[0]
+    record("recompute")
+    return compute()
+
+
+def peek(key):
+    """
+    Valor en cache aunque este por vencer, o None; nunca recalcula
+    """
+    entry = cache.get(key)
+    return None if entry is None else entry[0]
+
+
+def recompute_lock(key):
+    # Con token: si el calculo pasa de LOCK_TIMEOUT no se libera el lock de otro
+    return locks.RedisLock(
+        get_redis_connection("default"), cache.make_key(f"{key}:lock"), LOCK_TIMEOUT
+    )
+
+
+def _recompute(key, compute, timeout, lock):
+    try:
+        started = time.time()
+        value = compute()
+        delta = time.time() - started
+        cache.set(
+            key, (value, time.time() + timeout, delta), timeout + get_stale_timeout()
+        )
+        record("recompute")
+        return value
+    finally:
+        lock.release()
+
+
+# Versiones async (redis.asyncio): mismas claves y formato que la cache de
+# Django, para que las vistas sync y async compartan las entradas
+
+
+async def aget_version(namespace):
+    client = cache_redis()
+    key = cache.client.make_key(f"{namespace}:version")
+    version = await client.get(key)
+    if version is None:
+        version = time.time_ns()
+        timeout = get_version_timeout()
+        if not await client.set(key, version, nx=True, ex=timeout):
+            version = await client.get(key) or version
+    return int(version)
+
+
+async def aget_last_modified(namespace):
+    version = await aget_version(namespace)
+    return datetime.fromtimestamp(version / 1e9, tz=timezone.utc)
+
+
+async def acache_key(namespace, *parts):
+    version = await aget_version(namespace)
+    return ":".join([namespace, str(version), *map(str, parts)])
+
+
+async def arecord(event):
+    try:
+        await cache_redis().hincrby(STATS_KEY, event, 1)
+    except Exception:
+        pass
+
+
+async def aget_or_compute(key, compute, timeout=None, beta=1.0):
+    """
+    get_or_compute para vistas async; compute es una corrutina
+    """
+    client = cache_redis()
+    timeout = timeout or get_timeout()
+    full_key = cache.client.make_key(key)
+    lock_key = cache.client.make_key(f"{key}:lock")
+    token = locks.new_token()
+    raw = await client.get(full_key)
+
+    if raw is not None:
+        value, expires, delta = cache.client.decode(raw)
+        if time.time() - delta * beta * math.log(1 - random.random()) < expires:
+            await arecord("hit")
+            return value
+        if not await client.set(lock_key, token, nx=True, ex=LOCK_TIMEOUT):
+            await arecord("stale")
+            return value
+        return await _arecompute(client, full_key, lock_key, token, compute, timeout)
+
+    await arecord("miss")
+    if await client.set(lock_key, token, nx=True, ex=LOCK_TIMEOUT):
+        return await _arecompute(client, full_key, lock_key, token, compute, timeout)
+
+    deadline = time.time() + LOCK_WAIT
+    while time.time() < deadline:
+        await asyncio.sleep(0.05)
+        raw = await client.get(full_key)
+        if raw is not None:
+            await arecord("hit")
+            return cache.client.decode(raw)[0]
+    await arecord("recompute")
+    return await compute()
+
+
+async def apeek(key):
+    raw = await cache_redis().get(cache.client.make_key(key))
+    return None if raw is None else cache.client.decode(raw)[0]
+
+
+async def _arecompute(client, full_key, lock_key, token, compute, timeout):
+    try:
+        started = time.time()
+        value = await compute()
+        delta = time.time() - started
+        entry = cache.client.encode((value, time.time() + timeout, delta))
+        await client.set(full_key, entry, ex=timeout + get_stale_timeout())
+        await arecord("recompute")
+        return value
+    finally:
+        await client.eval(locks.RELEASE_SCRIPT, 1, lock_key, token)
@@ -0,0 +1,136 @@
+from urllib.parse import parse_qs
+
+from apps.blog import live
+from apps.blog.async_redis import counters_redis
+from apps.blog.models import Post, PostAnalytics
+from apps.blog.tasks import (
+    CLICKS_KEY,
+    CLICKS_SYNC_KEY,
+    IMPRESSIONS_KEY,
+    IMPRESSIONS_SYNC_KEY,
+)
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.conf import settings
+
+
+async def snapshot(post_ids):
+    """
+    Totales actuales de los posts: PostAnalytics mas las impresiones y los
+    clics que aun estan en redis
+    """
+    counts = {str(post_id): dict.fromkeys(live.FIELDS, 0) for post_id in post_ids}
+    rows = PostAnalytics.objects.filter(post_id__in=post_ids).values_list(
+        "post_id", *live.FIELDS
+    )
+    async for post_id, *values in rows:
+        counts[str(post_id)] = dict(zip(live.FIELDS, values))
+
+    pending = {
+        "impressions": (IMPRESSIONS_KEY, IMPRESSIONS_SYNC_KEY),
+        "clicks": (CLICKS_KEY, CLICKS_SYNC_KEY),
+    }
+    pipe = counters_redis().pipeline(transaction=False)
+    for keys in pending.values():
+        for key in keys:
+            pipe.hmget(key, list(counts))
+    results = iter(await pipe.execute())
+    for field, keys in pending.items():
+        for key in keys:
+            for post_id, delta in zip(counts, next(results)):
+                counts[post_id][field] += int(delta or 0)
+    return counts
+
+
+class LiveAnalyticsConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Envia {"type": "analytics", "posts": {post_id: {views, clicks, impressions}}}
+    con los totales: un snapshot inicial y luego los deltas que apps.blog.live
+    agrupa en cada intervalo (a lo sumo un mensaje por intervalo)
+    """
+
+    group = None
+
+    async def join(self, group):
+        self.counts = {}
+        self.group = group
+        await self.channel_layer.group_add(group, self.channel_name)
+        live.connect(self)
+
+    async def disconnect(self, code):
+        if self.group is not None:
+            live.disconnect(self)
+            await self.channel_layer.group_discard(self.group, self.channel_name)
+
+    async def analytics_update(self, event):
+        posts = event["posts"]
+        # Los posts que aun no conocemos: su snapshot ya incluye estos deltas
+        new = [post_id for post_id in posts if post_id not in self.counts]
+        if new:
+            self.counts.update(await snapshot(new))
+        for post_id, deltas in posts.items():
+            if post_id not in new:
+                for field in live.FIELDS:
+                    self.counts[post_id][field] += deltas.get(field, 0)
+
+        await self.send_json(
+            {
+                "type": "analytics",
+                "posts": {post_id: self.counts[post_id] for post_id in posts},
+            }
+        )
+
+
+class PostAnalyticsConsumer(LiveAnalyticsConsumer):
+    """ws/blog/posts/<slug>/analytics/"""
+
+    post_id = None
+
+    async def connect(self):
+        slug = self.scope["url_route"]["kwargs"]["slug"]
+        post_id = (
+            await Post.post_objects.filter(slug=slug)
+            .values_list("pk", flat=True)
+            .afirst()
+        )
+        if post_id is None:
+            await self.close()
+            return
+
+        # Los deltas que se acumularon sin nadie conectado ya estan en el
+        # snapshot: se envian (a quien ya miraba) antes de unirse al grupo
+        await live.flush(self.channel_layer)
+
+        self.post_id = str(post_id)
+        await self.join(live.post_group(self.post_id))
+        await live.watch(self.post_id)
+        await self.accept()
+
+        self.counts = await snapshot([self.post_id])
+        await self.send_json({"type": "analytics", "posts": self.counts})
+
+    async def disconnect(self, code):
+        if self.post_id is not None:
+            await live.watch(self.post_id, -1)
+        await super().disconnect(code)
+
+
+class DashboardAnalyticsConsumer(LiveAnalyticsConsumer):
+    """
+    ws/blog/analytics/: todos los posts con actividad. Requiere la API key en
+    la cabecera X-API-KEY o en ?api_key= (los navegadores no envian cabeceras)
+    """
+
+    async def connect(self):
+        if self.get_api_key() not in getattr(settings, "VALID_API_KEYS", []):
+            await self.close()
+            return
+
+        await self.join(live.DASHBOARD_GROUP)
+        await self.accept()
+
+    def get_api_key(self):
+        headers = dict(self.scope.get("headers", []))
+        if b"x-api-key" in headers:
+            return headers[b"x-api-key"].decode()
+        query = parse_qs(self.scope.get("query_string", b"").decode())
+        return query.get("api_key", [None])[0]
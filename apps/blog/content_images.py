@@ -0,0 +1,106 @@
+import html
+import re
+from urllib.parse import unquote, urlparse
+
+from apps.blog import thumbnails
+from apps.blog.storage import ContentHashStorage, is_content_hash_name
+from ckeditor_uploader.utils import storage
+from django.conf import settings
+
+# Un <picture> ya generado se reescribe entero a partir de su <img>
+IMG_RE = re.compile(
+    r"<picture\b[^>]*>.*?</picture>|<img\b[^>]*>", re.IGNORECASE | re.DOTALL
+)
+INNER_IMG_RE = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+ATTR_RE = re.compile(r"""([\w:-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+
+
+def storage_name(src):
+    """
+    Nombre en el storage de una imagen subida por CKEditor, o None si el src
+    apunta a otro sitio
+    """
+    path = unquote(urlparse(src).path)
+    media = "/" + urlparse(settings.MEDIA_URL).path.strip("/") + "/"
+    if not path.startswith(media):
+        return None
+    name = path[len(media) :]
+    if not name.startswith(getattr(settings, "CKEDITOR_UPLOAD_PATH", "")):
+        return None
+    return name if storage.exists(name) else None
+
+
+def canonical_name(name):
+    # Subidas anteriores al storage por hash: se copian a su nombre sha256
+    # (si ya existe, no se vuelve a guardar)
+    if not isinstance(storage, ContentHashStorage) or is_content_hash_name(name):
+        return name
+    with storage.open(name, "rb") as original:
+        return storage.save(name, original)
+
+
+def srcset_attr(urls):
+    return ", ".join(f"{url} {width}w" for width, url in urls.items())
+
+
+def render_attrs(attrs):
+    return " ".join(f'{key}="{html.escape(value)}"' for key, value in attrs.items())
+
+
+def optimize_tag(tag):
+    if not tag[:8].lower().startswith("<picture"):
+        return optimize_image_tag(tag)
+    img = INNER_IMG_RE.search(tag)
+    if img is None:
+        return tag
+    # Si la imagen no es del storage, el <picture> queda como estaba
+    optimized = optimize_image_tag(img.group(0))
+    return tag if optimized == img.group(0) else optimized
+
+
+def optimize_image_tag(tag):
+    attrs = {
+        match.group(1).lower(): html.unescape(match.group(2) or match.group(3) or "")
+        for match in ATTR_RE.finditer(tag)
+    }
+    name = storage_name(attrs.get("src", ""))
+    if name is None:
+        return tag
+
+    # Si otro worker procesa la misma imagen, VariantsInProgress llega a la
+    # tarea, que se reintenta
+    name = canonical_name(name)
+    variants = thumbnails.generate_variants(name, storage=storage)
+
+    width, height = variants["width"], variants["height"]
+    srcsets = thumbnails.srcset(variants, storage=storage)
+    # WebP para los navegadores que lo soportan; el <img> queda con las
+    # variantes JPEG y el original, que cubre las pantallas mas anchas
+    fallback = srcsets["jpeg"]
+    fallback.setdefault(str(width), storage.url(name))
+    sizes = f"(max-width: {width}px) 100vw, {width}px"
+    source = {
+        "type": "image/webp",
+        "srcset": srcset_attr(srcsets["webp"]),
+        "sizes": sizes,
+    }
+    attrs["src"] = storage.url(name)
+    attrs["srcset"] = srcset_attr(fallback)
+    attrs["sizes"] = sizes
+    attrs.setdefault("width", str(width))
+    attrs.setdefault("height", str(height))
+    attrs.setdefault("loading", "lazy")
+
+    return (
+        f"<picture><source {render_attrs(source)} />"
+        f"<img {render_attrs(attrs)} /></picture>"
+    )
+
+
+def optimize_content_images(content):
+    """
+    Reescribe los <img> subidos como <picture> (WebP y JPEG con srcset),
+    width/height y loading="lazy". Idempotente: volver a procesar el HTML no
+    lo cambia.
+    """
+    return IMG_RE.sub(lambda match: optimize_tag(match.group(0)), content or "")
@@ -0,0 +1,201 @@
+import io
+import json
+import re
+from collections import Counter
+
+from apps.blog import live, rollups
+from apps.blog.async_redis import counters_redis
+from apps.blog.models import Post
+from apps.blog.tasks import (
+    CLICKS_KEY,
+    IMPRESSIONS_KEY,
+    VIEWS_PENDING_KEY,
+    add_unique_view_to_pipeline,
+    redis_client,
+)
+from django.conf import settings
+
+# Ingesta de eventos en lote: {"type": "impression"|"click"|"view", "slug": ...}
+# por linea (NDJSON) o en un array JSON. Los contadores van a redis en un solo
+# pipeline y los consolidan las tareas de apps.blog.tasks
+EVENT_TYPES = {"impression": "impressions", "click": "clicks", "view": "views"}
+WHITESPACE = re.compile(r"\s*")
+
+
+class BatchTooLarge(ValueError):
+    pass
+
+
+def get_max_events():
+    return getattr(settings, "BLOG_EVENTS_MAX_BATCH", 1000)
+
+
+def get_max_bytes():
+    return getattr(settings, "BLOG_EVENTS_MAX_BYTES", 256 * 1024)
+
+
+def read_body(request):
+    # Content-Length primero: un lote demasiado grande no se llega a leer
+    if int(request.META.get("CONTENT_LENGTH") or 0) > get_max_bytes():
+        raise BatchTooLarge(f"the body must be at most {get_max_bytes()} bytes")
+    body = request.body
+    if len(body) > get_max_bytes():
+        raise BatchTooLarge(f"the body must be at most {get_max_bytes()} bytes")
+    try:
+        return body.decode("utf-8")
+    except UnicodeDecodeError:
+        raise ValueError("the body must be UTF-8")
+
+
+def iter_events(text):
+    """
+    (tipo, slug) de cada evento, validados uno a uno: se detiene en el primer
+    error o al pasar el limite del lote sin leer el resto
+    """
+    items = _iter_array(text) if text.lstrip().startswith("[") else _iter_lines(text)
+    for index, item in enumerate(items):
+        if index >= get_max_events():
+            raise BatchTooLarge(f"at most {get_max_events()} events per batch")
+        if not isinstance(item, dict) or item.get("type") not in EVENT_TYPES:
+            raise ValueError(
+                f"event {index}: type must be one of {', '.join(EVENT_TYPES)}"
+            )
+        slug = item.get("slug")
+        if not isinstance(slug, str) or not 0 < len(slug) <= 150:
+            raise ValueError(
+                f"event {index}: slug must be a string of 1 to 150 characters"
+            )
+        yield item["type"], slug
+
+
+def _iter_lines(text):
+    for number, line in enumerate(io.StringIO(text), 1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                raise ValueError(f"line {number}: invalid JSON")
+
+
+def _iter_array(text):
+    # Un elemento a la vez con raw_decode, sin construir la lista completa
+    decoder = json.JSONDecoder()
+    position = WHITESPACE.match(text, text.index("[") + 1).end()
+    if text.startswith("]", position):
+        position += 1
+    else:
+        while True:
+            try:
+                item, position = decoder.raw_decode(text, position)
+            except ValueError:
+                raise ValueError(f"invalid JSON at character {position}")
+            yield item
+            position = WHITESPACE.match(text, position).end()
+            if text.startswith("]", position):
+                position += 1
+                break
+            if not text.startswith(",", position):
+                raise ValueError(f"expected ',' or ']' at character {position}")
+            position = WHITESPACE.match(text, position + 1).end()
+
+    if text[position:].strip():
+        raise ValueError(f"unexpected data at character {position}")
+
+
+def parse(request):
+    """
+    {(tipo, slug): cantidad} del cuerpo de la peticion
+    """
+    return Counter(iter_events(read_body(request)))
+
+
+def add_to_pipeline(pipe, counts, post_ids, ip_address):
+    """
+    Encola los contadores de los posts conocidos; devuelve (aceptados,
+    desconocidos, {post_id: indice del PFADD en el pipeline})
+    """
+    deltas = {}
+    accepted = unknown = 0
+    for (event_type, slug), amount in counts.items():
+        post_id = post_ids.get(slug)
+        if post_id is None:
+            unknown += amount
+            continue
+        accepted += amount
+        post_deltas = deltas.setdefault(post_id, Counter())
+        post_deltas[EVENT_TYPES[event_type]] += amount
+
+    visitors = {}
+    for post_id, post_deltas in deltas.items():
+        if post_deltas["impressions"]:
+            pipe.hincrby(IMPRESSIONS_KEY, str(post_id), post_deltas["impressions"])
+        if post_deltas["clicks"]:
+            pipe.hincrby(CLICKS_KEY, str(post_id), post_deltas["clicks"])
+        live.add_to_pipeline(
+            pipe,
+            post_id,
+            impressions=post_deltas["impressions"],
+            clicks=post_deltas["clicks"],
+        )
+        # Las vistas se cuentan por IP, como en el detalle del post
+        if post_deltas["views"]:
+            if settings.BLOG_VIEW_TRACKING == "hll":
+                visitors[post_id] = len(pipe)
+                add_unique_view_to_pipeline(pipe, post_id, ip_address)
+            else:
+                pipe.sadd(VIEWS_PENDING_KEY, f"{post_id} {ip_address}")
+                rollups.add_visitor_to_pipeline(pipe, post_id, ip_address)
+    return accepted, unknown, visitors
+
+
+def _new_visitors(results, visitors):
+    return [post_id for post_id, index in visitors.items() if results[index]]
+
+
+def record(counts, ip_address):
+    """
+    Resuelve los slugs en una consulta y encola los contadores en un pipeline
+    """
+    post_ids = dict(
+        Post.post_objects.filter(slug__in={slug for _, slug in counts}).values_list(
+            "slug", "pk"
+        )
+    )
+    return record_resolved(counts, post_ids, ip_address)
+
+
+def record_resolved(counts, post_ids, ip_address):
+    """
+    Como record, con los slugs ya resueltos ({slug: post_id}): solo redis
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    accepted, unknown, visitors = add_to_pipeline(pipe, counts, post_ids, ip_address)
+    if len(pipe):
+        new_visitors = _new_visitors(pipe.execute(), visitors)
+        if new_visitors:
+            pipe = redis_client.pipeline(transaction=False)
+            for post_id in new_visitors:
+                live.add_to_pipeline(pipe, post_id, views=1)
+            pipe.execute()
+    return {"accepted": accepted, "unknown": unknown}
+
+
+async def arecord(counts, ip_address):
+    rows = Post.post_objects.filter(slug__in={slug for _, slug in counts}).values_list(
+        "slug", "pk"
+    )
+    post_ids = {slug: post_id async for slug, post_id in rows}
+    return await arecord_resolved(counts, post_ids, ip_address)
+
+
+async def arecord_resolved(counts, post_ids, ip_address):
+    pipe = counters_redis().pipeline(transaction=False)
+    accepted, unknown, visitors = add_to_pipeline(pipe, counts, post_ids, ip_address)
+    if len(pipe):
+        new_visitors = _new_visitors(await pipe.execute(), visitors)
+        if new_visitors:
+            pipe = counters_redis().pipeline(transaction=False)
+            for post_id in new_visitors:
+                live.add_to_pipeline(pipe, post_id, views=1)
+            await pipe.execute()
+    return {"accepted": accepted, "unknown": unknown}
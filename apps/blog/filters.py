@@ -0,0 +1,26 @@
+import django_filters
+from apps.blog.models import Category, Post
+from django.db.models import Q
+
+
+class PostFilter(django_filters.FilterSet):
+    """
+    ?category=<slug> incluye las subcategorias; ?keyword= busca en titulo y
+    keywords (indice de trigramas en PostgreSQL)
+    """
+
+    category = django_filters.CharFilter(method="filter_category")
+    keyword = django_filters.CharFilter(method="filter_keyword")
+
+    class Meta:
+        model = Post
+        fields = ["category", "keyword"]
+
+    def filter_category(self, queryset, name, value):
+        category = Category.objects.filter(slug=value).order_by("depth").first()
+        if category is None:
+            return queryset.none()
+        return queryset.filter(category__path__startswith=category.path)
+
+    def filter_keyword(self, queryset, name, value):
+        return queryset.filter(Q(title__icontains=value) | Q(keywords__icontains=value))
@@ -0,0 +1,23 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.db.backends.ddl_references import Statement
+
+
+class PostgresOnlyIndexMixin:
+    """
+    Indices propios de PostgreSQL: en otros motores (SQLite en desarrollo y
+    tests) no se crean, tampoco cuando SQLite reconstruye la tabla.
+    """
+
+    def create_sql(self, model, schema_editor, *args, **kwargs):
+        if schema_editor.connection.vendor != "postgresql":
+            return Statement("")
+        return super().create_sql(model, schema_editor, *args, **kwargs)
+
+    def remove_sql(self, model, schema_editor, *args, **kwargs):
+        if schema_editor.connection.vendor != "postgresql":
+            return Statement("")
+        return super().remove_sql(model, schema_editor, *args, **kwargs)
+
+
+class PostgresGinIndex(PostgresOnlyIndexMixin, GinIndex):
+    pass
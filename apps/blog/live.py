@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import weakref
+
+import redis
+from apps.blog import rollups, trending
+from apps.blog.async_redis import counters_redis
+from channels.layers import get_channel_layer
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+redis_client = redis.StrictRedis(host=settings.REDIS_HOST, port=6379, db=0)
+
+# Deltas aun no enviados por post ("post:live:<id>" -> views/clicks/impressions)
+LIVE_KEY = "post:live"
+# Posts con deltas pendientes
+LIVE_DIRTY_KEY = "post:live_dirty"
+# Suscriptores por post en todos los procesos: solo se envia a los observados
+LIVE_WATCHERS_KEY = "post:live_watchers"
+# Un solo proceso vacia los deltas en cada intervalo
+LIVE_FLUSH_LOCK = "post:live_flush_lock"
+
+FIELDS = ("views", "clicks", "impressions")
+DASHBOARD_GROUP = "blog_analytics"
+
+# Tareas de envio por event loop y consumidores conectados en este proceso
+_flushers = weakref.WeakKeyDictionary()
+_consumers = set()
+
+
+def post_group(post_id):
+    return f"{DASHBOARD_GROUP}.{post_id}"
+
+
+def get_interval():
+    return getattr(settings, "BLOG_LIVE_ANALYTICS_INTERVAL", 1.0)
+
+
+def add_to_pipeline(pipe, post_id, visitor=None, **deltas):
+    # Los mismos eventos alimentan los contadores por hora de apps.blog.rollups
+    # y los posts en tendencia de apps.blog.trending
+    rollups.add_to_pipeline(pipe, post_id, **deltas)
+    trending.add_to_pipeline(pipe, post_id, **deltas)
+    if visitor is not None:
+        rollups.add_visitor_to_pipeline(pipe, post_id, visitor)
+
+    if not any(deltas.values()):
+        return
+    for field, amount in deltas.items():
+        if amount:
+            pipe.hincrby(f"{LIVE_KEY}:{post_id}", field, amount)
+    pipe.sadd(LIVE_DIRTY_KEY, str(post_id))
+
+
+def record(post_id, visitor=None, **deltas):
+    """
+    Suma deltas (views/clicks/impressions) para los clientes en vivo y los
+    rollups por hora; visitor es la IP para los visitantes unicos por hora
+    """
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        add_to_pipeline(pipe, post_id, visitor, **deltas)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.info(f"Error recording live analytics: {str(e)}")
+
+
+async def arecord(post_id, visitor=None, **deltas):
+    try:
+        pipe = counters_redis().pipeline(transaction=False)
+        add_to_pipeline(pipe, post_id, visitor, **deltas)
+        await pipe.execute()
+    except redis.RedisError as e:
+        logger.info(f"Error recording live analytics: {str(e)}")
+
+
+async def drain(client, batch_size=1000):
+    """
+    Saca los deltas pendientes: {post_id: {"views": n, "clicks": n, ...}}
+    """
+    updates = {}
+    while True:
+        post_ids = await client.spop(LIVE_DIRTY_KEY, batch_size)
+        if not post_ids:
+            return updates
+
+        # HGETALL + DEL atomicos: un incremento posterior crea un hash nuevo
+        pipe = client.pipeline(transaction=True)
+        for post_id in post_ids:
+            pipe.hgetall(f"{LIVE_KEY}:{post_id.decode()}")
+            pipe.delete(f"{LIVE_KEY}:{post_id.decode()}")
+        results = await pipe.execute()
+
+        for post_id, values in zip(post_ids, results[::2]):
+            if values:
+                updates[post_id.decode()] = {
+                    field: int(values.get(field.encode(), 0)) for field in FIELDS
+                }
+        if len(post_ids) < batch_size:
+            return updates
+
+
+async def flush(channel_layer=None, client=None):
+    """
+    Un mensaje con todos los posts para el dashboard y uno por post observado
+    """
+    channel_layer = channel_layer or get_channel_layer()
+    client = client or counters_redis()
+
+    updates = await drain(client)
+    if not updates:
+        return 0
+
+    message = {"type": "analytics.update", "posts": updates}
+    await channel_layer.group_send(DASHBOARD_GROUP, message)
+
+    post_ids = list(updates)
+    watchers = await client.hmget(LIVE_WATCHERS_KEY, post_ids)
+    for post_id, count in zip(post_ids, watchers):
+        if count and int(count) > 0:
+            await channel_layer.group_send(
+                post_group(post_id),
+                {"type": "analytics.update", "posts": {post_id: updates[post_id]}},
+            )
+    return len(updates)
+
+
+async def watch(post_id, amount=1):
+    await counters_redis().hincrby(LIVE_WATCHERS_KEY, str(post_id), amount)
+
+
+async def run_flusher():
+    interval = get_interval()
+    client = counters_redis()
+    while _consumers:
+        await asyncio.sleep(interval)
+        try:
+            # Con varios workers ASGI, el primero que toma el lock envia
+            lock = await client.set(
+                LIVE_FLUSH_LOCK, 1, nx=True, px=max(int(interval * 1000), 1)
+            )
+            if lock:
+                await flush(client=client)
+        except Exception as e:
+            logger.info(f"Error flushing live analytics: {str(e)}")
+
+
+def connect(consumer):
+    """
+    Registra un consumidor y arranca el envio periodico en este event loop
+    """
+    _consumers.add(consumer)
+    loop = asyncio.get_running_loop()
+    flusher = _flushers.get(loop)
+    if flusher is None or flusher.done():
+        _flushers[loop] = loop.create_task(run_flusher())
+
+
+def disconnect(consumer):
+    _consumers.discard(consumer)
@@ -0,0 +1,60 @@
+import uuid
+from contextlib import contextmanager
+
+# Solo quien tiene el token renueva o libera el lock: un proceso que se paso
+# del timeout no borra el lock que ya tomo otro
+RENEW_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+def new_token():
+    return uuid.uuid4().hex
+
+
+class RedisLock:
+    """
+    Lock exclusivo en redis: SET NX PX con un token propio, renovado y
+    liberado con compare-and-set (scripts Lua)
+    """
+
+    def __init__(self, client, key, timeout):
+        self.client = client
+        self.key = key
+        self.timeout_ms = int(timeout * 1000)
+        self.token = new_token()
+
+    def acquire(self):
+        return bool(self.client.set(self.key, self.token, nx=True, px=self.timeout_ms))
+
+    def renew(self):
+        return bool(
+            self.client.eval(RENEW_SCRIPT, 1, self.key, self.token, self.timeout_ms)
+        )
+
+    def release(self):
+        return bool(self.client.eval(RELEASE_SCRIPT, 1, self.key, self.token))
+
+
+@contextmanager
+def hold(client, key, timeout):
+    """
+    with hold(...) as lock: lock es None si otro proceso ya lo tiene
+    """
+    lock = RedisLock(client, key, timeout)
+    if not lock.acquire():
+        yield None
+        return
+    try:
+        yield lock
+    finally:
+        lock.release()
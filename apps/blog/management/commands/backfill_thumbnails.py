@@ -0,0 +1,64 @@
+from apps.blog import thumbnails
+from apps.blog.models import Category, Post
+from apps.blog.tasks import generate_thumbnail_variants, optimize_post_images
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Encola la generacion de variantes de las miniaturas existentes"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sync", action="store_true", help="Generar en este proceso, sin Celery"
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Incluir imagenes que ya tienen variantes (faltantes se regeneran)",
+        )
+        parser.add_argument(
+            "--content",
+            action="store_true",
+            help="Optimizar tambien las imagenes dentro del contenido de los posts",
+        )
+
+    def handle(self, *args, **options):
+        total = 0
+        for model in (Category, Post):
+            objects = model.objects.exclude(thumbnail="").exclude(thumbnail=None)
+            for pk, name, variants in objects.values_list(
+                "pk", "thumbnail", "thumbnail_variants"
+            ).iterator():
+                if not options["all"] and variants.get("source") == name:
+                    continue
+                if options["sync"]:
+                    if not self.run(generate_thumbnail_variants, model._meta.label, pk):
+                        continue
+                else:
+                    generate_thumbnail_variants.delay(model._meta.label, str(pk))
+                total += 1
+
+        if options["content"]:
+            posts = Post.objects.filter(content__icontains="<img").values_list(
+                "pk", flat=True
+            )
+            for pk in posts.iterator():
+                if options["sync"]:
+                    if not self.run(optimize_post_images, pk):
+                        continue
+                else:
+                    optimize_post_images.delay(str(pk))
+                total += 1
+
+        action = "Generated" if options["sync"] else "Queued"
+        self.stdout.write(self.style.SUCCESS(f"{action} variants for {total} images"))
+
+    def run(self, task, *args):
+        # Sin worker no hay reintento: la imagen que otro proceso tiene tomada
+        # se informa y se omite
+        try:
+            task(*map(str, args))
+        except thumbnails.VariantsInProgress as e:
+            self.stdout.write(self.style.WARNING(f"skipped (in progress): {e}"))
+            return False
+        return True
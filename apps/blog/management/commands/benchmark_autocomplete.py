@@ -0,0 +1,71 @@
+import random
+import statistics
+import string
+import time
+import uuid
+
+from apps.blog import autocomplete
+from apps.blog.models import Post
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia del autocompletado con N titulos sinteticos "
+        "(se quitan del indice al terminar)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--titles", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=1000)
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        vocabulary = [
+            "".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 12)))
+            for _ in range(5000)
+        ]
+
+        started = time.monotonic()
+        now = timezone.now()
+        post_ids = []
+        batch_size = options["batch_size"]
+        for offset in range(0, options["titles"], batch_size):
+            posts = [
+                Post(
+                    id=uuid.uuid4(),
+                    title=" ".join(rng.choices(vocabulary, k=rng.randint(3, 8))),
+                    slug=f"benchmark-{i}",
+                    created_at=now,
+                )
+                for i in range(offset, min(offset + batch_size, options["titles"]))
+            ]
+            autocomplete.index_posts(posts)
+            post_ids.extend(post.pk for post in posts)
+        self.stdout.write(
+            f"{len(post_ids)} titles indexed in {time.monotonic() - started:.1f}s"
+        )
+
+        try:
+            timings = []
+            for _ in range(options["queries"]):
+                # Lo que se va escribiendo: una o dos palabras, la ultima a medias
+                words = rng.sample(vocabulary, rng.randint(1, 2))
+                words[-1] = words[-1][: rng.randint(1, len(words[-1]))]
+                started = time.perf_counter()
+                autocomplete.suggest(" ".join(words))
+                timings.append((time.perf_counter() - started) * 1000)
+
+            percentiles = statistics.quantiles(timings, n=100, method="inclusive")
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{options['queries']} queries, p50 {percentiles[49]:.2f}ms, "
+                    f"p95 {percentiles[94]:.2f}ms, p99 {percentiles[98]:.2f}ms"
+                )
+            )
+        finally:
+            for offset in range(0, len(post_ids), batch_size):
+                autocomplete.remove_posts(post_ids[offset : offset + batch_size])
@@ -0,0 +1,110 @@
+import json
+import time
+from types import ModuleType
+
+from apps.blog import live
+from apps.blog.models import Category, Post
+from apps.blog.tasks import CLICKS_KEY, redis_client
+from apps.blog.urls import sync_urlpatterns
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import include, path
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara eventos por segundo: un POST a increment_clicks por clic frente a "
+        "lotes NDJSON en posts/events/ (posts temporales, todo se revierte al final)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=2000)
+        parser.add_argument("--posts", type=int, default=50)
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        urlconf = ModuleType("benchmark_events_urls")
+        urlconf.urlpatterns = [path("", include(sync_urlpatterns))]
+        post_ids = []
+        try:
+            with override_settings(
+                ROOT_URLCONF=urlconf,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            ), transaction.atomic():
+                slugs = self.create_posts(options["posts"])
+                post_ids = list(
+                    Post.objects.filter(slug__in=slugs).values_list("pk", flat=True)
+                )
+                self.report(
+                    "per-click", options["events"], *self.per_click(slugs, options)
+                )
+                self.report("batch", options["events"], *self.batch(slugs, options))
+                raise Rollback
+        except Rollback:
+            pass
+        finally:
+            # Los contadores de los posts temporales que quedaron en redis
+            if post_ids:
+                redis_client.hdel(CLICKS_KEY, *map(str, post_ids))
+                live.redis_client.delete(
+                    *[f"{live.LIVE_KEY}:{post_id}" for post_id in post_ids]
+                )
+
+    def create_posts(self, total):
+        category = Category.objects.create(name="Benchmark", slug="benchmark-events")
+        posts = Post.objects.bulk_create(
+            [
+                Post(
+                    title=f"Benchmark {i}",
+                    description="Benchmark",
+                    content="Benchmark",
+                    keywords="benchmark",
+                    slug=f"benchmark-events-{i}",
+                    category=category,
+                    status="published",
+                )
+                for i in range(total)
+            ]
+        )
+        return [post.slug for post in posts]
+
+    def per_click(self, slugs, options):
+        client = Client()
+        errors = 0
+        started = time.perf_counter()
+        for i in range(options["events"]):
+            response = client.post(f"/posts/{slugs[i % len(slugs)]}/increment_clicks")
+            errors += response.status_code != 200
+        return time.perf_counter() - started, options["events"], errors
+
+    def batch(self, slugs, options):
+        client = Client()
+        lines = [
+            json.dumps({"type": "click", "slug": slugs[i % len(slugs)]})
+            for i in range(options["events"])
+        ]
+        requests = errors = 0
+        started = time.perf_counter()
+        for offset in range(0, len(lines), options["batch_size"]):
+            response = client.post(
+                "/posts/events/",
+                "\n".join(lines[offset : offset + options["batch_size"]]),
+                content_type="application/x-ndjson",
+            )
+            requests += 1
+            errors += response.status_code != 202
+        return time.perf_counter() - started, requests, errors
+
+    def report(self, label, events, elapsed, requests, errors):
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{label:9}: {events / elapsed:.0f} events/s "
+                f"({requests} requests in {elapsed:.2f}s, {errors} errors)"
+            )
+        )
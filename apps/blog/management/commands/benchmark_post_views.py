@@ -0,0 +1,176 @@
+import ipaddress
+import random
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from apps.blog import retention
+from apps.blog.models import Category, Post, PostView
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la busqueda de PostView de increment_views con N filas sinteticas, "
+        "antes y despues de podar (todo se revierte al final)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--posts", type=int, default=1000)
+        parser.add_argument("--span-days", type=int, default=730)
+        parser.add_argument("--retention-days", type=int, default=365)
+        parser.add_argument("--lookups", type=int, default=2000)
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        try:
+            with transaction.atomic():
+                self.populate(options)
+                self.report("before prune", options)
+
+                result = retention.prune(
+                    options["retention_days"], options["batch_size"]
+                )
+                self.stdout.write(
+                    f"pruned {result['deleted']} rows in {result['batches']} "
+                    f"batches ({result['seconds']}s)"
+                )
+                self.analyze()
+                self.report("after prune", options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def populate(self, options):
+        started = time.monotonic()
+        category = Category.objects.create(name="Benchmark", slug="benchmark")
+        posts = Post.objects.bulk_create(
+            [
+                Post(
+                    title=f"Benchmark {i}",
+                    description="Benchmark",
+                    content="Benchmark",
+                    keywords="benchmark",
+                    slug=f"benchmark-views-{i}",
+                    category=category,
+                    status="published",
+                )
+                for i in range(options["posts"])
+            ]
+        )
+        post_ids = [post.pk for post in posts]
+
+        if connection.vendor == "postgresql":
+            # generate_series: 50M filas en minutos, sin pasar por Python
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "INSERT INTO blog_postview (id, post_id, ip_address, timestamp) "
+                    "SELECT gen_random_uuid(), "
+                    "(%s::uuid[])[1 + i %% %s], "
+                    "'0.0.0.0'::inet + i, "
+                    "now() - random() * %s * interval '1 day' "
+                    "FROM generate_series(0, %s - 1) AS i",
+                    [
+                        [str(post_id) for post_id in post_ids],
+                        len(post_ids),
+                        options["span_days"],
+                        options["rows"],
+                    ],
+                )
+        else:
+            self.insert_rows(post_ids, options)
+        self.analyze()
+
+        self.stdout.write(
+            f"{options['rows']} post views created in "
+            f"{time.monotonic() - started:.1f}s ({connection.vendor})"
+        )
+
+    def insert_rows(self, post_ids, options):
+        # SQL directo: bulk_create pisaria timestamp (auto_now_add)
+        fields = [
+            PostView._meta.get_field(name)
+            for name in ("id", "post", "ip_address", "timestamp")
+        ]
+        table = connection.ops.quote_name(PostView._meta.db_table)
+        columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+        sql = f"INSERT INTO {table} ({columns}) VALUES (%s, %s, %s, %s)"
+        now = timezone.now()
+        span = options["span_days"] * 24 * 60 * 60
+
+        with connection.cursor() as cursor:
+            for offset in range(0, options["rows"], options["batch_size"]):
+                rows = []
+                for i in range(
+                    offset, min(offset + options["batch_size"], options["rows"])
+                ):
+                    values = (
+                        uuid.uuid4(),
+                        post_ids[i % len(post_ids)],
+                        str(ipaddress.IPv4Address(i)),
+                        now - timedelta(seconds=self.random.uniform(0, span)),
+                    )
+                    rows.append(
+                        [
+                            field.get_db_prep_value(value, connection)
+                            for field, value in zip(fields, values)
+                        ]
+                    )
+                cursor.executemany(sql, rows)
+
+    def analyze(self):
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE blog_postview")
+
+    def report(self, label, options):
+        rows = PostView.objects.count()
+        # Visitas que siguen en la tabla (despues de podar, no todas)
+        candidates = {
+            str(ipaddress.IPv4Address(self.random.randrange(options["rows"]))): None
+            for _ in range(options["lookups"] * 2)
+        }
+        existing = PostView.objects.filter(ip_address__in=candidates)
+        hits = list(existing.values_list("post_id", "ip_address")[: options["lookups"]])
+
+        timings = {"hit": [], "miss": []}
+        for i, (post_id, ip_address) in enumerate(hits):
+            # La misma consulta que increment_views: una IP ya vista o una nueva
+            miss = str(ipaddress.IPv4Address(options["rows"] + i))
+            for kind, ip in (("hit", ip_address), ("miss", miss)):
+                started = time.perf_counter()
+                with transaction.atomic():
+                    PostView.objects.get_or_create(post_id=post_id, ip_address=ip)
+                    transaction.set_rollback(True)
+                timings[kind].append((time.perf_counter() - started) * 1000)
+
+        self.stdout.write(f"{label}: {rows} rows{self.sizes()}")
+        for kind, values in timings.items():
+            percentiles = statistics.quantiles(values, n=100, method="inclusive")
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"  get_or_create ({kind}): p50 {percentiles[49]:.3f}ms, "
+                    f"p99 {percentiles[98]:.3f}ms"
+                )
+            )
+
+    def sizes(self):
+        if connection.vendor != "postgresql":
+            return ""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_size_pretty(pg_table_size('blog_postview')), "
+                "pg_size_pretty(pg_indexes_size('blog_postview'))"
+            )
+            table, indexes = cursor.fetchone()
+        return f", table {table}, indexes {indexes}"
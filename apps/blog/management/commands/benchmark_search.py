@@ -0,0 +1,94 @@
+import random
+import statistics
+import string
+import time
+
+from apps.blog.models import Category, Post
+from apps.blog.search import get_search_backend, update_search_vector
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide la latencia de la busqueda de texto completo sobre N posts "
+        "sinteticos (se crean en una transaccion que se revierte al final)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--posts", type=int, default=100_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.vocabulary = [self.word() for _ in range(5000)]
+        # Distribucion tipo Zipf: pocas palabras muy frecuentes, muchas raras
+        self.weights = [1 / rank for rank in range(1, len(self.vocabulary) + 1)]
+
+        try:
+            with transaction.atomic():
+                self.populate(options["posts"], options["batch_size"])
+                self.measure(options["queries"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def word(self):
+        return "".join(self.random.choices(string.ascii_lowercase, k=7))
+
+    def text(self, words):
+        return " ".join(self.random.choices(self.vocabulary, self.weights, k=words))
+
+    def populate(self, total, batch_size):
+        started = time.monotonic()
+        category = Category.objects.create(name="Benchmark", slug="benchmark")
+        for offset in range(0, total, batch_size):
+            Post.objects.bulk_create(
+                [
+                    Post(
+                        title=self.text(6)[:100],
+                        description=self.text(20)[:255],
+                        keywords=self.text(5)[:150],
+                        content=f"<h2>{self.text(5)}</h2><p>{self.text(150)}</p>",
+                        slug=f"benchmark-{i}",
+                        status="published",
+                        category=category,
+                    )
+                    for i in range(offset, min(offset + batch_size, total))
+                ]
+            )
+        update_search_vector(Post.objects.filter(category=category))
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE blog_post")
+
+        self.stdout.write(
+            f"{total} posts created in {time.monotonic() - started:.1f}s "
+            f"({connection.vendor})"
+        )
+
+    def measure(self, queries):
+        backend = get_search_backend()
+        posts = Post.post_objects.with_view_count()
+        timings = []
+        for _ in range(queries):
+            # Consultas de una y dos palabras, de frecuentes a raras
+            words = self.random.sample(self.vocabulary[:500], self.random.randint(1, 2))
+            started = time.perf_counter()
+            list(backend.search(posts, " ".join(words))[:10])
+            timings.append((time.perf_counter() - started) * 1000)
+
+        percentiles = statistics.quantiles(timings, n=100, method="inclusive")
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{backend.__class__.__name__}: {queries} queries, "
+                f"p50 {percentiles[49]:.1f}ms, p95 {percentiles[94]:.1f}ms, "
+                f"p99 {percentiles[98]:.1f}ms, max {max(timings):.1f}ms"
+            )
+        )
@@ -0,0 +1,74 @@
+import asyncio
+import statistics
+import time
+from types import ModuleType
+
+from apps.blog import time_on_page
+from apps.blog.tasks import redis_client
+from apps.blog.urls import async_urlpatterns, sync_urlpatterns
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import AsyncClient, override_settings
+from django.urls import include, path
+
+SLUG = "benchmark-time-on-page"
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide cuantos beacons de tiempo en pagina por segundo aceptan las vistas "
+        "sync y async en el proceso actual"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=5000)
+        parser.add_argument("--concurrency", type=int, default=100)
+        parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+
+    def handle(self, *args, **options):
+        modes = ["sync", "async"] if options["mode"] == "both" else [options["mode"]]
+        try:
+            for mode in modes:
+                patterns = async_urlpatterns if mode == "async" else sync_urlpatterns
+                urlconf = ModuleType(f"benchmark_{mode}_urls")
+                urlconf.urlpatterns = [path("", include(patterns))]
+                with override_settings(
+                    ROOT_URLCONF=urlconf,
+                    ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+                ):
+                    elapsed, timings, errors = asyncio.run(
+                        self.run(options["requests"], options["concurrency"])
+                    )
+                percentiles = statistics.quantiles(timings, n=100, method="inclusive")
+                self.stdout.write(
+                    f"{mode:5} beacons: {len(timings) / elapsed:.0f} req/s, "
+                    f"p50 {percentiles[49]:.1f}ms, p99 {percentiles[98]:.1f}ms, "
+                    f"{errors} errors"
+                )
+        finally:
+            # El slug no existe: nada que consolidar
+            redis_client.delete(time_on_page.sample_key(SLUG))
+            redis_client.srem(time_on_page.TIME_ON_PAGE_DIRTY_KEY, SLUG)
+
+    async def run(self, total, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        timings = []
+        errors = 0
+
+        async def request(i):
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(
+                    f"/posts/{SLUG}/time_on_page",
+                    str(i % 900),
+                    content_type="text/plain",
+                )
+                timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 204:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(request(i) for i in range(total)))
+        return time.perf_counter() - started, timings, errors
@@ -0,0 +1,71 @@
+import asyncio
+import statistics
+import time
+from types import ModuleType
+
+from apps.blog.models import Post
+from apps.blog.urls import async_urlpatterns, sync_urlpatterns
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, override_settings
+from django.urls import include, path
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara las vistas sync y async del blog (lista, detalle y headings) "
+        "con N peticiones concurrentes en el proceso actual"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500)
+        parser.add_argument("--concurrency", type=int, default=50)
+        parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+
+    def handle(self, *args, **options):
+        slug = Post.post_objects.values_list("slug", flat=True).first()
+        if slug is None:
+            raise CommandError("There are no published posts to benchmark")
+
+        paths = ["/posts/", f"/posts/{slug}/", f"/posts/headings/?slug={slug}"]
+        modes = ["sync", "async"] if options["mode"] == "both" else [options["mode"]]
+        for mode in modes:
+            patterns = async_urlpatterns if mode == "async" else sync_urlpatterns
+            urlconf = ModuleType(f"benchmark_{mode}_urls")
+            urlconf.urlpatterns = [path("", include(patterns))]
+            with override_settings(
+                ROOT_URLCONF=urlconf,
+                ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            ):
+                for url in paths:
+                    elapsed, timings, errors = asyncio.run(
+                        self.run(url, options["requests"], options["concurrency"])
+                    )
+                    percentiles = statistics.quantiles(
+                        timings, n=100, method="inclusive"
+                    )
+                    self.stdout.write(
+                        f"{mode:5} {url}: {len(timings) / elapsed:.0f} req/s, "
+                        f"p50 {percentiles[49]:.1f}ms, p99 {percentiles[98]:.1f}ms, "
+                        f"{errors} errors"
+                    )
+
+    async def run(self, url, total, concurrency):
+        client = AsyncClient()
+        headers = {"X-API-KEY": settings.VALID_API_KEYS[0]}
+        semaphore = asyncio.Semaphore(concurrency)
+        timings = []
+        errors = 0
+
+        async def request():
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                timings.append((time.perf_counter() - started) * 1000)
+                if response.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(request() for _ in range(total)))
+        return time.perf_counter() - started, timings, errors
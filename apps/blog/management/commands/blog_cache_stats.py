@@ -0,0 +1,25 @@
+from apps.blog import caching as blog_cache
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Muestra los contadores hit/miss/stale/recompute de la cache del blog"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Reinicia los contadores"
+        )
+
+    def handle(self, *args, **options):
+        stats = blog_cache.get_stats()
+        for event in ("hit", "miss", "stale", "recompute"):
+            self.stdout.write(f"{event}: {stats.get(event, 0)}")
+
+        lookups = stats.get("hit", 0) + stats.get("stale", 0) + stats.get("miss", 0)
+        if lookups:
+            ratio = (stats.get("hit", 0) + stats.get("stale", 0)) / lookups * 100
+            self.stdout.write(f"hit ratio: {ratio:.2f}%")
+
+        if options["reset"]:
+            blog_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS("Counters reset"))
@@ -0,0 +1,56 @@
+from apps.blog import read_model
+from apps.blog.models import Post, PostReadModel
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el read model de posts con la serializacion en vivo "
+        "(filas faltantes, desactualizadas o huerfanas)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--fix", action="store_true", help="Reconstruye las filas con diferencias"
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        posts = read_model.published_posts().order_by("pk")
+        batch = list(posts[:batch_size])
+        broken = []
+
+        while batch:
+            rows = PostReadModel.objects.in_bulk([post.pk for post in batch])
+            for post in batch:
+                row = rows.get(post.pk)
+                if row is None:
+                    self.stdout.write(f"missing: {post.slug}")
+                    broken.append(post.pk)
+                    continue
+                differences = read_model.diff(row, post)
+                if differences:
+                    self.stdout.write(f"stale: {post.slug} ({', '.join(differences)})")
+                    broken.append(post.pk)
+            batch = list(posts.filter(pk__gt=batch[-1].pk)[:batch_size])
+
+        orphans = list(
+            PostReadModel.objects.exclude(
+                post_id__in=Post.post_objects.values("pk")
+            ).values_list("post_id", "slug")
+        )
+        for post_id, slug in orphans:
+            self.stdout.write(f"orphan: {slug}")
+            broken.append(post_id)
+
+        if not broken:
+            self.stdout.write(self.style.SUCCESS("Read model is consistent"))
+            return
+
+        if options["fix"]:
+            for offset in range(0, len(broken), batch_size):
+                read_model.rebuild(broken[offset : offset + batch_size])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(broken)} posts"))
+        else:
+            raise CommandError(f"Read model has {len(broken)} inconsistent posts")
@@ -0,0 +1,43 @@
+from apps.blog import retention
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Compacta en PostViewArchive y borra las filas de PostView vencidas, "
+        "por lotes cortos (sin bloqueos largos)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days", type=int, help="Retencion (por defecto la de la configuracion)"
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--max-batches", type=int)
+        parser.add_argument(
+            "--pause", type=float, default=0, help="Segundos de espera entre lotes"
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true", help="Solo cuenta las filas vencidas"
+        )
+
+    def handle(self, *args, **options):
+        if options["dry_run"]:
+            cutoff = retention.get_cutoff(options["days"])
+            expired = retention.expired_views(cutoff).count()
+            self.stdout.write(f"{expired} post views older than {cutoff.isoformat()}")
+            return
+
+        result = retention.prune(
+            options["days"],
+            options["batch_size"],
+            options["max_batches"],
+            options["pause"],
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Pruned {result['deleted']} post views older than "
+                f"{result['cutoff']} in {result['batches']} batches "
+                f"({result['seconds']}s)"
+            )
+        )
@@ -0,0 +1,32 @@
+from apps.blog import autocomplete
+from apps.blog.models import Post
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el indice de autocompletado de titulos en redis"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        client = autocomplete.redis_client
+        stale = client.scan_iter(f"{autocomplete.PREFIX_KEY}:*", count=1000)
+        for key in stale:
+            client.unlink(key)
+        client.unlink(autocomplete.TITLES_KEY)
+
+        batch = []
+        total = 0
+        for post in Post.post_objects.only(
+            "id", "title", "slug", "created_at"
+        ).iterator(chunk_size=options["batch_size"]):
+            batch.append(post)
+            if len(batch) >= options["batch_size"]:
+                autocomplete.index_posts(batch)
+                total += len(batch)
+                batch = []
+        autocomplete.index_posts(batch)
+        total += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total} titles"))
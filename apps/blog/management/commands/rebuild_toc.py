@@ -0,0 +1,45 @@
+from apps.blog import caching as blog_cache
+from apps.blog.models import Post
+from apps.blog.toc import extract_toc
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+
+class Command(BaseCommand):
+    help = "Recalcula la tabla de contenidos (y los Heading) de los posts existentes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        posts = Post.objects.order_by("pk").only("id", "slug", "content", "toc")
+        batch = list(posts[:batch_size])
+        updated = 0
+
+        while batch:
+            changed = []
+            for post in batch:
+                content, toc = extract_toc(post.content)
+                if content != post.content or toc != post.toc:
+                    post.content, post.toc = content, toc
+                    changed.append(post)
+
+            with transaction.atomic():
+                Post.objects.bulk_update(changed, ["content", "toc"])
+                for post in changed:
+                    post.sync_headings()
+
+            # bulk_update no envia señales
+            slugs = [post.slug for post in changed]
+            if slugs:
+                blog_cache.invalidate(
+                    *[blog_cache.post_detail(slug) for slug in slugs],
+                    *[blog_cache.post_headings(slug) for slug in slugs],
+                )
+            updated += len(changed)
+            batch = list(posts.filter(pk__gt=batch[-1].pk)[:batch_size])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Rebuilt table of contents of {updated} posts")
+        )
@@ -0,0 +1,124 @@
+from django.db.migrations import AddIndex
+from django.db.migrations.operations.base import Operation
+
+
+class AddIndexConcurrently(AddIndex):
+    """
+    AddIndex que en PostgreSQL usa CREATE INDEX CONCURRENTLY (sin bloquear
+    escrituras). En otros motores crea el indice normalmente.
+    La migracion debe declarar atomic = False.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            if schema_editor.connection.vendor == "postgresql":
+                schema_editor.add_index(model, self.index, concurrently=True)
+            else:
+                schema_editor.add_index(model, self.index)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            if schema_editor.connection.vendor == "postgresql":
+                schema_editor.remove_index(model, self.index, concurrently=True)
+            else:
+                schema_editor.remove_index(model, self.index)
+
+
+class AddUniqueConcurrently(Operation):
+    """
+    Crea una restriccion UNIQUE solo en la base de datos. En PostgreSQL se
+    construye el indice con CONCURRENTLY y luego se adjunta con
+    ADD CONSTRAINT ... USING INDEX. Usar dentro de SeparateDatabaseAndState.
+    """
+
+    reduces_to_sql = True
+    reversible = True
+
+    def __init__(self, model_name, columns, name):
+        self.model_name = model_name
+        self.columns = columns
+        self.name = name
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        quote = schema_editor.quote_name
+        table = quote(model._meta.db_table)
+        name = quote(self.name)
+        columns = ", ".join(quote(column) for column in self.columns)
+        if schema_editor.connection.vendor == "postgresql":
+            if self.has_invalid_index(schema_editor):
+                # Un CONCURRENTLY fallido deja el indice invalido: IF NOT EXISTS
+                # lo daria por creado y USING INDEX lo rechazaria
+                schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+            schema_editor.execute(
+                f"CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS {name} "
+                f"ON {table} ({columns})"
+            )
+            schema_editor.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name}"
+            )
+        else:
+            schema_editor.execute(f"CREATE UNIQUE INDEX {name} ON {table} ({columns})")
+
+    def has_invalid_index(self, schema_editor):
+        # Con sqlmigrate no hay base de datos que consultar
+        if schema_editor.collect_sql:
+            return False
+        with schema_editor.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT NOT indisvalid FROM pg_index WHERE indexrelid = to_regclass(%s)",
+                [schema_editor.quote_name(self.name)],
+            )
+            row = cursor.fetchone()
+        return bool(row and row[0])
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if not self.allow_migrate_model(schema_editor.connection.alias, model):
+            return
+
+        quote = schema_editor.quote_name
+        if schema_editor.connection.vendor == "postgresql":
+            schema_editor.execute(
+                f"ALTER TABLE {quote(model._meta.db_table)} "
+                f"DROP CONSTRAINT {quote(self.name)}"
+            )
+        else:
+            schema_editor.execute(f"DROP INDEX {quote(self.name)}")
+
+    def describe(self):
+        return "Concurrently create unique constraint %s on %s(%s)" % (
+            self.name,
+            self.model_name,
+            ", ".join(self.columns),
+        )
+
+    def deconstruct(self):
+        return (
+            self.__class__.__qualname__,
+            [],
+            {"model_name": self.model_name, "columns": self.columns, "name": self.name},
+        )
+
+
+class AddPostgresIndexConcurrently(AddIndexConcurrently):
+    """
+    Indices propios de PostgreSQL (GIN, trigramas, ...): en otros motores la
+    operacion solo actualiza el estado de las migraciones.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.16 on 2026-10-18 20:10
+
+from apps.blog.migration_operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('blog', '0009_rename_clik_through_rate_postanalytics_click_through_rate_and_more'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='post',
+            index=models.Index(fields=['status', 'created_at', 'id'], name='post_status_created_id_idx'),
+        ),
+    ]
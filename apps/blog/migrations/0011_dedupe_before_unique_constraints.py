@@ -0,0 +1,65 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:02
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def dedupe_post_slugs(apps, schema_editor):
+    Post = apps.get_model("blog", "Post")
+    duplicated = (
+        Post.objects.values("slug").annotate(n=Count("id")).filter(n__gt=1)
+    )
+    for row in duplicated:
+        posts = Post.objects.filter(slug=row["slug"]).order_by("created_at")
+        for post in posts[1:]:
+            suffix = f"-{post.id.hex[:8]}"
+            post.slug = post.slug[: 150 - len(suffix)] + suffix
+            post.save(update_fields=["slug"])
+
+
+def dedupe_post_views(apps, schema_editor):
+    PostView = apps.get_model("blog", "PostView")
+    duplicated = (
+        PostView.objects.values("post_id", "ip_address")
+        .annotate(n=Count("id"), first=Min("timestamp"))
+        .filter(n__gt=1)
+    )
+    for row in duplicated:
+        views = PostView.objects.filter(
+            post_id=row["post_id"], ip_address=row["ip_address"]
+        ).order_by("timestamp")
+        PostView.objects.filter(
+            pk__in=list(views.values_list("pk", flat=True)[1:])
+        ).delete()
+
+
+def merge_post_analytics(apps, schema_editor):
+    PostAnalytics = apps.get_model("blog", "PostAnalytics")
+    duplicated = (
+        PostAnalytics.objects.values("post_id").annotate(n=Count("id")).filter(n__gt=1)
+    )
+    for row in duplicated:
+        first, *rest = PostAnalytics.objects.filter(post_id=row["post_id"]).order_by(
+            "timestamp"
+        )
+        for analytics in rest:
+            first.views += analytics.views
+            first.impressions += analytics.impressions
+            first.clicks += analytics.clicks
+        if first.impressions > 0:
+            first.click_through_rate = (first.clicks / first.impressions) * 100
+        first.save()
+        PostAnalytics.objects.filter(pk__in=[a.pk for a in rest]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_post_status_created_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_post_slugs, migrations.RunPython.noop),
+        migrations.RunPython(dedupe_post_views, migrations.RunPython.noop),
+        migrations.RunPython(merge_post_analytics, migrations.RunPython.noop),
+    ]
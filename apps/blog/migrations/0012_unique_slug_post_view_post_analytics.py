@@ -0,0 +1,51 @@
+# Generated by Django 4.2.16 on 2026-10-18 21:05
+
+import django.db.models.deletion
+from apps.blog.migration_operations import AddUniqueConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('blog', '0011_dedupe_before_unique_constraints'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='post',
+                    name='slug',
+                    field=models.CharField(max_length=150, unique=True),
+                ),
+                migrations.AlterField(
+                    model_name='postanalytics',
+                    name='post',
+                    field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='post_analytics', to='blog.post'),
+                ),
+                migrations.AddConstraint(
+                    model_name='postview',
+                    constraint=models.UniqueConstraint(fields=('post', 'ip_address'), name='unique_post_view_ip'),
+                ),
+            ],
+            database_operations=[
+                AddUniqueConcurrently(
+                    model_name='post',
+                    columns=['slug'],
+                    name='blog_post_slug_uniq',
+                ),
+                AddUniqueConcurrently(
+                    model_name='postanalytics',
+                    columns=['post_id'],
+                    name='blog_postanalytics_post_id_uniq',
+                ),
+                AddUniqueConcurrently(
+                    model_name='postview',
+                    columns=['post_id', 'ip_address'],
+                    name='unique_post_view_ip',
+                ),
+            ],
+        ),
+    ]
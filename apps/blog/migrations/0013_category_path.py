@@ -0,0 +1,41 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:14
+
+from django.db import migrations, models
+
+
+def populate_category_paths(apps, schema_editor):
+    Category = apps.get_model("blog", "Category")
+    level = list(Category.objects.filter(parent__isnull=True))
+    parent_paths = {}
+    depth = 0
+    while level:
+        for category in level:
+            prefix = parent_paths.get(category.parent_id, "/")
+            category.path = f"{prefix}{category.id.hex}/"
+            category.depth = depth
+            parent_paths[category.id] = category.path
+        Category.objects.bulk_update(level, ["path", "depth"])
+        level = list(Category.objects.filter(parent_id__in=[c.id for c in level]))
+        depth += 1
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_unique_slug_post_view_post_analytics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='category',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=1000),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_category_paths, migrations.RunPython.noop),
+    ]
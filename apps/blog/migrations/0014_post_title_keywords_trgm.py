@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-18 22:31
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from apps.blog.migration_operations import AddPostgresIndexConcurrently
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('blog', '0013_category_path'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        AddPostgresIndexConcurrently(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('keywords'), name='gin_trgm_ops'), name='post_title_keywords_trgm'),
+        ),
+    ]
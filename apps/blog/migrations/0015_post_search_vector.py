@@ -0,0 +1,50 @@
+# Generated by Django 4.2.16 on 2026-10-18 23:10
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from apps.blog.migration_operations import AddPostgresIndexConcurrently
+from django.db import migrations
+
+
+BATCH_SIZE = 1000
+
+
+def populate_search_vector(apps, schema_editor):
+    from apps.blog.search import search_vector
+
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    # Por lotes ordenados por pk: sin atomic, cada UPDATE se confirma solo y
+    # no bloquea ni reescribe toda la tabla en una transaccion
+    Post = apps.get_model("blog", "Post")
+    posts = Post.objects.order_by("pk")
+    last_pk = None
+    while True:
+        batch = posts if last_pk is None else posts.filter(pk__gt=last_pk)
+        pks = list(batch.values_list("pk", flat=True)[:BATCH_SIZE])
+        if not pks:
+            break
+        Post.objects.filter(pk__in=pks).update(search_vector=search_vector())
+        last_pk = pks[-1]
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('blog', '0014_post_title_keywords_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(populate_search_vector, migrations.RunPython.noop),
+        AddPostgresIndexConcurrently(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='post_search_vector_gin'),
+        ),
+    ]
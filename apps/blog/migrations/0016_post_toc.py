@@ -0,0 +1,43 @@
+# Generated by Django 4.2.16 on 2026-10-18 20:26
+
+import apps.blog.indexes
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_post_search_vector'),
+    ]
+
+    operations = [
+        # Los indices GIN ya existen en PostgreSQL; solo cambia la clase en el
+        # estado para que SQLite no intente crearlos al reconstruir la tabla
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.RemoveIndex(
+                    model_name='post',
+                    name='post_title_keywords_trgm',
+                ),
+                migrations.RemoveIndex(
+                    model_name='post',
+                    name='post_search_vector_gin',
+                ),
+                migrations.AddIndex(
+                    model_name='post',
+                    index=apps.blog.indexes.PostgresGinIndex(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('title'), name='gin_trgm_ops'), django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('keywords'), name='gin_trgm_ops'), name='post_title_keywords_trgm'),
+                ),
+                migrations.AddIndex(
+                    model_name='post',
+                    index=apps.blog.indexes.PostgresGinIndex(fields=['search_vector'], name='post_search_vector_gin'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='toc',
+            field=models.JSONField(blank=True, default=list, editable=False),
+        ),
+    ]
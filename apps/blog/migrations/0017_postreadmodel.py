@@ -0,0 +1,28 @@
+# Generated by Django 4.2.16 on 2026-10-18 20:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_post_toc'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostReadModel',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='read_model', serialize=False, to='blog.post')),
+                ('slug', models.CharField(max_length=150, unique=True)),
+                ('detail', models.TextField()),
+                ('list_item', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Post read model',
+                'verbose_name_plural': 'Post read models',
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.16 on 2026-10-18 20:42
+
+from apps.blog.migration_operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('blog', '0018_thumbnail_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostAnalyticsDaily',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('unique_viewers', models.PositiveIntegerField(default=0)),
+                ('impressions', models.PositiveIntegerField(default=0)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('day', models.DateField()),
+            ],
+            options={
+                'verbose_name': 'Post analytics (daily)',
+                'verbose_name_plural': 'Post analytics (daily)',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostAnalyticsHourly',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('unique_viewers', models.PositiveIntegerField(default=0)),
+                ('impressions', models.PositiveIntegerField(default=0)),
+                ('clicks', models.PositiveIntegerField(default=0)),
+                ('hour', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Post analytics (hourly)',
+                'verbose_name_plural': 'Post analytics (hourly)',
+            },
+        ),
+        migrations.AddField(
+            model_name='postanalyticshourly',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.post'),
+        ),
+        migrations.AddField(
+            model_name='postanalyticsdaily',
+            name='post',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.post'),
+        ),
+        migrations.AddIndex(
+            model_name='postanalyticshourly',
+            index=models.Index(fields=['hour'], name='post_analytics_hour_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='postanalyticshourly',
+            constraint=models.UniqueConstraint(fields=('post', 'hour'), name='unique_post_analytics_hour'),
+        ),
+        migrations.AddConstraint(
+            model_name='postanalyticsdaily',
+            constraint=models.UniqueConstraint(fields=('post', 'day'), name='unique_post_analytics_day'),
+        ),
+        # PostView puede ser grande: el indice se crea sin bloquear escrituras
+        AddIndexConcurrently(
+            model_name='postview',
+            index=models.Index(fields=['timestamp'], name='post_view_timestamp_idx'),
+        ),
+    ]
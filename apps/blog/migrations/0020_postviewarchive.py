@@ -0,0 +1,31 @@
+# Generated by Django 4.2.16 on 2026-10-18 20:46
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0019_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostViewArchive',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.post')),
+            ],
+            options={
+                'verbose_name': 'Post view archive',
+                'verbose_name_plural': 'Post view archive',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='postviewarchive',
+            constraint=models.UniqueConstraint(fields=('post', 'day'), name='unique_post_view_archive_day'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.16 on 2026-10-18 20:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0020_postviewarchive'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postanalytics',
+            name='time_on_page_histogram',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='postanalytics',
+            name='time_on_page_samples',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -1,9 +1,26 @@
 import uuid
 
+from apps.blog import autocomplete
+from apps.blog import caching as blog_cache
+from apps.blog import live
+from apps.blog.indexes import PostgresGinIndex
+from apps.blog.search import update_search_vector
+from apps.blog.toc import extract_toc
 from apps.blog.utils import get_client_ip
 from ckeditor.fields import RichTextField
-from django.db import models
-from django.db.models.signals import post_save
+from django.contrib.postgres.indexes import OpClass
+from django.contrib.postgres.search import SearchVectorField
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+from django.db.models import (
+    Case,
+    ExpressionWrapper,
+    F,
+    Value,
+    When,
+)
+from django.db.models.functions import Concat, Substr, Upper
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.text import slugify
@@ -35,20 +52,80 @@ class Category(models.Model):
     thumbnail = models.ImageField(
         upload_to=category_thumbnail_path, blank=True, null=True
     )
+    # Variantes redimensionadas de thumbnail (ver apps.blog.thumbnails)
+    thumbnail_variants = models.JSONField(default=dict, blank=True, editable=False)
     slug = models.CharField(max_length=120)
 
+    # Ruta materializada "/<id raiz>/.../<id>/": los descendientes de una
+    # categoria son las filas cuya ruta empieza con la suya
+    path = models.CharField(max_length=1000, db_index=True, editable=False)
+    depth = models.PositiveIntegerField(default=0, editable=False)
+
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
+    def build_path(self):
+        parent_path = self.parent.path if self.parent_id else "/"
+        return f"{parent_path}{self.id.hex}/"
+
+    def clean(self):
+        if self.parent_id and self.path and self.parent.path.startswith(self.path):
+            raise ValidationError(
+                {"parent": "A category cannot be moved inside itself."}
+            )
+
+    def save(self, *args, **kwargs):
+        old_path = self.path
+        if self.parent_id and old_path and self.parent.path.startswith(old_path):
+            raise ValueError("A category cannot be moved inside itself.")
+
+        self.path = self.build_path()
+        self.depth = self.path.count("/") - 2
+        super().save(*args, **kwargs)
+
+        if old_path and old_path != self.path:
+            from apps.blog import read_model
+
+            # Mover la categoria: reescribir la ruta de todo el subarbol en un UPDATE
+            Category.objects.filter(path__startswith=old_path).exclude(
+                pk=self.pk
+            ).update(
+                path=Concat(Value(self.path), Substr("path", len(old_path) + 1)),
+                depth=F("depth") + (self.path.count("/") - old_path.count("/")),
+            )
+            # El UPDATE no envia post_save: los posts de las subcategorias se
+            # reconstruyen aqui (los de esta categoria, en su post_save)
+            post_ids = list(
+                Post.objects.filter(category__path__startswith=self.path)
+                .exclude(category_id=self.pk)
+                .values_list("pk", flat=True)
+            )
+            if post_ids:
+                transaction.on_commit(lambda: read_model.schedule_rebuild(post_ids))
+
+    def get_descendants(self, include_self=True):
+        categories = Category.objects.filter(path__startswith=self.path)
+        if not include_self:
+            categories = categories.exclude(pk=self.pk)
+        return categories
+
 
 class Post(models.Model):
     class PostObjects(models.Manager):
         def get_queryset(self):
             return super().get_queryset().filter(status="published")
 
+        def with_view_count(self):
+            # Lee el contador de PostAnalytics en la misma consulta (sin COUNT)
+            return (
+                self.get_queryset()
+                .select_related("category")
+                .annotate(view_count=F("post_analytics__views"))
+            )
+
     status_options = (
         ("draft", "Draft"),
         ("published", "Published"),
@@ -59,12 +136,19 @@ class Post(models.Model):
     description = models.CharField(max_length=255)
     content = RichTextField()
     thumbnail = models.ImageField(upload_to=blog_thumbnail_path, blank=True, null=True)
+    thumbnail_variants = models.JSONField(default=dict, blank=True, editable=False)
     keywords = models.CharField(max_length=150)
-    slug = models.CharField(max_length=150)
+    slug = models.CharField(max_length=150, unique=True)
     status = models.CharField(max_length=15, choices=status_options, default="draft")
 
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
 
+    # tsvector ponderado (titulo, keywords/descripcion, contenido); se
+    # recalcula en SQL al guardar. Solo se usa en PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+    # Tabla de contenidos extraida del HTML al guardar (ver extract_toc)
+    toc = models.JSONField(default=list, blank=True, editable=False)
+
     objects = models.Manager()  # default manager
     post_objects = PostObjects()  # custom manager
 
@@ -78,10 +162,45 @@ class Post(models.Model):
             "status",
             "-created_at",
         )
+        indexes = [
+            # Paginacion por cursor: status = 'published' ORDER BY created_at, id
+            models.Index(
+                fields=["status", "created_at", "id"],
+                name="post_status_created_id_idx",
+            ),
+            # ?keyword= (icontains compara UPPER(columna)); solo PostgreSQL
+            PostgresGinIndex(
+                OpClass(Upper("title"), name="gin_trgm_ops"),
+                OpClass(Upper("keywords"), name="gin_trgm_ops"),
+                name="post_title_keywords_trgm",
+            ),
+            # Busqueda de texto completo (?q=); solo PostgreSQL
+            PostgresGinIndex(fields=["search_vector"], name="post_search_vector_gin"),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "content" in update_fields:
+            self.content, self.toc = extract_toc(self.content)
+            if update_fields is not None:
+                kwargs["update_fields"] = {*update_fields, "toc"}
+        super().save(*args, **kwargs)
+
+    def sync_headings(self):
+        """
+        Mantiene las filas de Heading iguales a la tabla de contenidos
+        """
+        fields = ("title", "slug", "level", "order")
+        existing = list(Heading.objects.filter(post=self).values(*fields))
+        if existing != self.toc:
+            Heading.objects.filter(post=self).delete()
+            Heading.objects.bulk_create(
+                [Heading(post=self, **heading) for heading in self.toc]
+            )
+
 
 class PostView(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -89,10 +208,41 @@ class PostView(models.Model):
     ip_address = models.GenericIPAddressField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "ip_address"], name="unique_post_view_ip"
+            ),
+        ]
+        indexes = [
+            # Vistas nuevas por hora (rollups) sin recorrer toda la tabla
+            models.Index(fields=["timestamp"], name="post_view_timestamp_idx"),
+        ]
+
+
+class PostViewArchive(models.Model):
+    """
+    Filas de PostView ya podadas (apps.blog.retention), contadas por post y dia
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="+")
+    day = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Post view archive"
+        verbose_name_plural = "Post view archive"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "day"], name="unique_post_view_archive_day"
+            ),
+        ]
+
 
 class PostAnalytics(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
-    post = models.ForeignKey(
+    post = models.OneToOneField(
         Post, on_delete=models.CASCADE, related_name="post_analytics"
     )
     views = models.PositiveIntegerField(default=0)
@@ -100,33 +250,144 @@ class PostAnalytics(models.Model):
     clicks = models.PositiveIntegerField(default=0)
     click_through_rate = models.FloatField(default=0)
     avg_time_on_page = models.FloatField(default=0)
+    # Muestras de los beacons y su histograma (apps.blog.time_on_page)
+    time_on_page_samples = models.PositiveIntegerField(default=0)
+    time_on_page_histogram = models.JSONField(default=list, blank=True)
     timestamp = models.DateTimeField(auto_now_add=True)
 
     def increment_click(self):
-        self.clicks += 1
-        self._update_click_through_rate()
-        self.save()
-
-    def _update_click_through_rate(self):
-        if self.impressions > 0:
-            self.click_through_rate = (self.clicks / self.impressions) * 100
-        else:
-            self.click_through_rate = 0
-        self.save()
+        return self._increment(clicks=1)
 
     def increment_impressions(self):
-        self.impressions += 1
-        self._update_click_through_rate()
-        self.save()
+        return self._increment(impressions=1)
+
+    async def aincrement_click(self):
+        await PostAnalytics.objects.filter(pk=self.pk).aupdate(
+            **self._increment_values(clicks=1)
+        )
+        await live.arecord(self.post_id, clicks=1)
+        await self.arefresh_from_db(
+            fields=["clicks", "impressions", "click_through_rate"]
+        )
+        return self.clicks, self.impressions, self.click_through_rate
+
+    def _increment(self, clicks=0, impressions=0):
+        PostAnalytics.objects.filter(pk=self.pk).update(
+            **self._increment_values(clicks, impressions)
+        )
+        live.record(self.post_id, clicks=clicks, impressions=impressions)
+        # La fila queda bloqueada hasta el commit, asi que se leen nuestros valores
+        self.refresh_from_db(fields=["clicks", "impressions", "click_through_rate"])
+        return self.clicks, self.impressions, self.click_through_rate
+
+    @staticmethod
+    def _increment_values(clicks=0, impressions=0):
+        # Un solo UPDATE atomico; el CTR se calcula en SQL con los nuevos valores
+        new_clicks = F("clicks") + clicks
+        new_impressions = F("impressions") + impressions
+        return {
+            "clicks": new_clicks,
+            "impressions": new_impressions,
+            "click_through_rate": Case(
+                When(
+                    impressions__gt=-impressions,
+                    then=ExpressionWrapper(
+                        new_clicks * 100.0 / new_impressions,
+                        output_field=models.FloatField(),
+                    ),
+                ),
+                default=Value(0.0),
+            ),
+        }
 
     def increment_views(self, request):
         ip_address = get_client_ip(request)
 
         # Solo incrementar si es una IP nueva para este post
-        if not PostView.objects.filter(post=self.post, ip_address=ip_address).exists():
-            PostView.objects.create(post=self.post, ip_address=ip_address)
+        post_view, created = PostView.objects.get_or_create(
+            post_id=self.post_id, ip_address=ip_address
+        )
+        if created:
+            PostAnalytics.objects.filter(pk=self.pk).update(views=F("views") + 1)
             self.views += 1
-            self.save()
+        live.record(self.post_id, visitor=ip_address, views=int(created))
+
+    async def aincrement_views(self, ip_address):
+        post_view, created = await PostView.objects.aget_or_create(
+            post_id=self.post_id, ip_address=ip_address
+        )
+        if created:
+            await PostAnalytics.objects.filter(pk=self.pk).aupdate(views=F("views") + 1)
+            self.views += 1
+        await live.arecord(self.post_id, visitor=ip_address, views=int(created))
+
+
+class PostAnalyticsRollup(models.Model):
+    """
+    Contadores de un post en un intervalo; los llena
+    tasks.rollup_post_analytics desde redis y PostView
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name="+")
+    views = models.PositiveIntegerField(default=0)
+    unique_viewers = models.PositiveIntegerField(default=0)
+    impressions = models.PositiveIntegerField(default=0)
+    clicks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+class PostAnalyticsHourly(PostAnalyticsRollup):
+    hour = models.DateTimeField()
+
+    class Meta:
+        verbose_name = "Post analytics (hourly)"
+        verbose_name_plural = "Post analytics (hourly)"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "hour"], name="unique_post_analytics_hour"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["hour"], name="post_analytics_hour_idx"),
+        ]
+
+
+class PostAnalyticsDaily(PostAnalyticsRollup):
+    day = models.DateField()
+
+    class Meta:
+        verbose_name = "Post analytics (daily)"
+        verbose_name_plural = "Post analytics (daily)"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["post", "day"], name="unique_post_analytics_day"
+            ),
+        ]
+
+
+class PostReadModel(models.Model):
+    """
+    JSON ya serializado (detalle y elemento de lista) de cada post publicado.
+    Lo reconstruye apps.blog.read_model de forma asincrona al cambiar el post.
+    """
+
+    post = models.OneToOneField(
+        Post, on_delete=models.CASCADE, primary_key=True, related_name="read_model"
+    )
+    slug = models.CharField(max_length=150, unique=True)
+    detail = models.TextField()
+    list_item = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Post read model"
+        verbose_name_plural = "Post read models"
+
+    def __str__(self):
+        return self.slug
 
 
 class Heading(models.Model):
@@ -167,3 +428,113 @@ class Heading(models.Model):
 def create_post_analytics(sender, instance, created, **kwargs):
     if created:
         PostAnalytics.objects.create(post=instance)
+
+
+@receiver(post_save, sender=Post)
+def sync_post_headings(sender, instance, **kwargs):
+    instance.sync_headings()
+
+
+@receiver(post_save, sender=Post)
+def update_post_search_vector(sender, instance, **kwargs):
+    update_search_vector(Post.objects.filter(pk=instance.pk))
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Category)
+def schedule_thumbnail_variants(sender, instance, **kwargs):
+    from apps.blog.tasks import generate_thumbnail_variants
+
+    # Solo si cambio la imagen: guardar las variantes no vuelve a disparar la tarea
+    name = instance.thumbnail.name if instance.thumbnail else ""
+    if name == instance.thumbnail_variants.get("source", ""):
+        return
+    if not name:
+        sender.objects.filter(pk=instance.pk).update(thumbnail_variants={})
+        instance.thumbnail_variants = {}
+        return
+    label = sender._meta.label
+    transaction.on_commit(
+        lambda: generate_thumbnail_variants.delay(label, str(instance.pk))
+    )
+
+
+@receiver(post_save, sender=Post)
+def schedule_content_images(sender, instance, **kwargs):
+    from apps.blog.tasks import optimize_post_images
+
+    if "<img" in (instance.content or ""):
+        post_id = str(instance.pk)
+        transaction.on_commit(lambda: optimize_post_images.delay(post_id))
+
+
+@receiver(post_save, sender=Post)
+def rebuild_post_read_model(sender, instance, **kwargs):
+    from apps.blog import read_model
+
+    post_ids = [instance.pk]
+    transaction.on_commit(lambda: read_model.schedule_rebuild(post_ids))
+
+
+@receiver(post_save, sender=Post)
+def update_autocomplete_index(sender, instance, **kwargs):
+    # Publicar, despublicar o renombrar actualiza el indice de prefijos
+    transaction.on_commit(lambda: autocomplete.sync_post(instance))
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_autocomplete_index(sender, instance, **kwargs):
+    # delete() deja pk en None, se guarda antes del commit
+    post_id = instance.pk
+    transaction.on_commit(lambda: autocomplete.unindex_post(post_id))
+
+
+def invalidate_on_commit(*namespaces):
+    transaction.on_commit(lambda: blog_cache.invalidate(*namespaces))
+
+
+@receiver(pre_save, sender=Post)
+def invalidate_renamed_post_cache(sender, instance, **kwargs):
+    # Si cambia el slug, la cache del slug anterior tambien queda obsoleta
+    old_slug = Post.objects.filter(pk=instance.pk).values_list("slug", flat=True)
+    old_slug = old_slug.first()
+    if old_slug and old_slug != instance.slug:
+        invalidate_on_commit(
+            blog_cache.post_detail(old_slug), blog_cache.post_headings(old_slug)
+        )
+
+
+@receiver([post_save, post_delete], sender=Post)
+def invalidate_post_cache(sender, instance, **kwargs):
+    invalidate_on_commit(
+        blog_cache.POST_LIST,
+        blog_cache.post_detail(instance.slug),
+        blog_cache.post_headings(instance.slug),
+    )
+
+
+@receiver([post_save, post_delete], sender=Heading)
+def invalidate_heading_cache(sender, instance, **kwargs):
+    slug = Post.objects.filter(pk=instance.post_id).values_list("slug", flat=True)
+    slug = slug.first()
+    if slug:
+        invalidate_on_commit(
+            blog_cache.post_detail(slug), blog_cache.post_headings(slug)
+        )
+
+
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_category_cache(sender, instance, **kwargs):
+    from apps.blog import read_model
+
+    posts = list(Post.objects.filter(category_id=instance.pk).values_list("pk", "slug"))
+    slugs = [slug for post_id, slug in posts]
+    # El JSON guardado de cada post incluye su categoria
+    post_ids = [post_id for post_id, slug in posts]
+    if post_ids:
+        transaction.on_commit(lambda: read_model.schedule_rebuild(post_ids))
+    invalidate_on_commit(
+        blog_cache.POST_LIST,
+        blog_cache.CATEGORY_TREE,
+        *[blog_cache.post_detail(slug) for slug in slugs],
+    )
@@ -0,0 +1,30 @@
+from apps.blog.caching import POST_LIST, cache_key
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class PostCursorPagination(CursorPagination):
+    """
+    Paginacion por cursor (keyset) sobre (created_at, id).
+    Solo consulta la pagina pedida, sin importar que tan profunda sea.
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering = ("-created_at", "-id")
+
+    def __init__(self):
+        self.page_size = settings.REST_FRAMEWORK.get("PAGE_SIZE", 10)
+        self.max_page_size = getattr(settings, "MAX_PAGE_SIZE", 100)
+
+    def get_cache_key(self, request, *parts):
+        cursor = request.query_params.get(self.cursor_query_param) or "first"
+        page_size = self.get_page_size(request)
+        return cache_key(POST_LIST, *parts, "cursor", cursor, page_size)
+
+
+class PostSearchPagination(LimitOffsetPagination):
+    """Resultados de busqueda: ordenados por relevancia, no por fecha"""
+
+    def __init__(self):
+        self.max_limit = getattr(settings, "MAX_PAGE_SIZE", 100)
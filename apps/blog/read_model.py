@@ -0,0 +1,216 @@
+import json
+import logging
+
+from apps.blog import caching as blog_cache
+from apps.blog.models import Post, PostAnalytics, PostReadModel
+from apps.blog.serializers import PostListSerializer, PostSerializer
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+logger = logging.getLogger(__name__)
+
+# Cambian con cada visita: no se guardan en el read model (ni en la cache), se
+# leen de PostAnalytics al responder
+VOLATILE_FIELDS = ("view_count",)
+
+
+def render(data):
+    return JSONRenderer().render(data).decode("utf-8")
+
+
+def without_volatile(data):
+    return {key: value for key, value in data.items() if key not in VOLATILE_FIELDS}
+
+
+def get_view_counts(post_ids):
+    """
+    {post_id: vistas} desde PostAnalytics (claves str, como el "id" del JSON)
+    """
+    rows = PostAnalytics.objects.filter(post_id__in=post_ids).values_list(
+        "post_id", "views"
+    )
+    return {str(post_id): views for post_id, views in rows}
+
+
+async def aget_view_counts(post_ids):
+    rows = PostAnalytics.objects.filter(post_id__in=post_ids).values_list(
+        "post_id", "views"
+    )
+    return {str(post_id): views async for post_id, views in rows}
+
+
+def merge_view_counts(items, counts):
+    return [{**item, "view_count": counts.get(str(item["id"]), 0)} for item in items]
+
+
+def with_view_counts(items):
+    return merge_view_counts(items, get_view_counts([item["id"] for item in items]))
+
+
+async def awith_view_counts(items):
+    counts = await aget_view_counts([item["id"] for item in items])
+    return merge_view_counts(items, counts)
+
+
+def merge_detail(detail, views):
+    # El JSON guardado es un objeto sin view_count: se agrega sin volver a parsearlo
+    return f'{detail[:-1]},"view_count":{views}}}'
+
+
+def published_posts():
+    return Post.post_objects.with_view_count().prefetch_related("heading")
+
+
+def build_row(post):
+    return PostReadModel(
+        post_id=post.pk,
+        slug=post.slug,
+        detail=render(without_volatile(PostSerializer(post).data)),
+        list_item=render(without_volatile(PostListSerializer(post).data)),
+    )
+
+
+def rebuild(post_ids):
+    """
+    Vuelve a serializar los posts indicados; los que ya no estan publicados
+    (o no existen) salen del read model
+    """
+    post_ids = list(post_ids)
+    with transaction.atomic():
+        rows = [build_row(post) for post in published_posts().filter(pk__in=post_ids)]
+        current = PostReadModel.objects.filter(post_id__in=post_ids)
+        slugs = set(current.values_list("slug", flat=True))
+        slugs.update(row.slug for row in rows)
+
+        current.exclude(post_id__in=[row.post_id for row in rows]).delete()
+        # Filas de otros posts que aun tienen un slug que se renombro
+        PostReadModel.objects.filter(slug__in=[row.slug for row in rows]).exclude(
+            post_id__in=post_ids
+        ).delete()
+        PostReadModel.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["post"],
+            update_fields=["slug", "detail", "list_item", "updated_at"],
+        )
+
+    blog_cache.invalidate(
+        blog_cache.POST_LIST, *[blog_cache.post_detail(slug) for slug in slugs]
+    )
+    return len(rows)
+
+
+def schedule_rebuild(post_ids):
+    from apps.blog.tasks import rebuild_post_read_model
+
+    post_ids = [str(post_id) for post_id in post_ids]
+    try:
+        rebuild_post_read_model.delay(post_ids)
+    except Exception as e:
+        # Sin broker se reconstruye en el proceso actual
+        logger.info(f"Error scheduling read model rebuild: {str(e)}")
+        rebuild(post_ids)
+
+
+def get_detail(slug):
+    """
+    (post_id, JSON del detalle) o None si el post aun no esta en el read model
+    """
+    return (
+        PostReadModel.objects.filter(slug=slug).values_list("post_id", "detail").first()
+    )
+
+
+async def aget_detail(slug):
+    return (
+        await PostReadModel.objects.filter(slug=slug)
+        .values_list("post_id", "detail")
+        .afirst()
+    )
+
+
+def get_list():
+    """
+    Elementos de lista de los posts publicados (mas recientes primero). Los que
+    aun no tienen fila se serializan en vivo y se programa su reconstruccion.
+    """
+    rows = Post.post_objects.order_by("-created_at").values_list(
+        "pk", "read_model__list_item"
+    )
+    rows = list(rows)
+    missing = [post_id for post_id, item in rows if item is None]
+    if not missing:
+        return json.loads("[" + ",".join(item for post_id, item in rows) + "]")
+
+    live = {
+        post.pk: PostListSerializer(post).data
+        for post in Post.post_objects.with_view_count().filter(pk__in=missing)
+    }
+    schedule_rebuild(missing)
+    return [
+        live[post_id] if item is None else json.loads(item) for post_id, item in rows
+    ]
+
+
+async def aget_list():
+    rows = Post.post_objects.order_by("-created_at").values_list(
+        "pk", "read_model__list_item"
+    )
+    rows = [row async for row in rows]
+    if any(item is None for post_id, item in rows):
+        # Poco frecuente (recien publicado): la ruta sync serializa y reprograma
+        return await sync_to_async(get_list)()
+    return json.loads("[" + ",".join(item for post_id, item in rows) + "]")
+
+
+def get_list_items(post_ids):
+    """
+    Elementos de lista de los posts indicados, en el mismo orden y con las
+    vistas actuales; los que ya no estan publicados se omiten
+    """
+    items = {
+        post_id: json.loads(item)
+        for post_id, item in PostReadModel.objects.filter(
+            post_id__in=post_ids
+        ).values_list("post_id", "list_item")
+    }
+    missing = [post_id for post_id in post_ids if post_id not in items]
+    if missing:
+        for post in Post.post_objects.with_view_count().filter(pk__in=missing):
+            items[post.pk] = PostListSerializer(post).data
+        published = [post_id for post_id in missing if post_id in items]
+        if published:
+            schedule_rebuild(published)
+    return with_view_counts(
+        [items[post_id] for post_id in post_ids if post_id in items]
+    )
+
+
+async def aget_list_items(post_ids):
+    rows = PostReadModel.objects.filter(post_id__in=post_ids).values_list(
+        "post_id", "list_item"
+    )
+    items = {post_id: item async for post_id, item in rows}
+    if any(post_id not in items for post_id in post_ids):
+        return await sync_to_async(get_list_items)(post_ids)
+    return await awith_view_counts([json.loads(items[post_id]) for post_id in post_ids])
+
+
+def diff(row, post):
+    """
+    Campos del read model que no coinciden con la serializacion en vivo
+    """
+    differences = []
+    expected = {
+        "detail": json.loads(render(without_volatile(PostSerializer(post).data))),
+        "list_item": json.loads(
+            render(without_volatile(PostListSerializer(post).data))
+        ),
+    }
+    for name, live in expected.items():
+        stored = json.loads(getattr(row, name))
+        for key in sorted(set(live) | set(stored)):
+            if live.get(key) != stored.get(key):
+                differences.append(f"{name}.{key}")
+    return differences
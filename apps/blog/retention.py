@@ -0,0 +1,100 @@
+import time
+from collections import Counter
+from datetime import timedelta
+
+from apps.blog import rollups
+from apps.blog.models import PostView, PostViewArchive
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+
+def get_cutoff(days=None):
+    """
+    Las filas de PostView anteriores a este instante se compactan y se borran.
+    Nunca mas recientes que la retencion por hora: rollup_hour aun las lee.
+    """
+    if days is None:
+        days = settings.BLOG_POST_VIEW_RETENTION_DAYS
+    return min(timezone.now() - timedelta(days=days), rollups.hourly_cutoff())
+
+
+def expired_views(cutoff):
+    # Recorre el indice de timestamp: los mas viejos primero
+    return PostView.objects.filter(timestamp__lt=cutoff).order_by("timestamp")
+
+
+def compact_batch(cutoff, batch_size):
+    """
+    Suma un lote de filas vencidas a PostViewArchive y las borra en la misma
+    transaccion corta (sin contar dos veces si otro proceso poda a la vez)
+    """
+    with transaction.atomic():
+        rows = list(
+            expired_views(cutoff)
+            .select_for_update(skip_locked=True)
+            .values_list("pk", "post_id", "timestamp")[:batch_size]
+        )
+        if not rows:
+            return 0
+
+        counts = Counter((post_id, timestamp.date()) for _, post_id, timestamp in rows)
+        add_to_archive(counts)
+        PostView.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+    return len(rows)
+
+
+def add_to_archive(counts):
+    """
+    Suma {(post_id, dia): vistas} a PostViewArchive con un solo upsert que
+    incrementa (ON CONFLICT DO UPDATE, PostgreSQL y SQLite)
+    """
+    fields = [PostViewArchive._meta.get_field(name) for name in ("post", "day")]
+    quote = connection.ops.quote_name
+    table = quote(PostViewArchive._meta.db_table)
+    post, day = (quote(field.column) for field in fields)
+    views = quote("views")
+
+    items = list(counts.items())
+    for offset in range(0, len(items), 1000):
+        chunk = items[offset : offset + 1000]
+        params = []
+        for (post_id, date), count in chunk:
+            params += [
+                fields[0].get_db_prep_value(post_id, connection),
+                fields[1].get_db_prep_value(date, connection),
+                count,
+            ]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {table} ({post}, {day}, {views}) "
+                f"VALUES {', '.join(['(%s, %s, %s)'] * len(chunk))} "
+                f"ON CONFLICT ({post}, {day}) "
+                f"DO UPDATE SET {views} = {table}.{views} + EXCLUDED.{views}",
+                params,
+            )
+
+
+def prune(days=None, batch_size=5000, max_batches=None, pause=0):
+    """
+    Compacta y borra PostView vencidos por lotes; pause (segundos) entre lotes
+    deja respirar a la replicacion y al autovacuum
+    """
+    cutoff = get_cutoff(days)
+    started = time.monotonic()
+    deleted = batches = 0
+    while max_batches is None or batches < max_batches:
+        compacted = compact_batch(cutoff, batch_size)
+        if not compacted:
+            break
+        deleted += compacted
+        batches += 1
+        if pause:
+            time.sleep(pause)
+
+    return {
+        "cutoff": cutoff.isoformat(),
+        "deleted": deleted,
+        "batches": batches,
+        "seconds": round(time.monotonic() - started, 3),
+    }
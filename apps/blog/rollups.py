@@ -0,0 +1,111 @@
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+# Contadores por hora (UTC) en redis: "post:rollup:<YYYYmmddHH>" con campos
+# "<post_id>:<views|impressions|clicks>". Los consolida tasks.rollup_post_analytics
+ROLLUP_KEY = "post:rollup"
+# HyperLogLog de visitantes por post y hora, y el set de posts con visitantes
+ROLLUP_VIEWERS_KEY = "post:rollup_viewers"
+
+FIELDS = ("views", "unique_viewers", "impressions", "clicks")
+COUNTER_FIELDS = ("views", "impressions", "clicks")
+
+
+def get_redis_ttl():
+    # Mientras existan los contadores se puede volver a consolidar la hora
+    return getattr(settings, "BLOG_ROLLUP_REDIS_TTL", 60 * 60 * 24 * 3)
+
+
+def get_hourly_retention():
+    # Dias que se guardan las filas por hora antes de quedar solo las diarias
+    return getattr(settings, "BLOG_ROLLUP_HOURLY_RETENTION_DAYS", 30)
+
+
+def truncate_hour(moment=None):
+    moment = moment or timezone.now()
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(day):
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def day_hours(day):
+    start = day_start(day)
+    return [start + timedelta(hours=hour) for hour in range(24)]
+
+
+def hour_key(hour):
+    return hour.astimezone(timezone.utc).strftime("%Y%m%d%H")
+
+
+def counters_key(hour):
+    return f"{ROLLUP_KEY}:{hour_key(hour)}"
+
+
+def viewers_key(hour, post_id=None):
+    if post_id is None:
+        return f"{ROLLUP_VIEWERS_KEY}:{hour_key(hour)}"
+    return f"{ROLLUP_VIEWERS_KEY}:{hour_key(hour)}:{post_id}"
+
+
+def add_to_pipeline(pipe, post_id, **deltas):
+    key = counters_key(truncate_hour())
+    for field, amount in deltas.items():
+        if amount and field in COUNTER_FIELDS:
+            pipe.hincrby(key, f"{post_id}:{field}", amount)
+    pipe.expire(key, get_redis_ttl())
+
+
+def add_visitor_to_pipeline(pipe, post_id, ip_address):
+    hour = truncate_hour()
+    pipe.pfadd(viewers_key(hour, post_id), ip_address)
+    pipe.expire(viewers_key(hour, post_id), get_redis_ttl())
+    pipe.sadd(viewers_key(hour), str(post_id))
+    pipe.expire(viewers_key(hour), get_redis_ttl())
+
+
+def parse_counters(values):
+    """
+    {post_id: {"views": n, ...}} a partir del hash de una hora
+    """
+    counters = {}
+    for name, amount in values.items():
+        post_id, field = name.decode().rsplit(":", 1)
+        counters.setdefault(post_id, {})[field] = int(amount)
+    return counters
+
+
+def parse_bucket(value, interval):
+    """
+    Inicio del bucket (hora o dia) a partir de una fecha ISO; None si no es valida
+    """
+    if value is None:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if timezone.is_naive(moment):
+        moment = moment.replace(tzinfo=timezone.utc)
+    if interval == "day":
+        return moment.astimezone(timezone.utc).date()
+    return truncate_hour(moment.astimezone(timezone.utc))
+
+
+def buckets(start, end, interval):
+    step = timedelta(days=1) if interval == "day" else timedelta(hours=1)
+    current = start
+    while current <= end:
+        yield current
+        current += step
+
+
+def today():
+    return timezone.now().astimezone(timezone.utc).date()
+
+
+def hourly_cutoff():
+    return day_start(today() - timedelta(days=get_hourly_retention()))
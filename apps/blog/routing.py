@@ -0,0 +1,7 @@
+from apps.blog.consumers import DashboardAnalyticsConsumer, PostAnalyticsConsumer
+from django.urls import path
+
+websocket_urlpatterns = [
+    path("ws/blog/analytics/", DashboardAnalyticsConsumer.as_asgi()),
+    path("ws/blog/posts/<str:slug>/analytics/", PostAnalyticsConsumer.as_asgi()),
+]
@@ -0,0 +1,125 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchHeadline,
+    SearchQuery,
+    SearchRank,
+    SearchVector,
+)
+from django.db import connection
+from django.db.models import F, Func, Q, TextField
+from django.utils.html import escape, strip_tags
+
+
+class StripTags(Func):
+    """Quita las etiquetas HTML del RichTextField dentro de PostgreSQL"""
+
+    function = "REGEXP_REPLACE"
+    template = "%(function)s(%(expressions)s, '<[^>]+>', ' ', 'g')"
+    output_field = TextField()
+
+
+def search_vector():
+    # Pesos: A titulo, B keywords y descripcion, C contenido sin HTML
+    config = settings.BLOG_SEARCH_CONFIG
+    return (
+        SearchVector("title", weight="A", config=config)
+        + SearchVector("keywords", weight="B", config=config)
+        + SearchVector("description", weight="B", config=config)
+        + SearchVector(StripTags("content"), weight="C", config=config)
+    )
+
+
+def update_search_vector(queryset):
+    """
+    Recalcula el tsvector guardado con un solo UPDATE (solo PostgreSQL)
+    """
+    if connection.vendor == "postgresql":
+        queryset.update(search_vector=search_vector())
+
+
+class PostgresSearchBackend:
+    """Busqueda sobre el tsvector guardado (indice GIN), con ranking y resaltado"""
+
+    def search(self, queryset, text):
+        config = settings.BLOG_SEARCH_CONFIG
+        query = SearchQuery(text, config=config, search_type="websearch")
+        return (
+            queryset.filter(search_vector=query)
+            .annotate(
+                rank=SearchRank(F("search_vector"), query),
+                snippet=SearchHeadline(
+                    StripTags("content"),
+                    query,
+                    config=config,
+                    start_sel="<mark>",
+                    stop_sel="</mark>",
+                    max_words=35,
+                    min_words=15,
+                    max_fragments=2,
+                ),
+            )
+            .order_by("-rank", "-created_at")
+        )
+
+
+class SimpleSearchBackend:
+    """
+    Alternativa sin PostgreSQL (SQLite, tests): icontains por termino y ranking
+    en memoria con los mismos pesos. No apta para catalogos grandes.
+    """
+
+    weights = {"title": 1.0, "keywords": 0.4, "description": 0.4, "content": 0.1}
+
+    def search(self, queryset, text):
+        terms = [term.lower() for term in text.split() if term]
+        if not terms:
+            return []
+
+        condition = Q()
+        for term in terms:
+            for field in self.weights:
+                condition |= Q(**{f"{field}__icontains": term})
+
+        results = []
+        for post in queryset.filter(condition).order_by("-created_at"):
+            content = strip_tags(post.content)
+            fields = {
+                "title": post.title,
+                "keywords": post.keywords,
+                "description": post.description,
+                "content": content,
+            }
+            post.rank = sum(
+                weight * fields[field].lower().count(term)
+                for field, weight in self.weights.items()
+                for term in terms
+            )
+            post.snippet = make_snippet(content, terms)
+            results.append(post)
+
+        # sorted es estable: a igual ranking se mantiene el orden por fecha
+        return sorted(results, key=lambda post: -post.rank)
+
+
+def make_snippet(text, terms, words=30):
+    words_list = text.split()
+    lowered = [word.lower() for word in words_list]
+    start = next(
+        (i for i, word in enumerate(lowered) if any(t in word for t in terms)), 0
+    )
+    start = max(start - words // 3, 0)
+    snippet = escape(" ".join(words_list[start : start + words]))
+
+    pattern = re.compile("|".join(re.escape(escape(t)) for t in terms), re.IGNORECASE)
+    return pattern.sub(lambda match: f"<mark>{match.group(0)}</mark>", snippet)
+
+
+def get_search_backend():
+    backend = getattr(settings, "BLOG_SEARCH_BACKEND", "auto")
+    if backend == "postgres" or (
+        backend == "auto" and connection.vendor == "postgresql"
+    ):
+        return PostgresSearchBackend()
+    return SimpleSearchBackend()
@@ -1,11 +1,27 @@
-from apps.blog.models import Category, Heading, Post, PostView
+from apps.blog import thumbnails
+from apps.blog.models import Category, Heading, Post, PostAnalytics, PostView
 from rest_framework import serializers
 
 
+def get_view_count(obj):
+    # Post.post_objects.with_view_count() ya trae el contador anotado
+    if hasattr(obj, "view_count"):
+        return obj.view_count or 0
+    try:
+        return obj.post_analytics.views
+    except PostAnalytics.DoesNotExist:
+        return 0
+
+
 class CategorySerializer(serializers.ModelSerializer):
+    thumbnail_srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = Category
-        fields = "__all__"
+        exclude = ["thumbnail_variants"]
+
+    def get_thumbnail_srcset(self, obj):
+        return thumbnails.srcset(obj.thumbnail_variants)
 
 
 class CategoryListSerializer(serializers.ModelSerializer):
@@ -30,19 +46,25 @@ class PostSerializer(serializers.ModelSerializer):
     category = CategorySerializer()
     heading = HeadingSerializer(many=True)
     view_count = serializers.SerializerMethodField()
+    thumbnail_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
-        fields = "__all__"
+        exclude = ["search_vector", "thumbnail_variants"]
 
     def get_view_count(self, obj):
-        return obj.post_view.count()
+        return get_view_count(obj)
+
+    def get_thumbnail_srcset(self, obj):
+        return thumbnails.srcset(obj.thumbnail_variants)
 
 
 class PostListSerializer(serializers.ModelSerializer):
     category = CategoryListSerializer()
     # views = PostViewSerializer(many=True, source="post_view")
     view_count = serializers.SerializerMethodField()
+    # {"webp": {"320": url, ...}, "jpeg": {...}} para srcset
+    thumbnail_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Post
@@ -52,10 +74,22 @@ class PostListSerializer(serializers.ModelSerializer):
             "slug",
             "description",
             "thumbnail",
+            "thumbnail_srcset",
             "category",
             # "views",
             "view_count",
         ]
 
     def get_view_count(self, obj):
-        return obj.post_view.count()
+        return get_view_count(obj)
+
+    def get_thumbnail_srcset(self, obj):
+        return thumbnails.srcset(obj.thumbnail_variants)
+
+
+class PostSearchSerializer(PostListSerializer):
+    rank = serializers.FloatField(read_only=True)
+    snippet = serializers.CharField(read_only=True)
+
+    class Meta(PostListSerializer.Meta):
+        fields = PostListSerializer.Meta.fields + ["rank", "snippet"]
@@ -0,0 +1,50 @@
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+
+HASHED_NAME_RE = re.compile(r"images/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$")
+
+
+def content_hash_directory():
+    return f"{getattr(settings, 'CKEDITOR_UPLOAD_PATH', '')}images/"
+
+
+def content_hash_name(digest, extension):
+    return f"{content_hash_directory()}{digest[:2]}/{digest}{extension.lower()}"
+
+
+def is_content_hash_name(name):
+    return bool(HASHED_NAME_RE.search(name))
+
+
+class ContentHashStorage(FileSystemStorage):
+    """
+    Storage de las subidas de CKEditor direccionado por contenido: el archivo
+    se guarda con su sha256 como nombre, asi una imagen subida varias veces se
+    guarda (y se optimiza) una sola vez.
+    """
+
+    def save(self, name, content, max_length=None):
+        # Las variantes se guardan junto al original con el nombre indicado
+        if not name.startswith(content_hash_directory()):
+            digest = hashlib.sha256()
+            for chunk in content.chunks():
+                digest.update(chunk)
+            content.seek(0)
+            name = content_hash_name(digest.hexdigest(), os.path.splitext(name)[1])
+
+        try:
+            return super().save(name, content, max_length=max_length)
+        except FileExistsError:
+            # El mismo contenido ya esta guardado (tambien si otra subida lo
+            # creo entre get_available_name y la escritura exclusiva)
+            return name
+
+    def get_available_name(self, name, max_length=None):
+        # Un nombre por hash nunca recibe sufijo: si existe, es el mismo archivo
+        if is_content_hash_name(name) and self.exists(name):
+            raise FileExistsError(name)
+        return super().get_available_name(name, max_length=max_length)
@@ -1,13 +1,76 @@
 import logging
+import time
+import uuid
+from collections import Counter
+from datetime import timedelta
 
 import redis
-from apps.blog.models import Post, PostAnalytics
+from apps.blog import (
+    live,
+    locks,
+    read_model,
+    retention,
+    rollups,
+    thumbnails,
+    time_on_page,
+    trending,
+)
+from apps.blog.async_redis import counters_redis
+from apps.blog.content_images import optimize_content_images
+from apps.blog.models import (
+    Post,
+    PostAnalytics,
+    PostAnalyticsDaily,
+    PostAnalyticsHourly,
+    PostView,
+    PostViewArchive,
+)
 from celery import shared_task
+from django.apps import apps
 from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    Case,
+    Count,
+    ExpressionWrapper,
+    F,
+    FloatField,
+    Max,
+    PositiveIntegerField,
+    Sum,
+    Value,
+    When,
+)
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 redis_client = redis.StrictRedis(host=settings.REDIS_HOST, port=6379, db=0)
 
+IMPRESSIONS_KEY = "post:impressions"
+IMPRESSIONS_SYNC_KEY = "post:impressions_sync"
+VIEWERS_KEY = "post:viewers"
+VIEWERS_ACTIVE_KEY = "post:viewers_active"
+VIEWERS_ACTIVE_SYNC_KEY = "post:viewers_active_sync"
+VIEWERS_MATERIALIZED_KEY = "post:viewers_materialized"
+VIEWERS_WINDOW_TTL = 60 * 60 * 24 * 2
+# Clics encolados por la ingesta de eventos (apps.blog.events)
+CLICKS_KEY = "post:clicks"
+CLICKS_SYNC_KEY = "post:clicks_sync"
+# Vistas "<post_id> <ip>" de la ingesta de eventos en modo exact, aun sin PostView
+VIEWS_PENDING_KEY = "post:views_pending"
+# Un solo drenado a la vez por clave "*_sync"; se renueva en cada lote
+DRAIN_LOCK_TIMEOUT = 60
+
+# HSCAN + HDEL en un paso: un lote que se leyo ya no esta en el hash, asi que
+# no se vuelve a aplicar aunque el worker muera antes de terminar
+POP_HASH_SCRIPT = """
+local result = redis.call("hscan", KEYS[1], ARGV[1], "count", ARGV[2])
+for i = 1, #result[2], 2 do
+    redis.call("hdel", KEYS[1], result[2][i])
+end
+return result
+"""
+
 
 @shared_task
 def increment_post_impressions(post_id):
@@ -22,39 +85,916 @@ def increment_post_impressions(post_id):
 
 
 @shared_task
-def sync_impression_to_db():
+def rebuild_post_read_model(post_ids):
     """
-    Sincronizar las impresiones almacenadas en redis con la base de datos
+    Vuelve a serializar los posts en el read model (ver apps.blog.read_model)
     """
-    keys = redis_client.keys("post:impressions:*")
-    for key in keys:
+    rebuilt = read_model.rebuild([uuid.UUID(str(post_id)) for post_id in post_ids])
+    logger.info(f"Rebuilt read model for {rebuilt} posts")
+    return rebuilt
+
+
+@shared_task(bind=True, max_retries=thumbnails.MAX_RETRIES)
+def generate_thumbnail_variants(self, model_label, pk):
+    """
+    Genera las variantes de la miniatura de un Post o Category (una tarea por
+    imagen, asi se reparten entre los workers)
+    """
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).first()
+    if instance is None or not instance.thumbnail:
+        return None
+
+    try:
+        variants = thumbnails.generate_variants(instance.thumbnail.name)
+    except thumbnails.VariantsInProgress as e:
+        logger.info(f"Thumbnail variants of {model_label} {pk} already in progress")
+        raise self.retry(exc=e, countdown=thumbnails.RETRY_COUNTDOWN)
+
+    if variants != instance.thumbnail_variants:
+        # save() envia post_save: invalida caches y reconstruye el read model
+        instance.thumbnail_variants = variants
+        instance.save(update_fields=["thumbnail_variants"])
+    return variants
+
+
+@shared_task(bind=True, max_retries=thumbnails.MAX_RETRIES)
+def optimize_post_images(self, post_id):
+    """
+    Reescribe los <img> del contenido con variantes optimizadas
+    """
+    post = Post.objects.filter(pk=post_id).only("content").first()
+    if post is None:
+        return False
+
+    try:
+        content = optimize_content_images(post.content)
+    except thumbnails.VariantsInProgress as e:
+        logger.info(f"Images of post {post_id} already in progress")
+        raise self.retry(exc=e, countdown=thumbnails.RETRY_COUNTDOWN)
+    if content == post.content:
+        return False
+
+    # Solo si nadie edito el post mientras tanto; update() no vuelve a
+    # disparar esta tarea (el texto y los encabezados no cambian)
+    updated = Post.objects.filter(pk=post_id, content=post.content).update(
+        content=content
+    )
+    if updated:
+        read_model.rebuild([post_id])
+    return bool(updated)
+
+
+def record_post_impressions(post_ids):
+    """
+    Incrementa las impresiones en redis con un solo round trip (pipeline)
+    """
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for post_id in post_ids:
+            pipe.hincrby(IMPRESSIONS_KEY, str(post_id), 1)
+            live.add_to_pipeline(pipe, post_id, impressions=1)
+        pipe.execute()
+    except Exception as e:
+        logger.info(f"Error recording impressions: {str(e)}")
+
+
+async def arecord_post_impressions(post_ids):
+    """
+    record_post_impressions para las vistas async (redis.asyncio)
+    """
+    try:
+        pipe = counters_redis().pipeline(transaction=False)
+        for post_id in post_ids:
+            pipe.hincrby(IMPRESSIONS_KEY, str(post_id), 1)
+            live.add_to_pipeline(pipe, post_id, impressions=1)
+        await pipe.execute()
+    except Exception as e:
+        logger.info(f"Error recording impressions: {str(e)}")
+
+
+def record_time_on_page(slug, seconds):
+    """
+    Suma una muestra de tiempo en pagina en redis (un round trip, sin la base
+    de datos); la consolida aggregate_time_on_page
+    """
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        time_on_page.add_to_pipeline(pipe, slug, seconds)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.info(f"Error recording time on page: {str(e)}")
+
+
+async def arecord_time_on_page(slug, seconds):
+    try:
+        pipe = counters_redis().pipeline(transaction=False)
+        time_on_page.add_to_pipeline(pipe, slug, seconds)
+        await pipe.execute()
+    except redis.RedisError as e:
+        logger.info(f"Error recording time on page: {str(e)}")
+
+
+def _parse_counter_deltas(items):
+    deltas = {}
+    for post_id, impressions in items:
+        if isinstance(post_id, bytes):
+            post_id = post_id.decode("utf-8")
         try:
-            post_id = key.decode("utf-8").split(":")[-1]
+            post_id = uuid.UUID(post_id.split(":")[-1])
+            impressions = int(impressions or 0)
+        except ValueError:
+            logger.info(f"Invalid counter {post_id}. Skipping.")
+            continue
+        if impressions > 0:
+            deltas[post_id] = deltas.get(post_id, 0) + impressions
+    return deltas
+
+
+def _prepare_analytics_deltas(deltas):
+    # Validar que los posts existen en una sola consulta y crear las
+    # analytics que falten; devuelve los ids validos y un CASE con los deltas
+    post_ids = set(Post.objects.filter(pk__in=deltas).values_list("pk", flat=True))
+    _create_missing_analytics(post_ids)
+
+    delta = Case(
+        *[When(post_id=post_id, then=Value(deltas[post_id])) for post_id in post_ids],
+        default=Value(0),
+        output_field=PositiveIntegerField(),
+    )
+    return post_ids, delta
+
+
+def _create_missing_analytics(post_ids):
+    existing = set(
+        PostAnalytics.objects.filter(post_id__in=post_ids).values_list(
+            "post_id", flat=True
+        )
+    )
+    PostAnalytics.objects.bulk_create(
+        [PostAnalytics(post_id=post_id) for post_id in set(post_ids) - existing]
+    )
+
+
+def apply_impression_deltas(deltas):
+    """
+    Aplica {post_id: impresiones} con un solo UPDATE usando F() (CTR en SQL)
+    """
+    with transaction.atomic():
+        post_ids, delta = _prepare_analytics_deltas(deltas)
+        if not post_ids:
+            return 0
+
+        PostAnalytics.objects.filter(post_id__in=post_ids).update(
+            impressions=F("impressions") + delta,
+            click_through_rate=ExpressionWrapper(
+                F("clicks") * 100.0 / (F("impressions") + delta),
+                output_field=FloatField(),
+            ),
+        )
+
+    return sum(deltas[post_id] for post_id in post_ids)
+
+
+def apply_click_deltas(deltas):
+    """
+    Aplica {post_id: clics} con un solo UPDATE usando F() (CTR en SQL)
+    """
+    with transaction.atomic():
+        post_ids, delta = _prepare_analytics_deltas(deltas)
+        if not post_ids:
+            return 0
+
+        PostAnalytics.objects.filter(post_id__in=post_ids).update(
+            clicks=F("clicks") + delta,
+            click_through_rate=Case(
+                When(
+                    impressions__gt=0,
+                    then=ExpressionWrapper(
+                        (F("clicks") + delta) * 100.0 / F("impressions"),
+                        output_field=FloatField(),
+                    ),
+                ),
+                default=Value(0.0),
+            ),
+        )
+
+    return sum(deltas[post_id] for post_id in post_ids)
+
+
+def apply_view_deltas(deltas):
+    """
+    Aplica {post_id: vistas} con un solo UPDATE usando F()
+    """
+    with transaction.atomic():
+        post_ids, delta = _prepare_analytics_deltas(deltas)
+        if not post_ids:
+            return 0
+
+        PostAnalytics.objects.filter(post_id__in=post_ids).update(
+            views=F("views") + delta
+        )
+
+    return sum(deltas[post_id] for post_id in post_ids)
+
+
+def drain_lock(sync_key):
+    return locks.hold(redis_client, f"{sync_key}:lock", DRAIN_LOCK_TIMEOUT)
+
+
+def _start_drain(key, sync_key):
+    """
+    RENAME es atomico: los nuevos incrementos van a una clave vacia. Si una
+    ejecucion anterior fallo, se termina de procesar la clave pendiente.
+    Devuelve False si no hay nada que drenar.
+    """
+    if redis_client.exists(sync_key):
+        return True
+    try:
+        redis_client.rename(key, sync_key)
+    except redis.ResponseError:
+        return False  # no hay contadores pendientes
+    return True
+
+
+def pop_hash_batch(key, cursor, count):
+    cursor, flat = redis_client.eval(POP_HASH_SCRIPT, 1, key, cursor, count)
+    return int(cursor), dict(zip(flat[::2], flat[1::2]))
+
+
+def _drain_counter_hash(key, sync_key, apply, batch_size):
+    with drain_lock(sync_key) as lock:
+        if lock is None:
+            logger.info(f"{sync_key} is already being drained")
+            return 0, 0
+        if not _start_drain(key, sync_key):
+            return 0, 0
+
+        keys = total = 0
+        cursor = 0
+        while True:
+            cursor, items = pop_hash_batch(sync_key, cursor, batch_size)
+            if items:
+                total += apply(_parse_counter_deltas(items.items()))
+                keys += len(items)
+            if cursor == 0:
+                redis_client.unlink(sync_key)
+                break
+            if not lock.renew():
+                logger.warning(f"Lost the drain lock of {sync_key}")
+                break
+    return keys, total
+
+
+def _drain_legacy_impression_keys(batch_size):
+    # Claves "post:impressions:<id>" de versiones anteriores (SCAN, no KEYS)
+    keys = impressions = 0
+    batch = []
+    scan = redis_client.scan_iter(f"{IMPRESSIONS_KEY}:*", count=batch_size)
+    for key in scan:
+        batch.append(key)
+        if len(batch) >= batch_size:
+            impressions += _drain_legacy_batch(batch)
+            keys += len(batch)
+            batch = []
+    if batch:
+        impressions += _drain_legacy_batch(batch)
+        keys += len(batch)
+    return keys, impressions
+
+
+def _drain_legacy_batch(keys):
+    # GET + DEL dentro de MULTI para no perder incrementos intermedios
+    pipe = redis_client.pipeline(transaction=True)
+    for key in keys:
+        pipe.get(key)
+        pipe.delete(key)
+    values = pipe.execute()[::2]
+    return apply_impression_deltas(_parse_counter_deltas(zip(keys, values)))
+
+
+@shared_task
+def sync_impression_to_db(batch_size=1000):
+    """
+    Sincronizar las impresiones almacenadas en redis con la base de datos
+    """
+    started = time.monotonic()
+    keys, impressions = _drain_counter_hash(
+        IMPRESSIONS_KEY, IMPRESSIONS_SYNC_KEY, apply_impression_deltas, batch_size
+    )
+    legacy_keys, legacy_impressions = _drain_legacy_impression_keys(batch_size)
+
+    result = {
+        "keys": keys + legacy_keys,
+        "impressions": impressions + legacy_impressions,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(
+        f"Synced {result['impressions']} impressions from {result['keys']} keys "
+        f"in {result['seconds']}s"
+    )
+    return result
+
+
+def _drain_time_on_page(batch_size):
+    """
+    Saca las muestras pendientes de hasta batch_size slugs: (slugs sacados,
+    {slug: muestras})
+    """
+    slugs = redis_client.spop(time_on_page.TIME_ON_PAGE_DIRTY_KEY, batch_size)
+    if not slugs:
+        return 0, {}
+
+    # HGETALL + DEL atomicos: un beacon posterior crea un hash nuevo
+    pipe = redis_client.pipeline(transaction=True)
+    for slug in slugs:
+        pipe.hgetall(time_on_page.sample_key(slug.decode()))
+        pipe.delete(time_on_page.sample_key(slug.decode()))
+    results = pipe.execute()[::2]
+    return len(slugs), {
+        slug.decode(): time_on_page.parse_samples(values)
+        for slug, values in zip(slugs, results)
+        if values
+    }
+
+
+def apply_time_on_page(samples):
+    """
+    Suma {slug: muestras} a avg_time_on_page y al histograma de cada post:
+    una consulta para los slugs y un solo UPDATE (bulk_update)
+    """
+    with transaction.atomic():
+        post_ids = dict(Post.objects.filter(slug__in=samples).values_list("pk", "slug"))
+        _create_missing_analytics(post_ids)
+        rows = list(
+            PostAnalytics.objects.select_for_update()
+            .filter(post_id__in=post_ids)
+            .only(
+                "post_id",
+                "avg_time_on_page",
+                "time_on_page_samples",
+                "time_on_page_histogram",
+            )
+        )
+        for analytics in rows:
+            time_on_page.merge(analytics, samples[post_ids[analytics.post_id]])
+        PostAnalytics.objects.bulk_update(
+            rows,
+            ["avg_time_on_page", "time_on_page_samples", "time_on_page_histogram"],
+        )
+
+    return sum(samples[slug]["samples"] for slug in post_ids.values())
+
+
+@shared_task
+def aggregate_time_on_page(batch_size=1000):
+    """
+    Consolida los beacons de tiempo en pagina de redis en PostAnalytics
+    """
+    started = time.monotonic()
+    slugs = samples = dropped = 0
+    while True:
+        popped, batch = _drain_time_on_page(batch_size)
+        if batch:
+            applied = apply_time_on_page(batch)
+            slugs += len(batch)
+            samples += applied
+            # Slugs que no existen: se descartan
+            dropped += sum(values["samples"] for values in batch.values()) - applied
+        if popped < batch_size:
+            break
+
+    result = {
+        "slugs": slugs,
+        "samples": samples,
+        "dropped": dropped,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(
+        f"Aggregated {samples} time on page samples from {slugs} slugs "
+        f"({dropped} dropped) in {result['seconds']}s"
+    )
+    return result
+
+
+@shared_task
+def sync_clicks_to_db(batch_size=1000):
+    """
+    Sincronizar los clics encolados en redis con la base de datos
+    """
+    started = time.monotonic()
+    keys, clicks = _drain_counter_hash(
+        CLICKS_KEY, CLICKS_SYNC_KEY, apply_click_deltas, batch_size
+    )
+    result = {
+        "keys": keys,
+        "clicks": clicks,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(f"Synced {clicks} clicks from {keys} keys in {result['seconds']}s")
+    return result
+
+
+def _viewers_window():
+    if settings.BLOG_VIEW_WINDOW == "day":
+        return timezone.now().date().isoformat()
+    return "all"
+
+
+def add_unique_view_to_pipeline(pipe, post_id, ip_address):
+    # El primer comando es el PFADD: 1 si es un visitante nuevo
+    window = _viewers_window()
+    key = f"{VIEWERS_KEY}:{post_id}:{window}"
+    pipe.pfadd(key, ip_address)
+    rollups.add_visitor_to_pipeline(pipe, post_id, ip_address)
+    if window != "all":
+        pipe.expire(key, VIEWERS_WINDOW_TTL)
+    pipe.sadd(VIEWERS_ACTIVE_KEY, f"{post_id}:{window}")
+
+
+def record_unique_view(post_id, ip_address):
+    """
+    Registra un visitante unico aproximado (HyperLogLog) sin tocar la base de datos
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    add_unique_view_to_pipeline(pipe, post_id, ip_address)
+    added = pipe.execute()[0]
+    # PFADD devuelve 1 si cambio la estimacion: un visitante nuevo
+    if added:
+        live.record(post_id, views=1)
+
+
+async def arecord_unique_view(post_id, ip_address):
+    pipe = counters_redis().pipeline(transaction=False)
+    add_unique_view_to_pipeline(pipe, post_id, ip_address)
+    added = (await pipe.execute())[0]
+    if added:
+        await live.arecord(post_id, views=1)
+
+
+def _materialize_active_viewers(lock, batch_size):
+    # SPOP saca cada lote del set: si el worker muere, el crecimiento no
+    # aplicado se recupera en la proxima visita (PFCOUNT - materializado)
+    today = _viewers_window()
+    views = 0
+    while True:
+        members = redis_client.spop(VIEWERS_ACTIVE_SYNC_KEY, batch_size) or []
+        members = [m.decode("utf-8") for m in members]
+        if members:
+            pipe = redis_client.pipeline(transaction=False)
+            for member in members:
+                pipe.pfcount(f"{VIEWERS_KEY}:{member}")
+            pipe.hmget(VIEWERS_MATERIALIZED_KEY, members)
+            *counts, materialized = pipe.execute()
+
+            deltas = {}
+            pipe = redis_client.pipeline(transaction=False)
+            for member, count, last in zip(members, counts, materialized):
+                post_id, window = member.split(":", 1)
+                delta = count - int(last or 0)
+                if delta > 0:
+                    post_id = uuid.UUID(post_id)
+                    deltas[post_id] = deltas.get(post_id, 0) + delta
+                if window in ("all", today):
+                    pipe.hset(VIEWERS_MATERIALIZED_KEY, member, count)
+                else:
+                    # ventana cerrada: ya no recibira visitas
+                    pipe.hdel(VIEWERS_MATERIALIZED_KEY, member)
+
+            views += apply_view_deltas(deltas) if deltas else 0
+            pipe.execute()
+        if len(members) < batch_size:
+            break
+        if not lock.renew():
+            logger.warning("Lost the drain lock of the active viewers")
+            break
+    return views
+
+
+@shared_task
+def materialize_unique_views(batch_size=1000):
+    """
+    Suma a PostAnalytics.views el crecimiento de PFCOUNT desde la ultima ejecucion
+    """
+    with drain_lock(VIEWERS_ACTIVE_SYNC_KEY) as lock:
+        if lock is None:
+            logger.info("Unique views are already being materialized")
+            return 0
+        if not _start_drain(VIEWERS_ACTIVE_KEY, VIEWERS_ACTIVE_SYNC_KEY):
+            return 0  # no hubo vistas nuevas
+        views = _materialize_active_viewers(lock, batch_size)
+
+    logger.info(f"Materialized {views} unique views")
+    return views
 
-            # Validar que el post existe
+
+def apply_pending_views(pairs):
+    """
+    Crea los PostView de {(post_id, ip)} que aun no existen y suma las vistas
+    nuevas; devuelve {post_id: vistas nuevas}
+    """
+    with transaction.atomic():
+        post_ids = set(
+            Post.objects.filter(pk__in={post_id for post_id, _ in pairs}).values_list(
+                "pk", flat=True
+            )
+        )
+        existing = set(
+            PostView.objects.filter(
+                post_id__in=post_ids, ip_address__in={ip for _, ip in pairs}
+            ).values_list("post_id", "ip_address")
+        )
+        new = [
+            (post_id, ip)
+            for post_id, ip in pairs
+            if post_id in post_ids and (post_id, ip) not in existing
+        ]
+        # Una vista creada a la vez por increment_views se ignora aqui y la
+        # corrige reconcile_post_view_counts
+        PostView.objects.bulk_create(
+            [PostView(post_id=post_id, ip_address=ip) for post_id, ip in new],
+            ignore_conflicts=True,
+        )
+        deltas = Counter(post_id for post_id, _ in new)
+        apply_view_deltas(deltas)
+    return deltas
+
+
+def _record_live_views(deltas):
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for post_id, amount in deltas.items():
+            live.add_to_pipeline(pipe, post_id, views=amount)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.info(f"Error recording live analytics: {str(e)}")
+
+
+@shared_task
+def sync_pending_views(batch_size=1000):
+    """
+    Convierte las vistas encoladas por la ingesta de eventos (modo exact) en
+    PostView y suma las nuevas a PostAnalytics
+    """
+    started = time.monotonic()
+    pending = views = 0
+    while True:
+        members = redis_client.spop(VIEWS_PENDING_KEY, batch_size)
+        pairs = set()
+        for member in members or []:
+            post_id, ip_address = member.decode().split(" ", 1)
             try:
-                post = Post.objects.get(id=post_id)
-            except Post.DoesNotExist:
-                logger.info(f"Post with ID {post_id} does not exist. Skipping.")
-                continue
-
-            # Obtener impresiones de redis
-            impressions = int(redis_client.get(key))
-            if impressions == 0:
-                redis_client.delete(key)
-                continue
-
-            # Obtener y crear instancia de category analytics
-            analytics, created = PostAnalytics.objects.get_or_create(post=post)
-
-            # Incrementar impresiones
-            analytics.impressions += impressions
-            analytics.save()
-
-            # Incrementar la tasa de clics (CTR)
-            analytics._update_click_through_rate()
-
-            # Eliminar la clave de redis despues de sincronizar
-            redis_client.delete(key)
-        except Exception as e:
-            print(f"Error syncing impressions for {key}: {str(e)}")
+                pairs.add((uuid.UUID(post_id), ip_address))
+            except ValueError:
+                logger.info(f"Invalid pending view {member}. Skipping.")
+        if pairs:
+            deltas = apply_pending_views(pairs)
+            pending += len(pairs)
+            views += sum(deltas.values())
+            _record_live_views(deltas)
+        if not members or len(members) < batch_size:
+            break
+
+    result = {
+        "pending": pending,
+        "views": views,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(
+        f"Created {views} post views from {pending} pending views "
+        f"in {result['seconds']}s"
+    )
+    return result
+
+
+@shared_task
+def reconcile_post_view_counts(batch_size=1000):
+    """
+    Recalcula PostAnalytics.views a partir de PostView (y de las vistas ya
+    compactadas en PostViewArchive), por lotes de posts
+    """
+    if settings.BLOG_VIEW_TRACKING != "exact":
+        # En modo "hll" no hay PostView: se borrarian las vistas materializadas
+        logger.info("View counts are only reconciled in exact tracking mode")
+        return 0
+
+    updated = 0
+    posts = Post.objects.order_by("pk").values_list("pk", flat=True)
+    batch = list(posts[:batch_size])
+
+    while batch:
+        counts = Counter(
+            dict(
+                PostView.objects.filter(post_id__in=batch)
+                .values_list("post_id")
+                .annotate(total=Count("id"))
+                .order_by()
+            )
+        )
+        counts.update(
+            dict(
+                PostViewArchive.objects.filter(post_id__in=batch)
+                .values_list("post_id")
+                .annotate(total=Sum("views"))
+                .order_by()
+            )
+        )
+
+        analytics = {
+            a.post_id: a for a in PostAnalytics.objects.filter(post_id__in=batch)
+        }
+        missing = [
+            PostAnalytics(post_id=post_id)
+            for post_id in batch
+            if post_id not in analytics
+        ]
+        for a in PostAnalytics.objects.bulk_create(missing):
+            analytics[a.post_id] = a
+
+        changed = []
+        for post_id, a in analytics.items():
+            views = counts.get(post_id, 0)
+            if a.views != views:
+                a.views = views
+                changed.append(a)
+        PostAnalytics.objects.bulk_update(changed, ["views"])
+        updated += len(changed)
+        batch = list(posts.filter(pk__gt=batch[-1])[:batch_size])
+
+    logger.info(f"Reconciled view counts for {updated} posts")
+    return updated
+
+
+def _read_rollup_counters(hour):
+    # {post_id: {"views", "impressions", "clicks", "unique_viewers"}} de redis
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hgetall(rollups.counters_key(hour))
+    pipe.smembers(rollups.viewers_key(hour))
+    values, viewer_posts = pipe.execute()
+    counters = rollups.parse_counters(values)
+
+    viewer_posts = [post_id.decode("utf-8") for post_id in viewer_posts]
+    if viewer_posts:
+        pipe = redis_client.pipeline(transaction=False)
+        for post_id in viewer_posts:
+            pipe.pfcount(rollups.viewers_key(hour, post_id))
+        for post_id, count in zip(viewer_posts, pipe.execute()):
+            counters.setdefault(post_id, {})["unique_viewers"] = count
+
+    parsed = {}
+    for post_id, values in counters.items():
+        try:
+            parsed[uuid.UUID(post_id)] = values
+        except ValueError:
+            logger.info(f"Invalid rollup counter {post_id}. Skipping.")
+    return parsed
+
+
+def rollup_hour(hour):
+    """
+    Consolida una hora en PostAnalyticsHourly con valores absolutos, asi que se
+    puede repetir. Si los contadores de redis ya expiraron solo se recalculan
+    las vistas a partir de PostView (modo "exact")
+    """
+    counters = _read_rollup_counters(hour)
+    fields = list(rollups.FIELDS) if counters else []
+
+    if settings.BLOG_VIEW_TRACKING == "exact":
+        # PostView guarda cada vista contada con su hora: es la fuente durable
+        views = (
+            PostView.objects.filter(
+                timestamp__gte=hour, timestamp__lt=hour + timedelta(hours=1)
+            )
+            .values_list("post_id")
+            .annotate(total=Count("id"))
+            .order_by()
+        )
+        for values in counters.values():
+            values["views"] = 0
+        for post_id, total in views:
+            counters.setdefault(post_id, {})["views"] = total
+        fields = fields or ["views"]
+
+    post_ids = Post.objects.filter(pk__in=counters).values_list("pk", flat=True)
+    rows = [
+        PostAnalyticsHourly(
+            post_id=post_id,
+            hour=hour,
+            **{field: counters[post_id].get(field, 0) for field in rollups.FIELDS},
+        )
+        for post_id in post_ids
+    ]
+    if rows:
+        PostAnalyticsHourly.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["post", "hour"],
+            update_fields=fields,
+        )
+    return len(rows)
+
+
+def rollup_day(day):
+    """
+    Suma las horas del dia en PostAnalyticsDaily. Los visitantes unicos salen
+    de la union de los HyperLogLog por hora mientras sigan en redis
+    """
+    start = rollups.day_start(day)
+    totals = list(
+        PostAnalyticsHourly.objects.filter(
+            hour__gte=start, hour__lt=start + timedelta(days=1)
+        )
+        .values("post_id")
+        .annotate(
+            views=Sum("views"),
+            impressions=Sum("impressions"),
+            clicks=Sum("clicks"),
+            unique_viewers=Max("unique_viewers"),
+        )
+        .order_by()
+    )
+    if not totals:
+        return 0
+
+    existing = dict(
+        PostAnalyticsDaily.objects.filter(day=day).values_list(
+            "post_id", "unique_viewers"
+        )
+    )
+    pipe = redis_client.pipeline(transaction=False)
+    for row in totals:
+        keys = [
+            rollups.viewers_key(hour, row["post_id"]) for hour in rollups.day_hours(day)
+        ]
+        pipe.exists(*keys)
+        pipe.pfcount(*keys)
+    results = pipe.execute()
+
+    rows = []
+    for row, available, union in zip(totals, results[::2], results[1::2]):
+        unique_viewers = existing.get(row["post_id"], row["unique_viewers"])
+        if available:
+            unique_viewers = max(union, row["unique_viewers"])
+        rows.append(
+            PostAnalyticsDaily(
+                post_id=row["post_id"],
+                day=day,
+                views=row["views"],
+                impressions=row["impressions"],
+                clicks=row["clicks"],
+                unique_viewers=unique_viewers,
+            )
+        )
+    PostAnalyticsDaily.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["post", "day"],
+        update_fields=list(rollups.FIELDS),
+    )
+    return len(rows)
+
+
+def downsample_hourly_rollups(batch_size=1000):
+    """
+    Pasa a PostAnalyticsDaily los dias fuera de la retencion por hora y borra
+    sus filas por hora, por lotes
+    """
+    cutoff = rollups.hourly_cutoff()
+    old = PostAnalyticsHourly.objects.filter(hour__lt=cutoff)
+    days = sorted(
+        {hour.date() for hour in old.values_list("hour", flat=True).distinct()}
+    )
+    for day in days:
+        rollup_day(day)
+
+    deleted = 0
+    while True:
+        pks = list(old.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        deleted += PostAnalyticsHourly.objects.filter(pk__in=pks).delete()[0]
+
+
+@shared_task
+def rollup_post_analytics(start=None, end=None):
+    """
+    Consolida los contadores por hora (redis y PostView) en los rollups por
+    hora y por dia. Por defecto las ultimas BLOG_ROLLUP_HOURS horas; start/end
+    (ISO) repiten una ventana. Las horas fuera de la retencion no se tocan.
+    """
+    started = time.monotonic()
+    end = rollups.parse_bucket(end, "hour") or rollups.truncate_hour()
+    start = rollups.parse_bucket(start, "hour") or end - timedelta(
+        hours=settings.BLOG_ROLLUP_HOURS - 1
+    )
+    hours = list(rollups.buckets(max(start, rollups.hourly_cutoff()), end, "hour"))
+
+    rows = sum(rollup_hour(hour) for hour in hours)
+    days = sorted({hour.date() for hour in hours})
+    for day in days:
+        rollup_day(day)
+    pruned = downsample_hourly_rollups()
+
+    result = {
+        "hours": len(hours),
+        "rows": rows,
+        "days": len(days),
+        "pruned": pruned,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info(
+        f"Rolled up {result['rows']} hourly rows over {result['hours']} hours, "
+        f"pruned {result['pruned']} in {result['seconds']}s"
+    )
+    return result
+
+
+def apply_trending_scores(gen, scores, scale=1):
+    """
+    Suma {post_id: puntaje} a los leaderboards de gen: el global y los de la
+    categoria del post y sus ancestros (una consulta)
+    """
+    rows = Post.post_objects.filter(pk__in=scores).values_list("pk", "category__path")
+    scored = {
+        post_id: (
+            scores[post_id] * scale,
+            [trending.ALL, *trending.category_scopes(path or "")],
+        )
+        for post_id, path in rows
+    }
+    if scored:
+        pipe = redis_client.pipeline(transaction=False)
+        trending.add_scores_to_pipeline(pipe, gen, scored)
+        pipe.execute()
+    return len(scored)
+
+
+def _drain_trending_generation(gen, current, batch_size):
+    pending, sync = trending.pending_key(gen), trending.pending_sync_key(gen)
+    # Igual que las impresiones: lock exclusivo, RENAME y lotes con HSCAN+HDEL
+    with drain_lock(sync) as lock:
+        if lock is None:
+            logger.info(f"{sync} is already being drained")
+            return 0
+        if not _start_drain(pending, sync):
+            return 0
+
+        # Los puntajes de generaciones anteriores se pasan a la escala de la actual
+        scale = 2 ** (-(current - gen) * trending.GENERATION_HALF_LIVES)
+        posts = 0
+        cursor = 0
+        while True:
+            cursor, items = pop_hash_batch(sync, cursor, batch_size)
+            scores = {}
+            for post_id, score in items.items():
+                try:
+                    scores[uuid.UUID(post_id.decode())] = float(score)
+                except ValueError:
+                    logger.info(f"Invalid trending score {post_id}. Skipping.")
+            if scores:
+                posts += apply_trending_scores(current, scores, scale)
+            if cursor == 0:
+                redis_client.unlink(sync)
+                break
+            if not lock.renew():
+                logger.warning(f"Lost the drain lock of {sync}")
+                break
+    return posts
+
+
+@shared_task
+def update_trending(batch_size=1000):
+    """
+    Pasa los puntajes pendientes a los leaderboards de posts en tendencia
+    """
+    started = time.monotonic()
+    current = trending.generation()
+    trending.rollover(current)
+
+    posts = 0
+    generations = redis_client.smembers(trending.TRENDING_GENERATIONS_KEY)
+    for gen in sorted(int(gen) for gen in generations):
+        if gen > current:
+            continue
+        posts += _drain_trending_generation(gen, current, batch_size)
+        if gen < current:
+            # Ya nadie escribe en ella
+            redis_client.srem(trending.TRENDING_GENERATIONS_KEY, gen)
+
+    result = {"posts": posts, "seconds": round(time.monotonic() - started, 3)}
+    logger.info(f"Updated trending scores of {posts} posts in {result['seconds']}s")
+    return result
+
+
+@shared_task
+def prune_post_views(days=None, batch_size=5000, max_batches=1000):
+    """
+    Compacta en PostViewArchive y borra las filas de PostView mas viejas que
+    BLOG_POST_VIEW_RETENTION_DAYS (ver apps.blog.retention)
+    """
+    result = retention.prune(days, batch_size, max_batches)
+    logger.info(
+        f"Pruned {result['deleted']} post views older than {result['cutoff']} "
+        f"in {result['batches']} batches ({result['seconds']}s)"
+    )
+    return result
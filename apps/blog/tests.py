@@ -1,11 +1,85 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+from io import BytesIO, StringIO
+from types import ModuleType
 from unittest.mock import patch
 
-from apps.blog.models import Category, Heading, Post, PostAnalytics
+from apps.blog import autocomplete
+from apps.blog import caching as blog_cache
+from apps.blog import (
+    live,
+    read_model,
+    retention,
+    rollups,
+    thumbnails,
+    time_on_page,
+    trending,
+)
+from apps.blog.content_images import optimize_content_images
+from apps.blog.routing import websocket_urlpatterns
+from apps.blog.models import (
+    Category,
+    Heading,
+    Post,
+    PostAnalytics,
+    PostAnalyticsDaily,
+    PostAnalyticsHourly,
+    PostReadModel,
+    PostView,
+    PostViewArchive,
+)
+from apps.blog.serializers import PostListSerializer, PostSerializer
+from apps.blog.tasks import (
+    CLICKS_KEY,
+    CLICKS_SYNC_KEY,
+    IMPRESSIONS_KEY,
+    IMPRESSIONS_SYNC_KEY,
+    VIEWS_PENDING_KEY,
+    aggregate_time_on_page,
+    apply_click_deltas,
+    apply_trending_scores,
+    apply_view_deltas,
+    drain_lock,
+    generate_thumbnail_variants,
+    optimize_post_images,
+    materialize_unique_views,
+    reconcile_post_view_counts,
+    rollup_post_analytics,
+    record_post_impressions,
+    record_unique_view,
+    redis_client,
+    sync_clicks_to_db,
+    sync_impression_to_db,
+    sync_pending_views,
+    update_trending,
+)
+from apps.blog.toc import extract_toc
+from apps.blog.urls import async_urlpatterns
+from apps.blog.utils import BoundedExecutor
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from celery.exceptions import Retry
+from channels.routing import URLRouter
+from ckeditor_uploader.utils import storage as ckeditor_storage
 from django.conf import settings
 from django.core.cache import cache
-from django.test import TestCase
-from django.urls import reverse
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, IntegrityError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from django.utils import timezone
+from django_redis import get_redis_connection
 from rest_framework import status
+from PIL import Image
 from rest_framework.test import APIClient
 
 ### MODELS TESTS
@@ -63,7 +137,7 @@ class PostAnalyticsModelTest(TestCase):
             slug="analytics-post",
             category=self.category,
         )
-        self.analytics = PostAnalytics.objects.create(post=self.post)
+        self.analytics = PostAnalytics.objects.get(post=self.post)
 
     def test_click_through_rate_update(self):
         self.analytics.increment_impression()
@@ -369,3 +443,1903 @@ class IncrementPostClickViewTest(TestCase):
 
         post_analytics = PostAnalytics.objects.get(post=self.post)
         self.assertEqual(post_analytics.clicks, 1)
+
+
+class PostListCursorPaginationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+        self.api_key = settings.VALID_API_KEYS[0]
+        self.category = Category.objects.create(name="Cursor", slug="cursor")
+        now = timezone.now()
+        for i in range(5):
+            Post.objects.create(
+                title=f"Cursor Post {i}",
+                description="Cursor post",
+                content="Content",
+                slug=f"cursor-post-{i}",
+                category=self.category,
+                status="published",
+                created_at=now - timedelta(minutes=i),
+            )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_cursor_pages_follow_created_at(self):
+        url = reverse("post-list") + "?cursor=&page_size=2"
+        slugs = []
+        while url:
+            response = self.client.get(url, HTTP_X_API_KEY=self.api_key)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            data = response.json()
+            self.assertTrue(data["success"])
+            slugs += [post["slug"] for post in data["results"]]
+            url = data["next"]
+
+        self.assertEqual(slugs, [f"cursor-post-{i}" for i in range(5)])
+
+    def test_invalid_cursor(self):
+        url = reverse("post-list") + "?cursor=invalid"
+        response = self.client.get(url, HTTP_X_API_KEY=self.api_key)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class PostViewCountTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Views", slug="views")
+        self.posts = [
+            Post.objects.create(
+                title=f"Views Post {i}",
+                description="Views post",
+                content="Content",
+                slug=f"views-post-{i}",
+                category=self.category,
+                status="published",
+            )
+            for i in range(3)
+        ]
+
+    def test_list_serializer_reads_stored_counter(self):
+        PostAnalytics.objects.filter(post=self.posts[0]).update(views=7)
+
+        with self.assertNumQueries(1):
+            data = PostListSerializer(
+                Post.post_objects.with_view_count(), many=True
+            ).data
+
+        counts = {post["slug"]: post["view_count"] for post in data}
+        self.assertEqual(counts["views-post-0"], 7)
+        self.assertEqual(counts["views-post-1"], 0)
+
+    def test_reconcile_post_view_counts(self):
+        PostView.objects.create(post=self.posts[0], ip_address="10.0.0.1")
+        PostView.objects.create(post=self.posts[0], ip_address="10.0.0.2")
+        PostAnalytics.objects.filter(post=self.posts[1]).update(views=5)
+
+        reconcile_post_view_counts(batch_size=2)
+
+        views = dict(PostAnalytics.objects.values_list("post__slug", "views"))
+        self.assertEqual(views["views-post-0"], 2)
+        self.assertEqual(views["views-post-1"], 0)
+        self.assertEqual(views["views-post-2"], 0)
+
+
+class PostImpressionsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+        self.api_key = settings.VALID_API_KEYS[0]
+        self.category = Category.objects.create(name="Impressions", slug="imp")
+        self.posts = [
+            Post.objects.create(
+                title=f"Impressions Post {i}",
+                description="Impressions post",
+                content="Content",
+                slug=f"impressions-post-{i}",
+                category=self.category,
+                status="published",
+            )
+            for i in range(8)
+        ]
+
+    def tearDown(self):
+        cache.clear()
+
+    @patch("apps.blog.views.impressions_executor.submit")
+    def test_only_page_posts_are_recorded(self, mock_submit):
+        url = reverse("post-list") + "?page_size=3"
+        response = self.client.get(url, HTTP_X_API_KEY=self.api_key)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        page_ids = [post["id"] for post in response.json()["results"]]
+        self.assertEqual(len(page_ids), 3)
+        mock_submit.assert_called_once_with(record_post_impressions, page_ids)
+
+    def test_executor_drops_work_when_full(self):
+        executor = BoundedExecutor(max_workers=1, max_pending=1)
+        release = threading.Event()
+
+        first = executor.submit(release.wait)
+        with self.assertLogs("apps.blog.utils", "WARNING"):
+            self.assertIsNone(executor.submit(record_post_impressions, []))
+
+        release.set()
+        first.result(timeout=5)
+        # El callback que libera el lugar corre al terminar la tarea
+        time.sleep(0.05)
+        executor.submit(release.wait).result(timeout=5)
+
+    def test_record_post_impressions_pipeline(self):
+        post_ids = [str(post.id) for post in self.posts[:2]]
+        record_post_impressions(post_ids)
+        record_post_impressions(post_ids[:1])
+
+        counters = redis_client.hgetall("post:impressions")
+        self.assertEqual(int(counters[post_ids[0].encode()]), 2)
+        self.assertEqual(int(counters[post_ids[1].encode()]), 1)
+
+    def test_sync_impression_to_db(self):
+        first, second = self.posts[0], self.posts[1]
+        PostAnalytics.objects.filter(post=first).update(clicks=2, impressions=2)
+        record_post_impressions([first.id, first.id, second.id])
+        redis_client.set(f"post:impressions:{second.id}", 3)
+        redis_client.hset("post:impressions", str(uuid.uuid4()), 5)
+        redis_client.hset("post:impressions", "not-a-uuid", 5)
+
+        result = sync_impression_to_db(batch_size=2)
+
+        self.assertEqual(result["keys"], 5)
+        self.assertEqual(result["impressions"], 6)
+        first_analytics = PostAnalytics.objects.get(post=first)
+        self.assertEqual(first_analytics.impressions, 4)
+        self.assertEqual(first_analytics.click_through_rate, 50.0)
+        self.assertEqual(PostAnalytics.objects.get(post=second).impressions, 4)
+        self.assertFalse(redis_client.keys("post:impressions*"))
+
+    def test_impression_drain_is_exclusive(self):
+        post = self.posts[0]
+        record_post_impressions([post.id, post.id])
+
+        # Otra ejecucion tiene el lock: no se aplica nada
+        with drain_lock(IMPRESSIONS_SYNC_KEY) as lock:
+            self.assertIsNotNone(lock)
+            self.assertEqual(sync_impression_to_db()["impressions"], 0)
+        self.assertEqual(PostAnalytics.objects.get(post=post).impressions, 0)
+
+        # Un lote que fallo al aplicarse ya salio del hash: no se aplica dos veces
+        with patch(
+            "apps.blog.tasks.apply_impression_deltas", side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                sync_impression_to_db()
+        self.assertEqual(sync_impression_to_db()["impressions"], 0)
+        self.assertFalse(redis_client.exists(f"{IMPRESSIONS_SYNC_KEY}:lock"))
+
+
+@override_settings(BLOG_VIEW_TRACKING="hll", BLOG_VIEW_WINDOW="")
+class UniqueViewersTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+        self.category = Category.objects.create(name="Unique", slug="unique")
+        self.post = Post.objects.create(
+            title="Unique Post",
+            description="Unique post",
+            content="Content",
+            slug="unique-post",
+            category=self.category,
+            status="published",
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_detail_view_does_not_write_post_views(self):
+        url = reverse("post-detail", args=[self.post.slug])
+        for ip in ("10.0.0.1", "10.0.0.2", "10.0.0.1"):
+            response = self.client.get(url, REMOTE_ADDR=ip)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertFalse(PostView.objects.exists())
+        self.assertEqual(materialize_unique_views(), 2)
+        self.assertEqual(PostAnalytics.objects.get(post=self.post).views, 2)
+
+    def test_materialize_only_adds_growth(self):
+        record_unique_view(self.post.id, "10.0.0.1")
+        materialize_unique_views()
+        record_unique_view(self.post.id, "10.0.0.1")
+        record_unique_view(self.post.id, "10.0.0.2")
+
+        self.assertEqual(materialize_unique_views(), 1)
+        self.assertEqual(PostAnalytics.objects.get(post=self.post).views, 2)
+
+        # Sin PostView en modo "hll": reconciliar no borra las vistas
+        self.assertEqual(reconcile_post_view_counts(), 0)
+        self.assertEqual(PostAnalytics.objects.get(post=self.post).views, 2)
+
+    def test_overlapping_materializations_apply_once(self):
+        record_unique_view(self.post.id, "10.0.0.1")
+        record_unique_view(self.post.id, "10.0.0.2")
+
+        # Beat lanza otra ejecucion mientras la primera aplica sus deltas
+        overlapping = []
+
+        def apply(deltas):
+            overlapping.append(materialize_unique_views())
+            return apply_view_deltas(deltas)
+
+        with patch("apps.blog.tasks.apply_view_deltas", side_effect=apply):
+            self.assertEqual(materialize_unique_views(), 2)
+        self.assertEqual(overlapping, [0])
+        self.assertEqual(PostAnalytics.objects.get(post=self.post).views, 2)
+
+    @override_settings(BLOG_VIEW_WINDOW="day")
+    def test_day_window_counts_visitor_once_per_day(self):
+        record_unique_view(self.post.id, "10.0.0.1")
+        record_unique_view(self.post.id, "10.0.0.1")
+        materialize_unique_views()
+
+        tomorrow = timezone.now() + timedelta(days=1)
+        with patch("apps.blog.tasks.timezone.now", return_value=tomorrow):
+            record_unique_view(self.post.id, "10.0.0.1")
+            materialize_unique_views()
+
+        self.assertEqual(PostAnalytics.objects.get(post=self.post).views, 2)
+
+
+class AtomicIncrementTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(name="Atomic", slug="atomic")
+        self.post = Post.objects.create(
+            title="Atomic Post",
+            description="Atomic post",
+            content="Content",
+            slug="atomic-post",
+            category=self.category,
+            status="published",
+        )
+        self.analytics = PostAnalytics.objects.get(post=self.post)
+
+    def test_increments_return_new_values(self):
+        self.assertEqual(self.analytics.increment_click(), (1, 0, 0.0))
+        self.assertEqual(self.analytics.increment_impressions(), (1, 1, 100.0))
+        self.assertEqual(self.analytics.increment_impressions(), (1, 2, 50.0))
+
+    def test_increment_is_a_single_write(self):
+        with self.assertNumQueries(2):  # UPDATE + refresh
+            self.analytics.increment_click()
+
+    def test_stale_instance_does_not_lose_clicks(self):
+        stale = PostAnalytics.objects.get(pk=self.analytics.pk)
+        self.analytics.increment_click()
+        stale.increment_click()
+
+        self.analytics.refresh_from_db()
+        self.assertEqual(self.analytics.clicks, 2)
+
+    def test_increment_click_view(self):
+        url = reverse("post-increment-clicks", args=[self.post.slug])
+        self.client.post(url)
+        response = self.client.post(url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["clicks"], 2)
+
+
+class SchemaConstraintsTest(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.category = Category.objects.create(name="Schema", slug="schema")
+        self.post = Post.objects.create(
+            title="Schema Post",
+            description="Schema post",
+            content="Content",
+            slug="schema-post",
+            category=self.category,
+            status="published",
+        )
+
+    def test_slug_is_unique(self):
+        with self.assertRaises(IntegrityError):
+            Post.objects.create(
+                title="Other",
+                description="Other",
+                content="Content",
+                slug="schema-post",
+                category=self.category,
+            )
+
+    def test_post_analytics_is_one_to_one(self):
+        self.assertEqual(self.post.post_analytics.views, 0)
+        with self.assertRaises(IntegrityError):
+            PostAnalytics.objects.create(post=self.post)
+
+    def test_increment_views_once_per_ip(self):
+        request = self.factory.get("/", REMOTE_ADDR="10.0.0.1")
+        self.post.post_analytics.increment_views(request)
+        self.post.post_analytics.increment_views(request)
+
+        self.assertEqual(PostView.objects.filter(post=self.post).count(), 1)
+        self.assertEqual(PostAnalytics.objects.get(post=self.post).views, 1)
+
+
+class CacheInvalidationTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+        self.api_key = settings.VALID_API_KEYS[0]
+        self.category = Category.objects.create(name="Cache", slug="cache")
+        self.post = Post.objects.create(
+            title="Cached Post",
+            description="Cached post",
+            content="Content",
+            slug="cached-post",
+            category=self.category,
+            status="published",
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def get_list_titles(self):
+        url = reverse("post-list")
+        response = self.client.get(url, HTTP_X_API_KEY=self.api_key)
+        return [post["title"] for post in response.json()["results"]]
+
+    def test_post_save_invalidates_list_and_detail(self):
+        detail_url = reverse("post-detail", args=[self.post.slug])
+        self.assertEqual(self.get_list_titles(), ["Cached Post"])
+        self.client.get(detail_url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = "Edited Post"
+            self.post.save()
+
+        self.assertEqual(self.get_list_titles(), ["Edited Post"])
+        response = self.client.get(detail_url)
+        self.assertEqual(response.json()["results"]["title"], "Edited Post")
+
+    def test_detail_is_served_from_cache(self):
+        detail_url = reverse("post-detail", args=[self.post.slug])
+        self.client.get(detail_url)
+
+        Post.objects.filter(pk=self.post.pk).update(title="Not invalidated")
+        response = self.client.get(detail_url)
+        self.assertEqual(response.json()["results"]["title"], "Cached Post")
+
+    def test_content_save_invalidates_headings(self):
+        url = reverse("post-heading") + f"?slug={self.post.slug}"
+        self.assertEqual(self.client.get(url).json()["results"], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.content = "<h2>Intro</h2><p>Text</p>"
+            self.post.save()
+
+        results = self.client.get(url).json()["results"]
+        self.assertEqual([heading["slug"] for heading in results], ["intro"])
+
+    def test_category_save_invalidates_list(self):
+        self.get_list_titles()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Renamed"
+            self.category.save()
+
+        url = reverse("post-list")
+        response = self.client.get(url, HTTP_X_API_KEY=self.api_key)
+        self.assertEqual(response.json()["results"][0]["category"]["name"], "Renamed")
+
+
+class StampedeProtectionTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.calls = 0
+
+    def tearDown(self):
+        cache.clear()
+
+    def compute(self):
+        self.calls += 1
+        return f"value {self.calls}"
+
+    def test_hit_after_first_compute(self):
+        self.assertEqual(blog_cache.get_or_compute("k", self.compute), "value 1")
+        self.assertEqual(blog_cache.get_or_compute("k", self.compute), "value 1")
+        self.assertEqual(self.calls, 1)
+        stats = blog_cache.get_stats()
+        self.assertEqual((stats["miss"], stats["hit"], stats["recompute"]), (1, 1, 1))
+
+    def test_expired_value_is_served_stale_while_locked(self):
+        cache.set("k", ("old", time.time() - 1, 0), 60)
+        cache.add("k:lock", 1, 30)
+
+        self.assertEqual(blog_cache.get_or_compute("k", self.compute), "old")
+        self.assertEqual(self.calls, 0)
+        self.assertEqual(blog_cache.get_stats()["stale"], 1)
+
+    def test_expired_value_is_recomputed_by_lock_holder(self):
+        cache.set("k", ("old", time.time() - 1, 0), 60)
+
+        self.assertEqual(blog_cache.get_or_compute("k", self.compute), "value 1")
+        self.assertIsNone(cache.get("k:lock"))
+
+    def test_slow_recompute_keeps_lock_taken_by_another_process(self):
+        lock_key = cache.make_key("k:lock")
+        redis_conn = get_redis_connection("default")
+
+        def slow_compute():
+            # El lock vencio y otro proceso lo tomo mientras se calculaba
+            redis_conn.set(lock_key, "other")
+            return self.compute()
+
+        self.assertEqual(blog_cache.get_or_compute("k", slow_compute), "value 1")
+        self.assertEqual(redis_conn.get(lock_key), b"other")
+
+    def test_early_expiration_is_probabilistic(self):
+        cache.set("k", ("old", time.time() + 1, 10), 60)
+
+        with patch("apps.blog.caching.random.random", return_value=0.99):
+            self.assertEqual(blog_cache.get_or_compute("k", self.compute), "value 1")
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+        self.api_key = settings.VALID_API_KEYS[0]
+        self.category = Category.objects.create(name="Etag", slug="etag")
+        self.post = Post.objects.create(
+            title="Etag Post",
+            description="Etag post",
+            content="Content",
+            slug="etag-post",
+            category=self.category,
+            status="published",
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_detail_if_none_match(self):
+        url = reverse("post-detail", args=[self.post.slug])
+        response = self.client.get(url)
+        etag = response.headers["ETag"]
+        # El cuerpo lleva view_count: el ETag es debil
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn("Last-Modified", response.headers)
+
+        # Un 304 tambien cuenta la vista: solo redis, sin leer el post
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                url, HTTP_IF_NONE_MATCH=etag, REMOTE_ADDR="10.0.0.2"
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse([q for q in queries if "SELECT" in q["sql"]])
+        sync_pending_views()
+        self.assertEqual(PostAnalytics.objects.get(post=self.post).views, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_if_modified_since(self):
+        url = reverse("post-list")
+        response = self.client.get(url, HTTP_X_API_KEY=self.api_key)
+        last_modified = response.headers["Last-Modified"]
+
+        with patch(
+            "apps.blog.views.impressions_executor.submit"
+        ) as submit, CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                url, HTTP_X_API_KEY=self.api_key, HTTP_IF_MODIFIED_SINCE=last_modified
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertFalse([q for q in queries if "SELECT" in q["sql"]])
+        submit.assert_called_once_with(record_post_impressions, [str(self.post.pk)])
+
+    def test_not_modified_without_cached_page_runs_view(self):
+        url = reverse("post-list")
+        etag = self.client.get(url, HTTP_X_API_KEY=self.api_key).headers["ETag"]
+        cache.delete(blog_cache.cache_key(blog_cache.POST_LIST, "all"))
+
+        with patch("apps.blog.views.impressions_executor.submit") as submit:
+            response = self.client.get(
+                url, HTTP_X_API_KEY=self.api_key, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        submit.assert_called_once_with(record_post_impressions, [str(self.post.pk)])
+
+    def test_headings_if_none_match(self):
+        url = reverse("post-heading") + f"?slug={self.post.slug}"
+        etag = self.client.get(url).headers["ETag"]
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class CategoryTreeTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+        self.api_key = settings.VALID_API_KEYS[0]
+        self.root = Category.objects.create(name="Root", slug="root")
+        self.child = Category.objects.create(
+            name="Child", slug="child", parent=self.root
+        )
+        self.grandchild = Category.objects.create(
+            name="Grandchild", slug="grandchild", parent=self.child
+        )
+        self.other = Category.objects.create(name="Other", slug="other")
+        for category in (self.root, self.grandchild, self.other):
+            Post.objects.create(
+                title=f"{category.name} Post",
+                description="Tree post",
+                content="Content",
+                slug=f"{category.slug}-post",
+                category=category,
+                status="published",
+            )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_paths_are_materialized(self):
+        self.assertEqual(self.grandchild.depth, 2)
+        self.assertTrue(self.grandchild.path.startswith(self.child.path))
+        self.assertEqual(
+            set(self.root.get_descendants()),
+            {self.root, self.child, self.grandchild},
+        )
+
+    def test_moving_a_category_rewrites_its_subtree(self):
+        self.child.parent = self.other
+        self.child.save()
+
+        self.grandchild.refresh_from_db()
+        self.assertTrue(self.grandchild.path.startswith(self.other.path))
+        self.assertEqual(self.grandchild.depth, 2)
+        self.assertEqual(set(self.root.get_descendants()), {self.root})
+
+    def test_cannot_move_inside_itself(self):
+        self.root.parent = self.grandchild
+        with self.assertRaises(ValueError):
+            self.root.save()
+
+    def test_tree_endpoint(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("category-tree"))
+        self.assertEqual(len([q for q in queries if "SELECT" in q["sql"]]), 1)
+
+        tree = response.json()["results"]
+        self.assertEqual([node["slug"] for node in tree], ["other", "root"])
+        child = tree[1]["children"][0]
+        self.assertEqual(child["slug"], "child")
+        self.assertEqual(child["children"][0]["slug"], "grandchild")
+
+    def test_posts_in_category_and_descendants(self):
+        url = reverse("category-post-list", args=["root"])
+        response = self.client.get(url, HTTP_X_API_KEY=self.api_key)
+
+        slugs = {post["slug"] for post in response.json()["results"]}
+        self.assertEqual(slugs, {"root-post", "grandchild-post"})
+
+
+class PostFilterTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+
+        self.api_key = settings.VALID_API_KEYS[0]
+        self.tech = Category.objects.create(name="Tech", slug="tech")
+        self.python = Category.objects.create(
+            name="Python", slug="python", parent=self.tech
+        )
+        self.life = Category.objects.create(name="Life", slug="life")
+        posts = [
+            ("django-tips", self.python, "django, python"),
+            ("linux-tips", self.tech, "linux"),
+            ("cooking", self.life, "food"),
+        ]
+        for slug, category, keywords in posts:
+            Post.objects.create(
+                title=slug.replace("-", " ").title(),
+                description="Filter post",
+                content="Content",
+                slug=slug,
+                keywords=keywords,
+                category=category,
+                status="published",
+            )
+
+    def tearDown(self):
+        cache.clear()
+
+    def get(self, query):
+        url = reverse("post-list") + query
+        return self.client.get(url, HTTP_X_API_KEY=self.api_key).json()
+
+    def test_filter_by_category_includes_subcategories(self):
+        data = self.get("?category=tech")
+        slugs = {post["slug"] for post in data["results"]}
+        self.assertEqual(slugs, {"django-tips", "linux-tips"})
+
+    def test_filter_by_keyword(self):
+        data = self.get("?keyword=PYTHON")
+        self.assertEqual([post["slug"] for post in data["results"]], ["django-tips"])
+
+    def test_facets(self):
+        facets = {
+            f["slug"]: f["count"]
+            for f in self.get("?category=life")["extra_data"]["facets"]
+        }
+        self.assertEqual(facets, {"tech": 2, "python": 1, "life": 1})
+
+        facets = self.get("?keyword=tips")["extra_data"]["facets"]
+        self.assertEqual(
+            {f["slug"]: f["count"] for f in facets}, {"tech": 2, "python": 1}
+        )
+
+
+class PostSearchTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.api_key = settings.VALID_API_KEYS[0]
+        category = Category.objects.create(name="Tech", slug="tech")
+        posts = [
+            ("in-title", "Redis streams", "<p>Event logs explained</p>", "published"),
+            (
+                "in-content",
+                "Caching",
+                "<p>Using <b>redis</b> as a cache</p>",
+                "published",
+            ),
+            ("draft", "Redis draft", "<p>Redis</p>", "draft"),
+            ("other", "Django", "<p>Models and views</p>", "published"),
+        ]
+        for slug, title, content, status_ in posts:
+            Post.objects.create(
+                title=title,
+                description="Search post",
+                content=content,
+                slug=slug,
+                keywords="search",
+                category=category,
+                status=status_,
+            )
+
+    def search(self, query):
+        url = reverse("post-search") + query
+        return self.client.get(url, HTTP_X_API_KEY=self.api_key)
+
+    def test_results_ranked_by_relevance(self):
+        data = self.search("?q=redis").json()
+        self.assertEqual(data["count"], 2)
+        self.assertEqual(
+            [post["slug"] for post in data["results"]], ["in-title", "in-content"]
+        )
+        self.assertGreater(data["results"][0]["rank"], data["results"][1]["rank"])
+
+    def test_snippet_highlights_match_without_html(self):
+        result = self.search("?q=redis").json()["results"][1]
+        self.assertIn("<mark>redis</mark>", result["snippet"])
+        self.assertNotIn("<b>", result["snippet"])
+
+    def test_limit_and_offset(self):
+        data = self.search("?q=redis&limit=1&offset=1").json()
+        self.assertEqual(data["count"], 2)
+        self.assertEqual([post["slug"] for post in data["results"]], ["in-content"])
+
+    def test_query_required(self):
+        response = self.search("")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AutocompleteTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.api_key = settings.VALID_API_KEYS[0]
+        self.clear_index()
+        self.category = Category.objects.create(name="Tech", slug="tech")
+        self.post = self.create_post("Canción de Django", "django-song")
+        self.create_post("Django REST framework", "drf")
+
+    def tearDown(self):
+        self.clear_index()
+
+    def clear_index(self):
+        for key in autocomplete.redis_client.scan_iter(f"{autocomplete.PREFIX_KEY}*"):
+            autocomplete.redis_client.delete(key)
+        autocomplete.redis_client.delete(autocomplete.TITLES_KEY)
+
+    def create_post(self, title, slug, status_="published"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Post.objects.create(
+                title=title,
+                description="Autocomplete post",
+                content="Content",
+                slug=slug,
+                keywords="autocomplete",
+                category=self.category,
+                status=status_,
+            )
+
+    def slugs(self, query):
+        return [s["slug"] for s in autocomplete.suggest(query)]
+
+    def test_suggest_by_prefix(self):
+        self.assertEqual(self.slugs("dja"), ["drf", "django-song"])
+        self.assertEqual(self.slugs("cancion dj"), ["django-song"])
+        self.assertEqual(self.slugs("res djan"), ["drf"])
+        self.assertEqual(self.slugs("flask"), [])
+
+    def test_drafts_are_not_indexed(self):
+        self.create_post("Draft about Django", "draft", status_="draft")
+        self.assertNotIn("draft", self.slugs("draft"))
+
+    def test_rename_unpublish_and_delete_update_index(self):
+        self.post.title = "Flask tips"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        self.assertEqual(self.slugs("canc"), [])
+        self.assertEqual(self.slugs("fla"), ["django-song"])
+
+        self.post.status = "draft"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.save()
+        self.assertEqual(self.slugs("fla"), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.get(slug="drf").delete()
+        self.assertEqual(self.slugs("django"), [])
+
+    def test_suggest_walks_older_posts_in_chunks(self):
+        self.create_post("Django tips", "tips")
+        self.create_post("Django ORM", "orm")
+        self.create_post("Flask de prueba", "flask-1")
+        self.create_post("Flask de nuevo", "flask-2")
+        # "de" es el prefijo mas chico y sus posts mas recientes no dicen
+        # "django": hay que recorrerlo hasta el mas viejo
+        with patch.object(autocomplete, "SUGGEST_CHUNK_SIZE", 1):
+            self.assertEqual(self.slugs("de django"), ["django-song"])
+            self.assertEqual(
+                [s["slug"] for s in autocomplete.suggest("django", limit=2)],
+                ["orm", "tips"],
+            )
+
+    def test_autocomplete_endpoint(self):
+        url = reverse("post-autocomplete")
+        response = self.client.get(
+            url, {"q": "djan", "limit": 1}, HTTP_X_API_KEY=self.api_key
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [s["title"] for s in response.json()["results"]], ["Django REST framework"]
+        )
+
+
+class TableOfContentsTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Tech", slug="tech")
+        self.post = Post.objects.create(
+            title="Toc Post",
+            description="Toc post",
+            content=(
+                "<h2>Introducción</h2><p>Text</p>"
+                "<h3>Setup &amp; <em>install</em></h3>"
+                '<h2 id="custom">Usage</h2><h2>Introducción</h2><h4> </h4>'
+            ),
+            slug="toc-post",
+            keywords="toc",
+            category=self.category,
+            status="published",
+        )
+
+    def test_toc_extracted_on_save(self):
+        self.assertEqual(
+            self.post.toc,
+            [
+                {
+                    "title": "Introducción",
+                    "slug": "introduccion",
+                    "level": 2,
+                    "order": 1,
+                },
+                {
+                    "title": "Setup & install",
+                    "slug": "setup-install",
+                    "level": 3,
+                    "order": 2,
+                },
+                {"title": "Usage", "slug": "custom", "level": 2, "order": 3},
+                {
+                    "title": "Introducción",
+                    "slug": "introduccion-2",
+                    "level": 2,
+                    "order": 4,
+                },
+            ],
+        )
+        self.assertIn('<h2 id="introduccion">Introducción</h2>', self.post.content)
+        self.assertIn('<h2 id="introduccion-2">', self.post.content)
+
+    def test_existing_ids_are_not_reused(self):
+        content, toc = extract_toc(
+            '<h2 data-id="x">Intro</h2><p id="intro">Text</p><h2>Intro</h2>'
+        )
+        self.assertEqual([heading["slug"] for heading in toc], ["intro-2", "intro-3"])
+        self.assertIn('<h2 data-id="x" id="intro-2">Intro</h2>', content)
+
+    def test_headings_synced_with_toc(self):
+        slugs = list(self.post.heading.values_list("slug", flat=True))
+        self.assertEqual(
+            slugs, ["introduccion", "setup-install", "custom", "introduccion-2"]
+        )
+
+        self.post.content = "<h1>Only one</h1>"
+        self.post.save()
+        self.assertEqual(
+            list(self.post.heading.values_list("slug", flat=True)), ["only-one"]
+        )
+
+    def test_headings_endpoint_reads_precomputed_toc(self):
+        cache.clear()
+        url = reverse("post-heading") + f"?slug={self.post.slug}"
+        with CaptureQueriesContext(connection) as queries:
+            results = self.client.get(url).json()["results"]
+        selects = [q["sql"] for q in queries if "SELECT" in q["sql"]]
+        self.assertEqual(len(selects), 1)
+        self.assertNotIn("JOIN", selects[0])
+        self.assertEqual(results, self.post.toc)
+
+    def test_rebuild_toc_command(self):
+        Post.objects.filter(pk=self.post.pk).update(content="<h2>Legacy</h2>", toc=[])
+        call_command("rebuild_toc", stdout=StringIO())
+
+        self.post.refresh_from_db()
+        self.assertEqual([h["slug"] for h in self.post.toc], ["legacy"])
+        self.assertEqual(self.post.content, '<h2 id="legacy">Legacy</h2>')
+        self.assertEqual(
+            list(self.post.heading.values_list("slug", flat=True)), ["legacy"]
+        )
+
+
+@override_settings(BLOG_VIEW_TRACKING="hll")
+class ReadModelTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        self.category = Category.objects.create(name="Tech", slug="tech")
+        self.rebuild = patch(
+            "apps.blog.tasks.rebuild_post_read_model.delay",
+            side_effect=read_model.rebuild,
+        )
+        self.rebuild.start()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post = Post.objects.create(
+                title="Read Model",
+                description="Read model post",
+                content="<h2>Intro</h2>",
+                slug="read-model",
+                keywords="read",
+                category=self.category,
+                status="published",
+            )
+
+    def tearDown(self):
+        self.rebuild.stop()
+        cache.clear()
+
+    def live_detail(self):
+        return json.loads(read_model.render(PostSerializer(self.post).data))
+
+    def test_rebuilt_on_save(self):
+        row = PostReadModel.objects.get(post=self.post)
+        self.assertEqual(json.loads(row.detail)["title"], "Read Model")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.title = "Renamed"
+            self.post.save()
+        row.refresh_from_db()
+        self.assertEqual(json.loads(row.list_item)["title"], "Renamed")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post.status = "draft"
+            self.post.save()
+        self.assertFalse(PostReadModel.objects.exists())
+
+    def test_category_change_rebuilds_posts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.category.name = "Technology"
+            self.category.save()
+        row = PostReadModel.objects.get(post=self.post)
+        self.assertEqual(json.loads(row.list_item)["category"]["name"], "Technology")
+
+    def test_moving_category_rebuilds_subtree_posts(self):
+        child = Category.objects.create(name="Child", parent=self.category, slug="c")
+        post = Post.objects.create(
+            title="Child post",
+            description="Child post",
+            content="Content",
+            slug="child-post",
+            keywords="child",
+            category=child,
+            status="published",
+        )
+        root = Category.objects.create(name="Root", slug="root")
+
+        with patch("apps.blog.read_model.schedule_rebuild") as schedule:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.category.parent = root
+                self.category.save()
+        rebuilt = {
+            post_id for call in schedule.call_args_list for post_id in call.args[0]
+        }
+        self.assertEqual(rebuilt, {self.post.pk, post.pk})
+
+    def test_detail_served_from_single_row(self):
+        url = reverse("post-detail", args=[self.post.slug])
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # La fila del read model y el contador de vistas
+        selects = [q["sql"] for q in queries if "SELECT" in q["sql"]]
+        self.assertEqual(len(selects), 2)
+        self.assertIn("blog_postreadmodel", selects[0])
+
+        data = response.json()
+        self.assertTrue(data["success"])
+        self.assertEqual(data["results"], self.live_detail())
+
+    def test_detail_falls_back_to_live_serialization(self):
+        PostReadModel.objects.all().delete()
+        url = reverse("post-detail", args=[self.post.slug])
+        response = self.client.get(url)
+        self.assertEqual(response.json()["results"], self.live_detail())
+        self.assertTrue(PostReadModel.objects.filter(post=self.post).exists())
+
+    @override_settings(BLOG_VIEW_TRACKING="exact")
+    def test_view_count_is_read_from_analytics(self):
+        row = PostReadModel.objects.get(post=self.post)
+        self.assertNotIn("view_count", json.loads(row.detail))
+        self.assertNotIn("view_count", json.loads(row.list_item))
+
+        list_url = reverse("post-list")
+        detail_url = reverse("post-detail", args=[self.post.slug])
+        self.client.get(list_url, HTTP_X_API_KEY=settings.VALID_API_KEYS[0])
+        self.client.get(detail_url)
+
+        # Vistas consolidadas sin reconstruir el read model ni invalidar la cache
+        PostAnalytics.objects.filter(post=self.post).update(views=42)
+        response = self.client.get(list_url, HTTP_X_API_KEY=settings.VALID_API_KEYS[0])
+        self.assertEqual(response.json()["results"][0]["view_count"], 42)
+        response = self.client.get(detail_url, REMOTE_ADDR="10.0.0.9")
+        self.assertEqual(response.json()["results"]["view_count"], 43)
+
+    def test_check_read_model_command(self):
+        call_command("check_read_model", stdout=StringIO())
+
+        PostReadModel.objects.update(detail='{"title": "Outdated"}')
+        with self.assertRaises(CommandError):
+            call_command("check_read_model", stdout=StringIO())
+
+        call_command("check_read_model", "--fix", stdout=StringIO())
+        call_command("check_read_model", stdout=StringIO())
+
+
+class ThumbnailVariantsTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.settings = override_settings(
+            MEDIA_ROOT=self.media.name, BLOG_THUMBNAIL_WIDTHS=[320, 640, 1280]
+        )
+        self.settings.enable()
+        cache.clear()
+        self.category = Category.objects.create(name="Tech", slug="tech")
+
+    def tearDown(self):
+        self.settings.disable()
+        self.media.cleanup()
+        cache.clear()
+
+    def upload(self, width, height, mode="RGBA"):
+        buffer = BytesIO()
+        Image.new(mode, (width, height), "red").save(buffer, format="PNG")
+        return SimpleUploadedFile("photo.png", buffer.getvalue(), "image/png")
+
+    def create_post(self, image):
+        return Post.objects.create(
+            title="Thumb",
+            description="Thumbnail post",
+            content="Content",
+            slug="thumb",
+            keywords="thumb",
+            category=self.category,
+            status="published",
+            thumbnail=image,
+        )
+
+    def test_generate_variants(self):
+        post = self.create_post(self.upload(1000, 500))
+        variants = thumbnails.generate_variants(post.thumbnail.name)
+
+        self.assertEqual(variants["source"], post.thumbnail.name)
+        self.assertEqual(list(variants["webp"]), ["320", "640"])
+        with default_storage.open(variants["jpeg"]["640"]) as variant:
+            image = Image.open(variant)
+            self.assertEqual((image.format, image.size), ("JPEG", (640, 320)))
+        self.assertTrue(variants["webp"]["320"].endswith("_320w.webp"))
+
+    def test_generation_is_idempotent_and_locked(self):
+        post = self.create_post(self.upload(400, 400))
+        first = thumbnails.generate_variants(post.thumbnail.name)
+        with patch.object(default_storage, "save") as save:
+            self.assertEqual(thumbnails.generate_variants(post.thumbnail.name), first)
+        save.assert_not_called()
+
+        cache.add(f"thumbnails:{post.thumbnail.name}:lock", 1)
+        with self.assertRaises(thumbnails.VariantsInProgress):
+            thumbnails.generate_variants(post.thumbnail.name)
+
+    def test_small_images_are_not_upscaled(self):
+        post = self.create_post(self.upload(200, 100))
+        variants = thumbnails.generate_variants(post.thumbnail.name)
+        self.assertEqual(list(variants["jpeg"]), ["200"])
+
+    def test_task_stores_srcset_on_upload(self):
+        with patch("apps.blog.tasks.generate_thumbnail_variants.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                post = self.create_post(self.upload(800, 400))
+        delay.assert_called_once_with("blog.Post", str(post.pk))
+
+        generate_thumbnail_variants("blog.Post", str(post.pk))
+        post.refresh_from_db()
+        srcset = PostListSerializer(post).data["thumbnail_srcset"]
+        self.assertEqual(set(srcset), {"webp", "jpeg"})
+        self.assertEqual(
+            srcset["webp"]["640"],
+            default_storage.url(post.thumbnail_variants["webp"]["640"]),
+        )
+
+        # Guardar las variantes no vuelve a encolar la tarea
+        with patch("apps.blog.tasks.generate_thumbnail_variants.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                post.save()
+        delay.assert_not_called()
+
+    def test_task_retries_while_locked(self):
+        post = self.create_post(self.upload(800, 400))
+        cache.add(f"thumbnails:{post.thumbnail.name}:lock", 1)
+
+        with patch.object(
+            generate_thumbnail_variants, "retry", side_effect=Retry()
+        ) as retry:
+            with self.assertRaises(Retry):
+                generate_thumbnail_variants("blog.Post", str(post.pk))
+        self.assertEqual(
+            retry.call_args.kwargs["countdown"], thumbnails.RETRY_COUNTDOWN
+        )
+
+        # Sin worker, el backfill omite la imagen en lugar de fallar
+        out = StringIO()
+        call_command("backfill_thumbnails", "--sync", stdout=out)
+        self.assertIn("skipped (in progress)", out.getvalue())
+
+    def test_backfill_command(self):
+        post = self.create_post(self.upload(800, 400))
+        call_command("backfill_thumbnails", "--sync", stdout=StringIO())
+        post.refresh_from_db()
+        self.assertEqual(post.thumbnail_variants["source"], post.thumbnail.name)
+
+        with patch("apps.blog.tasks.generate_thumbnail_variants.delay") as delay:
+            call_command("backfill_thumbnails", stdout=StringIO())
+        delay.assert_not_called()
+
+
+class ContentImagesTest(TestCase):
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.settings = override_settings(
+            MEDIA_ROOT=self.media.name, BLOG_THUMBNAIL_WIDTHS=[320, 640]
+        )
+        self.settings.enable()
+        cache.clear()
+        self.category = Category.objects.create(name="Tech", slug="tech")
+
+    def tearDown(self):
+        self.settings.disable()
+        self.media.cleanup()
+        cache.clear()
+
+    def image(self, width=1000, height=500, color="red"):
+        buffer = BytesIO()
+        Image.new("RGB", (width, height), color).save(buffer, format="PNG")
+        return ContentFile(buffer.getvalue())
+
+    def test_identical_uploads_are_stored_once(self):
+        first = ckeditor_storage.save("media/2026/10/18/a.png", self.image())
+        second = ckeditor_storage.save("media/2026/10/19/b.PNG", self.image())
+        other = ckeditor_storage.save("media/c.png", self.image(color="blue"))
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertRegex(first, r"^media/images/[0-9a-f]{2}/[0-9a-f]{64}\.png$")
+
+    def test_rewrites_uploaded_images(self):
+        name = ckeditor_storage.save("media/a.png", self.image())
+        url = ckeditor_storage.url(name)
+        content = f'<p><img alt="A" src="{url}" /><img src="https://cdn.example.com/x.png"></p>'
+
+        optimized = optimize_content_images(content)
+        self.assertIn('src="https://cdn.example.com/x.png"', optimized)
+        self.assertIn('width="1000" height="500" loading="lazy"', optimized)
+        root = url.rsplit(".", 1)[0]
+        # WebP en el <source>; el <img> usa las variantes JPEG y el original
+        self.assertIn(
+            f'<picture><source type="image/webp" srcset="{root}_320w.webp 320w, '
+            f'{root}_640w.webp 640w"',
+            optimized,
+        )
+        self.assertIn(
+            f'srcset="{root}_320w.jpeg 320w, {root}_640w.jpeg 640w, {url} 1000w"',
+            optimized,
+        )
+        self.assertEqual(optimized.count("<picture>"), 1)
+        self.assertEqual(optimize_content_images(optimized), optimized)
+
+    def test_concurrent_identical_upload_keeps_existing_file(self):
+        get_available_name = ckeditor_storage.get_available_name
+
+        def racing_upload(name, max_length=None):
+            available = get_available_name(name, max_length=max_length)
+            # Otra subida del mismo contenido termina antes de la escritura
+            path = ckeditor_storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as other:
+                other.write(b"first")
+            return available
+
+        with patch.object(
+            ckeditor_storage, "get_available_name", side_effect=racing_upload
+        ):
+            name = ckeditor_storage.save("media/a.png", self.image())
+
+        self.assertRegex(name, r"^media/images/[0-9a-f]{2}/[0-9a-f]{64}\.png$")
+        directory, filename = name.rsplit("/", 1)
+        self.assertEqual(ckeditor_storage.listdir(directory)[1], [filename])
+        with ckeditor_storage.open(name) as stored:
+            self.assertEqual(stored.read(), b"first")
+
+    def test_legacy_uploads_are_moved_to_content_hash_name(self):
+        default_storage.save("media/legacy.png", self.image())
+        hashed = ckeditor_storage.save("media/other.png", self.image())
+
+        optimized = optimize_content_images('<img src="/media/media/legacy.png">')
+        self.assertIn(f'src="{ckeditor_storage.url(hashed)}"', optimized)
+
+    def test_task_rewrites_post_content(self):
+        url = ckeditor_storage.url(ckeditor_storage.save("media/a.png", self.image()))
+        with patch("apps.blog.tasks.optimize_post_images.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                post = Post.objects.create(
+                    title="Images",
+                    description="Post with images",
+                    content=f'<p><img src="{url}"></p>',
+                    slug="images",
+                    keywords="images",
+                    category=self.category,
+                    status="published",
+                )
+        delay.assert_called_once_with(str(post.pk))
+
+        self.assertTrue(optimize_post_images(str(post.pk)))
+        post.refresh_from_db()
+        self.assertIn('loading="lazy"', post.content)
+        self.assertIn('loading=\\"lazy\\"', PostReadModel.objects.get(post=post).detail)
+        self.assertFalse(optimize_post_images(str(post.pk)))
+
+
+# Mismas rutas de core.urls con las vistas async del blog
+async_urlconf = ModuleType("async_urlconf")
+async_urlconf.urlpatterns = [path("api/blog/", include(async_urlpatterns))]
+
+
+@override_settings(ROOT_URLCONF=async_urlconf, BLOG_VIEW_TRACKING="exact")
+class AsyncViewsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api_key = settings.VALID_API_KEYS[0]
+        self.category = Category.objects.create(name="Async", slug="async")
+        self.post = Post.objects.create(
+            title="Async Post",
+            description="Async post",
+            content="<h2>Intro</h2>",
+            slug="async-post",
+            category=self.category,
+            status="published",
+        )
+        read_model.rebuild([self.post.pk])
+
+    def tearDown(self):
+        cache.clear()
+
+    async def test_list_matches_sync_view(self):
+        url = reverse("post-list")
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        headers = {"X-API-KEY": self.api_key}
+        response = await self.async_client.get(url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with override_settings(ROOT_URLCONF="core.urls"):
+            expected = await sync_to_async(APIClient().get)(
+                reverse("post-list"), HTTP_X_API_KEY=self.api_key
+            )
+        self.assertEqual(response.json(), expected.json())
+
+        headers["If-None-Match"] = response.headers["ETag"]
+        response = await self.async_client.get(url, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_detail_counts_views(self):
+        url = reverse("post-detail", args=[self.post.slug])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"]["title"], "Async Post")
+
+        analytics = await PostAnalytics.objects.aget(post=self.post)
+        self.assertEqual(analytics.views, 1)
+
+        response = await self.async_client.get(
+            url,
+            headers={
+                "If-None-Match": response.headers["ETag"],
+                "X-Forwarded-For": "10.0.0.2",
+            },
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        await sync_to_async(sync_pending_views)()
+        analytics = await PostAnalytics.objects.aget(post=self.post)
+        self.assertEqual(analytics.views, 2)
+
+        response = await self.async_client.get(reverse("post-detail", args=["nope"]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_headings(self):
+        url = reverse("post-heading")
+        response = await self.async_client.get(url, {"slug": self.post.slug})
+        self.assertEqual(response.json()["results"][0]["title"], "Intro")
+
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_increment_clicks(self):
+        url = reverse("post-increment-clicks", args=[self.post.slug])
+        response = await self.async_client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["clicks"], 1)
+
+        response = await self.async_client.post(url)
+        self.assertEqual(response.json()["clicks"], 2)
+
+
+async def websocket_connect(path, headers=()):
+    communicator = ApplicationCommunicator(
+        URLRouter(websocket_urlpatterns),
+        {"type": "websocket", "path": path, "headers": list(headers)},
+    )
+    await communicator.send_input({"type": "websocket.connect"})
+    return communicator, await communicator.receive_output(1)
+
+
+async def websocket_receive_json(communicator):
+    return json.loads((await communicator.receive_output(1))["text"])
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    BLOG_LIVE_ANALYTICS_INTERVAL=60,
+    BLOG_VIEW_TRACKING="exact",
+)
+class LiveAnalyticsTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        live.redis_client.delete(
+            live.LIVE_DIRTY_KEY, live.LIVE_WATCHERS_KEY, live.LIVE_FLUSH_LOCK
+        )
+        self.category = Category.objects.create(name="Live", slug="live")
+        self.post = Post.objects.create(
+            title="Live Post",
+            description="Live post",
+            content="Content",
+            slug="live-post",
+            category=self.category,
+            status="published",
+        )
+        PostAnalytics.objects.filter(post=self.post).update(views=5)
+        self.analytics = PostAnalytics.objects.get(post=self.post)
+        self.post_id = str(self.post.pk)
+
+    def tearDown(self):
+        cache.clear()
+
+    async def test_post_stream_coalesces_updates(self):
+        communicator, message = await websocket_connect(
+            f"/ws/blog/posts/{self.post.slug}/analytics/"
+        )
+        self.assertEqual(message["type"], "websocket.accept")
+        snapshot = await websocket_receive_json(communicator)
+        self.assertEqual(snapshot["posts"][self.post_id]["views"], 5)
+
+        for _ in range(3):
+            await sync_to_async(self.analytics.increment_click)()
+        await sync_to_async(record_post_impressions)([self.post_id])
+
+        self.assertEqual(await live.flush(), 1)
+        update = await websocket_receive_json(communicator)
+        self.assertEqual(
+            update["posts"][self.post_id],
+            {"views": 5, "clicks": 3, "impressions": 1},
+        )
+        # Sin actividad nueva no se envia nada
+        self.assertEqual(await live.flush(), 0)
+        self.assertTrue(await communicator.receive_nothing())
+
+        await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+        await communicator.wait(1)
+        watchers = await sync_to_async(live.redis_client.hget)(
+            live.LIVE_WATCHERS_KEY, self.post_id
+        )
+        self.assertEqual(int(watchers), 0)
+
+    async def test_activity_before_connect_is_not_counted_twice(self):
+        for _ in range(3):
+            await sync_to_async(self.analytics.increment_click)()
+
+        communicator, message = await websocket_connect(
+            f"/ws/blog/posts/{self.post.slug}/analytics/"
+        )
+        snapshot = await websocket_receive_json(communicator)
+        self.assertEqual(snapshot["posts"][self.post_id]["clicks"], 3)
+
+        await sync_to_async(self.analytics.increment_click)()
+        self.assertEqual(await live.flush(), 1)
+        update = await websocket_receive_json(communicator)
+        self.assertEqual(update["posts"][self.post_id]["clicks"], 4)
+        await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+        await communicator.wait(1)
+
+    async def test_dashboard_requires_api_key(self):
+        communicator, message = await websocket_connect("/ws/blog/analytics/")
+        self.assertEqual(message["type"], "websocket.close")
+
+        api_key = settings.VALID_API_KEYS[0].encode()
+        communicator, message = await websocket_connect(
+            "/ws/blog/analytics/", headers=[(b"x-api-key", api_key)]
+        )
+        self.assertEqual(message["type"], "websocket.accept")
+
+        await sync_to_async(self.analytics.increment_click)()
+        await live.flush()
+        update = await websocket_receive_json(communicator)
+        self.assertEqual(update["posts"][self.post_id]["clicks"], 1)
+        await communicator.send_input({"type": "websocket.disconnect", "code": 1000})
+        await communicator.wait(1)
+
+    async def test_unknown_post_is_rejected(self):
+        communicator, message = await websocket_connect(
+            "/ws/blog/posts/missing/analytics/"
+        )
+        self.assertEqual(message["type"], "websocket.close")
+
+
+@override_settings(BLOG_VIEW_TRACKING="exact")
+class AnalyticsRollupTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        cache.clear()
+        self.api_key = settings.VALID_API_KEYS[0]
+        self.category = Category.objects.create(name="Rollup", slug="rollup")
+        self.post = Post.objects.create(
+            title="Rollup Post",
+            description="Rollup post",
+            content="Content",
+            slug="rollup-post",
+            category=self.category,
+            status="published",
+        )
+        self.hour = rollups.truncate_hour()
+        redis_client.delete(
+            rollups.counters_key(self.hour), rollups.viewers_key(self.hour)
+        )
+
+    def tearDown(self):
+        cache.clear()
+
+    def test_rollup_is_idempotent(self):
+        url = reverse("post-detail", args=[self.post.slug])
+        for ip in ("10.0.0.1", "10.0.0.2", "10.0.0.1"):
+            self.client.get(url, REMOTE_ADDR=ip)
+        PostAnalytics.objects.get(post=self.post).increment_click()
+        record_post_impressions([self.post.pk, self.post.pk])
+
+        rollup_post_analytics()
+        rollup_post_analytics()
+
+        hourly = PostAnalyticsHourly.objects.get(post=self.post, hour=self.hour)
+        self.assertEqual(
+            (hourly.views, hourly.unique_viewers, hourly.impressions, hourly.clicks),
+            (2, 2, 2, 1),
+        )
+        daily = PostAnalyticsDaily.objects.get(post=self.post, day=self.hour.date())
+        self.assertEqual((daily.views, daily.clicks), (2, 1))
+
+        # Sin los contadores de redis las vistas se recalculan desde PostView
+        redis_client.delete(
+            rollups.counters_key(self.hour),
+            rollups.viewers_key(self.hour),
+            rollups.viewers_key(self.hour, self.post.pk),
+        )
+        rollup_post_analytics()
+        hourly.refresh_from_db()
+        self.assertEqual((hourly.views, hourly.impressions), (2, 2))
+
+    def test_old_hours_are_downsampled(self):
+        old = rollups.hourly_cutoff() - timedelta(days=2)
+        for hour in (old, old + timedelta(hours=5)):
+            PostAnalyticsHourly.objects.create(
+                post=self.post, hour=hour, views=3, unique_viewers=2, clicks=1
+            )
+
+        self.assertEqual(rollup_post_analytics()["pruned"], 2)
+        self.assertFalse(PostAnalyticsHourly.objects.exists())
+        daily = PostAnalyticsDaily.objects.get(post=self.post, day=old.date())
+        self.assertEqual((daily.views, daily.unique_viewers, daily.clicks), (6, 2, 2))
+
+    def test_series_reads_rollups(self):
+        PostAnalyticsHourly.objects.create(
+            post=self.post, hour=self.hour, views=4, impressions=10, clicks=1
+        )
+        url = reverse("post-analytics", args=[self.post.slug])
+        response = self.client.get(
+            url, {"interval": "hour"}, HTTP_X_API_KEY=self.api_key
+        )
+        series = response.json()["results"]["series"]
+        self.assertEqual(len(series), 48)
+        self.assertEqual(series[-1]["views"], 4)
+        self.assertEqual(series[-1]["ctr"], 10.0)
+        self.assertEqual(series[0]["views"], 0)
+
+        response = self.client.get(url, {"start": "nope"}, HTTP_X_API_KEY=self.api_key)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PostViewRetentionTest(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name="Retention", slug="retention")
+        self.post = Post.objects.create(
+            title="Retention Post",
+            description="Retention post",
+            content="Content",
+            slug="retention-post",
+            category=self.category,
+            status="published",
+        )
+        self.old = timezone.now() - timedelta(days=400)
+        for i in range(5):
+            PostView.objects.create(post=self.post, ip_address=f"10.0.0.{i}")
+        PostView.objects.filter(ip_address__in=["10.0.0.0", "10.0.0.1"]).update(
+            timestamp=self.old
+        )
+        PostView.objects.filter(ip_address="10.0.0.2").update(
+            timestamp=self.old - timedelta(days=1)
+        )
+
+    def test_prune_compacts_old_views(self):
+        result = retention.prune(days=365, batch_size=2)
+
+        self.assertEqual((result["deleted"], result["batches"]), (3, 2))
+        self.assertEqual(PostView.objects.count(), 2)
+        archive = dict(
+            PostViewArchive.objects.filter(post=self.post).values_list("day", "views")
+        )
+        self.assertEqual(
+            archive, {self.old.date(): 2, (self.old - timedelta(days=1)).date(): 1}
+        )
+
+        # Los totales no cambian al reconciliar con PostView ya podado
+        reconcile_post_view_counts()
+        self.assertEqual(PostAnalytics.objects.get(post=self.post).views, 5)
+
+        PostView.objects.create(post=self.post, ip_address="10.0.0.9")
+        PostView.objects.filter(ip_address="10.0.0.9").update(timestamp=self.old)
+        retention.prune(days=365)
+        self.assertEqual(
+            PostViewArchive.objects.get(post=self.post, day=self.old.date()).views, 3
+        )
+
+    def test_recent_views_are_kept(self):
+        # Nunca antes de la retencion de los rollups por hora
+        retention.prune(days=0)
+        self.assertEqual(PostView.objects.count(), 2)
+
+    def test_command_dry_run(self):
+        out = StringIO()
+        call_command("prune_post_views", "--dry-run", "--days", "365", stdout=out)
+        self.assertIn("3 post views older than", out.getvalue())
+        self.assertEqual(PostView.objects.count(), 5)
+
+
+class TimeOnPageTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.category = Category.objects.create(name="Dwell", slug="dwell")
+        self.post = Post.objects.create(
+            title="Dwell Post",
+            description="Dwell post",
+            content="Content",
+            slug="dwell-post",
+            category=self.category,
+            status="published",
+        )
+        self.url = reverse("post-time-on-page", args=[self.post.slug])
+        self.clear_redis()
+
+    def tearDown(self):
+        self.clear_redis()
+
+    def clear_redis(self):
+        redis_client.delete(
+            time_on_page.TIME_ON_PAGE_DIRTY_KEY,
+            time_on_page.sample_key(self.post.slug),
+            time_on_page.sample_key("missing-post"),
+        )
+
+    def test_beacon_does_not_touch_database(self):
+        with self.assertNumQueries(0):
+            response = self.client.post(
+                self.url, '{"seconds": 12.5}', content_type="text/plain"
+            )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        # URLSearchParams y un numero suelto tambien valen
+        self.client.post(
+            self.url, "seconds=4", content_type="application/x-www-form-urlencoded"
+        )
+        self.client.post(self.url, "7200", content_type="text/plain")
+        for body in ["", "-3", '{"seconds": "NaN"}', '{"seconds": true}']:
+            response = self.client.post(self.url, body, content_type="text/plain")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("seconds", response.json()["detail"])
+
+        # Un slug invalido no se informa como un error de seconds
+        response = self.client.post(
+            reverse("post-time-on-page", args=["x" * 151]),
+            "5",
+            content_type="text/plain",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json()["detail"], "slug must be at most 150 characters"
+        )
+
+        self.assertEqual(
+            redis_client.hgetall(time_on_page.sample_key(self.post.slug)),
+            {
+                b"ms": b"1816500",
+                b"samples": b"3",
+                b"h0": b"1",
+                b"h1": b"1",
+                b"h7": b"1",
+            },
+        )
+
+    def test_aggregate_updates_running_mean(self):
+        for seconds in (10, 20):
+            self.client.post(self.url, {"seconds": seconds}, format="json")
+        self.client.post(
+            reverse("post-time-on-page", args=["missing-post"]),
+            {"seconds": 5},
+            format="json",
+        )
+
+        result = aggregate_time_on_page()
+        self.assertEqual((result["samples"], result["dropped"]), (2, 1))
+        analytics = PostAnalytics.objects.get(post=self.post)
+        self.assertEqual(analytics.avg_time_on_page, 15)
+        self.assertEqual(analytics.time_on_page_histogram, [0, 1, 1, 0, 0, 0, 0, 0])
+
+        self.client.post(self.url, {"seconds": 45}, format="json")
+        aggregate_time_on_page(batch_size=1)
+        analytics.refresh_from_db()
+        self.assertEqual(analytics.avg_time_on_page, 25)
+        self.assertEqual(analytics.time_on_page_samples, 3)
+        self.assertEqual(analytics.time_on_page_histogram, [0, 1, 1, 1, 0, 0, 0, 0])
+        self.assertEqual(aggregate_time_on_page()["samples"], 0)
+
+    @override_settings(ROOT_URLCONF=async_urlconf)
+    async def test_async_beacon(self):
+        response = await self.async_client.post(
+            self.url, "3.5", content_type="text/plain"
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        response = await self.async_client.post(
+            self.url, "soon", content_type="text/plain"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        await sync_to_async(aggregate_time_on_page)()
+        analytics = await PostAnalytics.objects.aget(post=self.post)
+        self.assertEqual(analytics.avg_time_on_page, 3.5)
+
+
+@override_settings(BLOG_VIEW_TRACKING="exact")
+class EventIngestionTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("post-events")
+        self.category = Category.objects.create(name="Events", slug="events")
+        self.post = Post.objects.create(
+            title="Events Post",
+            description="Events post",
+            content="Content",
+            slug="events-post",
+            category=self.category,
+            status="published",
+        )
+        self.clear_redis()
+
+    def tearDown(self):
+        self.clear_redis()
+
+    def clear_redis(self):
+        redis_client.delete(
+            CLICKS_KEY,
+            CLICKS_SYNC_KEY,
+            IMPRESSIONS_KEY,
+            IMPRESSIONS_SYNC_KEY,
+            VIEWS_PENDING_KEY,
+        )
+
+    def post_events(self, body, content_type="application/x-ndjson"):
+        return self.client.post(self.url, body, content_type=content_type)
+
+    def test_ndjson_batch_is_enqueued(self):
+        lines = [
+            {"type": "impression", "slug": "events-post"},
+            {"type": "impression", "slug": "events-post"},
+            {"type": "click", "slug": "events-post"},
+            {"type": "view", "slug": "events-post"},
+            {"type": "click", "slug": "missing-post"},
+        ]
+        # Una sola consulta (los slugs); los contadores van a redis
+        with self.assertNumQueries(1):
+            response = self.post_events("\n".join(map(json.dumps, lines)))
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json(), {"accepted": 4, "unknown": 1})
+
+        sync_impression_to_db()
+        self.assertEqual(sync_clicks_to_db()["clicks"], 1)
+        self.assertEqual(sync_pending_views()["views"], 1)
+        analytics = PostAnalytics.objects.get(post=self.post)
+        self.assertEqual(
+            (analytics.impressions, analytics.clicks, analytics.views), (2, 1, 1)
+        )
+        self.assertEqual(analytics.click_through_rate, 50)
+
+        # La misma IP no vuelve a contar como vista
+        self.post_events(json.dumps({"type": "view", "slug": "events-post"}))
+        self.assertEqual(sync_pending_views()["views"], 0)
+        self.assertEqual(PostView.objects.filter(post=self.post).count(), 1)
+
+    def test_overlapping_click_syncs_apply_once(self):
+        self.post_events(
+            "\n".join([json.dumps({"type": "click", "slug": "events-post"})] * 2)
+        )
+
+        # Beat lanza otra ejecucion mientras la primera aplica su lote
+        overlapping = []
+
+        def apply(deltas):
+            overlapping.append(sync_clicks_to_db())
+            return apply_click_deltas(deltas)
+
+        with patch("apps.blog.tasks.apply_click_deltas", side_effect=apply):
+            self.assertEqual(sync_clicks_to_db()["clicks"], 2)
+        self.assertEqual(overlapping[0]["clicks"], 0)
+        self.assertEqual(PostAnalytics.objects.get(post=self.post).clicks, 2)
+
+    def test_json_array_and_validation(self):
+        response = self.post_events(
+            '[{"type": "click", "slug": "events-post"} , {"type": "click", '
+            '"slug": "events-post"}]',
+            content_type="application/json",
+        )
+        self.assertEqual(response.json(), {"accepted": 2, "unknown": 0})
+        self.assertEqual(redis_client.hget(CLICKS_KEY, str(self.post.pk)), b"2")
+
+        for body, detail in [
+            ('{"type": "click", "slug": "events-post"}\n{oops', "line 2"),
+            ('[{"type": "share", "slug": "events-post"}]', "event 0: type"),
+            ('[{"type": "click", "slug": ""}]', "event 0: slug"),
+            ('[{"type": "click", "slug": "events-post"} {}]', "expected ','"),
+        ]:
+            response = self.post_events(body)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(detail, response.json()["detail"])
+        # Un lote invalido no encola nada
+        self.assertEqual(redis_client.hget(CLICKS_KEY, str(self.post.pk)), b"2")
+
+    @override_settings(BLOG_EVENTS_MAX_BATCH=2, BLOG_EVENTS_MAX_BYTES=200)
+    def test_batch_limits(self):
+        event = json.dumps({"type": "click", "slug": "events-post"})
+        response = self.post_events("\n".join([event] * 3))
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+        response = self.post_events(" " * 201)
+        self.assertEqual(response.status_code, status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+
+    @override_settings(ROOT_URLCONF=async_urlconf)
+    async def test_async_batch(self):
+        response = await self.async_client.post(
+            self.url,
+            '[{"type": "impression", "slug": "events-post"}]',
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.json(), {"accepted": 1, "unknown": 0})
+        self.assertEqual(
+            await sync_to_async(redis_client.hget)(IMPRESSIONS_KEY, str(self.post.pk)),
+            b"1",
+        )
+
+
+class TrendingTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.clear_redis()
+        self.client = APIClient()
+        self.api_key = settings.VALID_API_KEYS[0]
+        self.url = reverse("post-trending")
+        self.tech = Category.objects.create(name="Tech", slug="tech")
+        self.python = Category.objects.create(
+            name="Python", slug="python", parent=self.tech
+        )
+        self.other = Category.objects.create(name="Other", slug="other")
+        self.posts = [
+            Post.objects.create(
+                title=f"Trending Post {i}",
+                description="Trending post",
+                content="Content",
+                slug=f"trending-post-{i}",
+                category=category,
+                status="published",
+            )
+            for i, category in enumerate([self.python, self.tech, self.other])
+        ]
+        read_model.rebuild([post.pk for post in self.posts])
+
+        # Pesos por defecto: vista 1, clic 2, impresion 0.1
+        live.record(self.posts[0].pk, views=3)
+        live.record(self.posts[1].pk, clicks=1)
+        live.record(self.posts[2].pk, impressions=10)
+        update_trending()
+
+    def tearDown(self):
+        cache.clear()
+        self.clear_redis()
+
+    def clear_redis(self):
+        keys = list(redis_client.scan_iter(f"{trending.TRENDING_KEY}*"))
+        if keys:
+            redis_client.delete(*keys)
+
+    def get_trending(self, **params):
+        return self.client.get(self.url, params, HTTP_X_API_KEY=self.api_key)
+
+    def slugs(self, response):
+        return [post["slug"] for post in response.json()["results"]]
+
+    def test_top_posts_by_category(self):
+        response = self.get_trending()
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual(
+            [post["slug"] for post in results],
+            ["trending-post-0", "trending-post-1", "trending-post-2"],
+        )
+        for post, expected in zip(results, [3, 2, 1]):
+            self.assertAlmostEqual(post["trending_score"], expected, places=2)
+
+        # Una categoria incluye a sus subcategorias
+        self.assertEqual(
+            self.slugs(self.get_trending(category="tech")),
+            ["trending-post-0", "trending-post-1"],
+        )
+        self.assertEqual(
+            self.slugs(self.get_trending(category="python")), ["trending-post-0"]
+        )
+        self.assertEqual(self.slugs(self.get_trending(limit=1)), ["trending-post-0"])
+
+        self.assertEqual(
+            self.get_trending(category="nope").status_code, status.HTTP_404_NOT_FOUND
+        )
+        self.assertEqual(
+            self.get_trending(limit=0).status_code, status.HTTP_400_BAD_REQUEST
+        )
+        self.assertEqual(
+            self.client.get(self.url).status_code, status.HTTP_403_FORBIDDEN
+        )
+
+    def test_scores_decay_with_half_life(self):
+        later = time.time() + trending.get_half_life()
+        scores = dict(trending.top(limit=3, now=later))
+        self.assertAlmostEqual(scores[self.posts[0].pk], 1.5, places=2)
+
+        # Mas eventos suben el puntaje sin esperar a que decaiga el anterior
+        live.record(self.posts[2].pk, views=5)
+        update_trending()
+        self.assertEqual(trending.top(limit=1)[0][0], self.posts[2].pk)
+
+    def test_overlapping_updates_apply_scores_once(self):
+        live.record(self.posts[2].pk, views=5)
+
+        # Beat lanza otra ejecucion mientras la primera aplica sus puntajes
+        overlapping = []
+
+        def apply(*args):
+            overlapping.append(update_trending()["posts"])
+            return apply_trending_scores(*args)
+
+        with patch("apps.blog.tasks.apply_trending_scores", side_effect=apply):
+            self.assertEqual(update_trending()["posts"], 1)
+        self.assertEqual(overlapping, [0])
+        scores = dict(trending.top(limit=3))
+        self.assertAlmostEqual(scores[self.posts[2].pk], 6, places=2)
+
+    def test_rollover_carries_previous_generation(self):
+        self.clear_redis()
+        gen = trending.generation()
+        pipe = redis_client.pipeline()
+        trending.add_scores_to_pipeline(
+            pipe,
+            gen - 1,
+            {
+                self.posts[0].pk: (
+                    5 * 2**trending.GENERATION_HALF_LIVES,
+                    [trending.ALL],
+                ),
+                self.posts[1].pk: (1, [trending.ALL]),
+            },
+        )
+        pipe.execute()
+
+        # Hasta el arrastre se lee la generacion anterior, con la misma escala
+        start = trending.generation_start(gen)
+        self.assertEqual(
+            trending.top(now=start), [(self.posts[0].pk, 5), (self.posts[1].pk, 2**-16)]
+        )
+
+        self.assertTrue(trending.rollover(gen))
+        self.assertFalse(trending.rollover(gen))
+        # Los puntajes despreciables salen del leaderboard
+        self.assertEqual(trending.top(now=start), [(self.posts[0].pk, 5)])
+
+    @override_settings(ROOT_URLCONF=async_urlconf)
+    async def test_async_view(self):
+        response = await self.async_client.get(
+            self.url, {"category": "tech"}, headers={"X-API-KEY": self.api_key}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [post["slug"] for post in response.json()["results"]],
+            ["trending-post-0", "trending-post-1"],
+        )
@@ -0,0 +1,86 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+FORMATS = {"webp": ("WEBP", 80), "jpeg": ("JPEG", 82)}
+LOCK_TIMEOUT = 60 * 5
+# Las tareas que encuentran el lock tomado se reintentan cada RETRY_COUNTDOWN
+# segundos hasta que vence (si el worker que lo tenia murio)
+RETRY_COUNTDOWN = 30
+MAX_RETRIES = LOCK_TIMEOUT // RETRY_COUNTDOWN + 1
+
+
+class VariantsInProgress(Exception):
+    """Otro worker esta generando las variantes de la misma imagen"""
+
+
+def get_widths():
+    return getattr(settings, "BLOG_THUMBNAIL_WIDTHS", [320, 640, 1280])
+
+
+def variant_name(name, width, extension):
+    # "blog/x/foto.png" -> "blog/x/foto_640w.webp", junto al original
+    root, _ = os.path.splitext(name)
+    return f"{root}_{width}w.{extension}"
+
+
+def target_widths(original_width):
+    # Sin agrandar: si la imagen es mas chica que todos los anchos, solo su ancho
+    widths = [width for width in get_widths() if width < original_width]
+    return widths or [original_width]
+
+
+def generate_variants(name, storage=default_storage):
+    """
+    Genera las variantes WebP/JPEG de una imagen y devuelve
+    {"source", "width", "height", "webp": {"320": nombre, ...}, "jpeg": {...}}.
+    Idempotente: las variantes que ya existen no se vuelven a generar. Lanza
+    VariantsInProgress si otro worker esta procesando la misma imagen.
+    """
+    lock = f"thumbnails:{name}:lock"
+    if not cache.add(lock, 1, LOCK_TIMEOUT):
+        raise VariantsInProgress(name)
+
+    try:
+        with storage.open(name, "rb") as original:
+            image = ImageOps.exif_transpose(Image.open(original))
+            image.load()
+
+        variants = {"source": name, "width": image.width, "height": image.height}
+        for extension, (image_format, quality) in FORMATS.items():
+            variants[extension] = {}
+            for width in target_widths(image.width):
+                path = variant_name(name, width, extension)
+                if not storage.exists(path):
+                    storage.save(path, render(image, width, image_format, quality))
+                variants[extension][str(width)] = path
+        return variants
+    finally:
+        cache.delete(lock)
+
+
+def render(image, width, image_format, quality):
+    height = max(round(image.height * width / image.width), 1)
+    resized = image.resize((width, height), Image.LANCZOS)
+    if image_format == "JPEG" and resized.mode not in ("RGB", "L"):
+        resized = resized.convert("RGB")
+
+    buffer = BytesIO()
+    resized.save(buffer, format=image_format, quality=quality, optimize=True)
+    return ContentFile(buffer.getvalue())
+
+
+def srcset(variants, storage=default_storage):
+    """
+    {"webp": {"320": url, ...}, "jpeg": {...}} a partir de las variantes guardadas
+    """
+    return {
+        extension: {width: storage.url(path) for width, path in paths.items()}
+        for extension, paths in (variants or {}).items()
+        if extension in FORMATS
+    }
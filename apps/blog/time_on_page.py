@@ -0,0 +1,95 @@
+import json
+import math
+from bisect import bisect_left
+from urllib.parse import parse_qs
+
+from django.conf import settings
+
+# Muestras de tiempo en pagina aun no consolidadas, por slug:
+# "post:time_on_page:<slug>" -> ms, samples y h<i> (histograma). Las consolida
+# tasks.aggregate_time_on_page en PostAnalytics
+TIME_ON_PAGE_KEY = "post:time_on_page"
+# Slugs con muestras pendientes
+TIME_ON_PAGE_DIRTY_KEY = "post:time_on_page_dirty"
+
+# Limites superiores (segundos) de los buckets del histograma; el ultimo
+# bucket cuenta lo que supera 600s
+HISTOGRAM_BOUNDS = (5, 15, 30, 60, 120, 300, 600)
+MAX_BEACON_BYTES = 1024
+
+
+def get_max_seconds():
+    # Pestañas olvidadas: las muestras mas largas cuentan como este maximo
+    return getattr(settings, "BLOG_TIME_ON_PAGE_MAX_SECONDS", 60 * 30)
+
+
+def parse_beacon(body):
+    """
+    Segundos de un beacon (navigator.sendBeacon): JSON {"seconds": n}, un
+    numero o seconds=n (URLSearchParams); None si no es valido
+    """
+    if len(body) > MAX_BEACON_BYTES:
+        return None
+    try:
+        data = json.loads(body)
+    except ValueError:
+        data = parse_qs(body.decode("utf-8", "replace")).get("seconds", [None])[-1]
+    if isinstance(data, dict):
+        data = data.get("seconds")
+    if data is None or isinstance(data, bool):
+        return None
+
+    try:
+        seconds = float(data)
+    except (TypeError, ValueError):
+        return None
+    if not math.isfinite(seconds) or seconds < 0:
+        return None
+    return min(seconds, get_max_seconds())
+
+
+def bucket(seconds):
+    return bisect_left(HISTOGRAM_BOUNDS, seconds)
+
+
+def sample_key(slug):
+    return f"{TIME_ON_PAGE_KEY}:{slug}"
+
+
+def add_to_pipeline(pipe, slug, seconds):
+    key = sample_key(slug)
+    pipe.hincrby(key, "ms", round(seconds * 1000))
+    pipe.hincrby(key, "samples", 1)
+    pipe.hincrby(key, f"h{bucket(seconds)}", 1)
+    pipe.sadd(TIME_ON_PAGE_DIRTY_KEY, slug)
+
+
+def parse_samples(values):
+    """
+    {"seconds": total, "samples": n, "histogram": [...]} a partir del hash de un slug
+    """
+    values = {name.decode(): int(amount) for name, amount in values.items()}
+    return {
+        "seconds": values.get("ms", 0) / 1000,
+        "samples": values.get("samples", 0),
+        "histogram": [values.get(f"h{i}", 0) for i in range(len(HISTOGRAM_BOUNDS) + 1)],
+    }
+
+
+def merge(analytics, samples):
+    """
+    Suma las muestras a la media y al histograma de un PostAnalytics
+    """
+    total = analytics.time_on_page_samples + samples["samples"]
+    if not total:
+        return
+    analytics.avg_time_on_page = (
+        analytics.avg_time_on_page * analytics.time_on_page_samples + samples["seconds"]
+    ) / total
+    analytics.time_on_page_samples = total
+
+    histogram = list(analytics.time_on_page_histogram or [])
+    histogram += [0] * (len(samples["histogram"]) - len(histogram))
+    for i, count in enumerate(samples["histogram"]):
+        histogram[i] += count
+    analytics.time_on_page_histogram = histogram
@@ -0,0 +1,48 @@
+import html
+import re
+
+from django.utils.html import strip_tags
+from django.utils.text import slugify
+
+HEADING_RE = re.compile(
+    r"<h([1-6])(\s[^>]*)?>(.*?)</h\1\s*>", re.IGNORECASE | re.DOTALL
+)
+# Solo el atributo id (no data-id, aria-id, ...)
+ID_RE = re.compile(r"""(?:^|\s)id\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+
+
+def extract_toc(content):
+    """
+    Extrae los encabezados h1-h6 del HTML del post. Devuelve el contenido con
+    un id (ancla) en cada encabezado que no lo tenga, y la tabla de contenidos
+    [{"title", "slug", "level", "order"}] con el mismo formato que Heading.
+    """
+    toc = []
+    content = content or ""
+    # Los ids que ya tiene el contenido (en cualquier etiqueta) no se repiten
+    used = set(ID_RE.findall(content))
+
+    def replace(match):
+        level, attrs, inner = int(match.group(1)), match.group(2) or "", match.group(3)
+        title = html.unescape(strip_tags(inner)).strip()
+        if not title:
+            return match.group(0)
+
+        existing = ID_RE.search(attrs)
+        if existing:
+            slug = existing.group(1)
+        else:
+            base = slugify(title)[:140] or "section"
+            slug, n = base, 2
+            while slug in used:
+                slug, n = f"{base}-{n}", n + 1
+            attrs = f'{attrs} id="{slug}"'
+        used.add(slug)
+
+        toc.append(
+            {"title": title[:150], "slug": slug, "level": level, "order": len(toc) + 1}
+        )
+        return f"<h{level}{attrs}>{inner}</h{level}>"
+
+    content = HEADING_RE.sub(replace, content)
+    return content, toc
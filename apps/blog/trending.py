@@ -0,0 +1,155 @@
+import time
+import uuid
+
+import redis
+from apps.blog.async_redis import counters_redis
+from django.conf import settings
+
+redis_client = redis.StrictRedis(host=settings.REDIS_HOST, port=6379, db=0)
+
+# Posts en tendencia: sorted sets con puntajes que decaen exponencialmente.
+# Cada evento suma peso * 2^(edad / vida media) respecto al inicio de su
+# generacion (16 vidas medias), asi el puntaje solo crece y ZINCRBY basta; al
+# leer se multiplica por 2^(-edad). Al empezar una generacion se arrastra la
+# anterior con ZUNIONSTORE (peso 2^-16).
+TRENDING_KEY = "post:trending"
+# Puntajes pendientes por generacion ("post:trending_pending:<gen>" -> post_id);
+# los pasa a los sorted sets tasks.update_trending, que conoce las categorias
+TRENDING_PENDING_KEY = "post:trending_pending"
+# Generaciones con puntajes pendientes y leaderboards existentes ("all" o el id
+# hex de una categoria)
+TRENDING_GENERATIONS_KEY = "post:trending_generations"
+TRENDING_SCOPES_KEY = "post:trending_scopes"
+
+GENERATION_HALF_LIVES = 16
+ALL = "all"
+# Puntaje minimo (ya decaido) para seguir en un leaderboard al arrastrarlo
+MIN_SCORE = 0.01
+
+
+def get_half_life():
+    # Segundos en que el puntaje de un evento cae a la mitad
+    return getattr(settings, "BLOG_TRENDING_HALF_LIFE", 60 * 60 * 6)
+
+
+def get_weights():
+    return getattr(
+        settings,
+        "BLOG_TRENDING_WEIGHTS",
+        {"views": 1.0, "clicks": 2.0, "impressions": 0.1},
+    )
+
+
+def generation_length():
+    return get_half_life() * GENERATION_HALF_LIVES
+
+
+def generation(now=None):
+    return int((now or time.time()) // generation_length())
+
+
+def generation_start(gen):
+    return gen * generation_length()
+
+
+def growth(now, gen):
+    # 2^(edad / vida media) desde el inicio de la generacion
+    return 2 ** ((now - generation_start(gen)) / get_half_life())
+
+
+def leaderboard_key(gen, scope=ALL):
+    # La vida media es parte de la clave: cambiarla empieza leaderboards nuevos
+    return f"{TRENDING_KEY}:{get_half_life()}:{gen}:{scope}"
+
+
+def carried_key(gen):
+    return f"{leaderboard_key(gen)}:carried"
+
+
+def pending_key(gen):
+    return f"{TRENDING_PENDING_KEY}:{get_half_life()}:{gen}"
+
+
+def pending_sync_key(gen):
+    return f"{pending_key(gen)}:sync"
+
+
+def add_to_pipeline(pipe, post_id, now=None, **deltas):
+    weights = get_weights()
+    score = sum(weights.get(field, 0) * amount for field, amount in deltas.items())
+    if not score:
+        return
+    now = now or time.time()
+    gen = generation(now)
+    pipe.hincrbyfloat(pending_key(gen), str(post_id), score * growth(now, gen))
+    pipe.expire(pending_key(gen), generation_length() * 2)
+    pipe.sadd(TRENDING_GENERATIONS_KEY, gen)
+
+
+def rollover(gen):
+    """
+    Arrastra los leaderboards de la generacion anterior a gen (una sola vez)
+    """
+    if not redis_client.set(carried_key(gen), 1, nx=True, ex=generation_length() * 3):
+        return False
+
+    pipe = redis_client.pipeline(transaction=False)
+    for scope in redis_client.smembers(TRENDING_SCOPES_KEY):
+        current = leaderboard_key(gen, scope.decode())
+        previous = leaderboard_key(gen - 1, scope.decode())
+        pipe.zunionstore(current, {current: 1, previous: 2**-GENERATION_HALF_LIVES})
+        pipe.zremrangebyscore(current, "-inf", f"({MIN_SCORE}")
+        pipe.expire(current, generation_length() * 2)
+    pipe.execute()
+    return True
+
+
+def add_scores_to_pipeline(pipe, gen, scores):
+    """
+    Suma {post_id: (puntaje, [scopes])} a los leaderboards de gen
+    """
+    for post_id, (score, scopes) in scores.items():
+        for scope in scopes:
+            pipe.zincrby(leaderboard_key(gen, scope), score, str(post_id))
+            pipe.expire(leaderboard_key(gen, scope), generation_length() * 2)
+    scopes = {scope for score, post_scopes in scores.values() for scope in post_scopes}
+    if scopes:
+        pipe.sadd(TRENDING_SCOPES_KEY, *scopes)
+
+
+def category_scopes(path):
+    # La categoria del post y sus ancestros (la ruta materializada)
+    return [segment for segment in path.split("/") if segment]
+
+
+def _top_pipeline(pipe, scope, limit, gen):
+    pipe.exists(carried_key(gen))
+    for key in (leaderboard_key(gen, scope), leaderboard_key(gen - 1, scope)):
+        pipe.zrevrange(key, 0, limit - 1, withscores=True)
+
+
+def _parse_top(results, gen, now):
+    # Hasta que se arrastre la generacion actual se lee la anterior
+    carried, current, previous = results
+    rows, gen = (current, gen) if carried else (previous, gen - 1)
+    decay = 1 / growth(now, gen)
+    return [(uuid.UUID(post_id.decode()), score * decay) for post_id, score in rows]
+
+
+def top(scope=ALL, limit=10, now=None):
+    """
+    [(post_id, puntaje decaido a ahora)] de mayor a menor: O(log N + limit)
+    """
+    now = now or time.time()
+    gen = generation(now)
+    pipe = redis_client.pipeline(transaction=False)
+    _top_pipeline(pipe, scope, limit, gen)
+    return _parse_top(pipe.execute(), gen, now)
+
+
+async def atop(scope=ALL, limit=10, now=None):
+    now = now or time.time()
+    gen = generation(now)
+    pipe = counters_redis().pipeline(transaction=False)
+    _top_pipeline(pipe, scope, limit, gen)
+    return _parse_top(await pipe.execute(), gen, now)
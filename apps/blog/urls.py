@@ -1,18 +1,95 @@
+from apps.blog.async_views import (
+    AsyncIncrementPostClickView,
+    AsyncPostEventsView,
+    AsyncPostDetailView,
+    AsyncPostHeadingView,
+    AsyncPostListView,
+    AsyncPostTimeOnPageView,
+    AsyncPostTrendingView,
+)
 from apps.blog.views import (
+    CategoryPostListView,
+    CategoryTreeView,
     IncrementPostClickView,
+    PostAnalyticsSeriesView,
+    PostAutocompleteView,
     PostDetailView,
+    PostEventsView,
     PostHeadingView,
     PostListView,
+    PostSearchView,
+    PostTimeOnPageView,
+    PostTrendingView,
 )
+from django.conf import settings
+from django.db import transaction
 from django.urls import path
 
-urlpatterns = [
-    path("posts/", PostListView.as_view(), name="post-list"),
-    path("posts/headings/", PostHeadingView.as_view(), name="post-heading"),
-    path("posts/<str:slug>/", PostDetailView.as_view(), name="post-detail"),
-    path(
-        "posts/<slug:slug>/increment_clicks",
-        IncrementPostClickView.as_view(),
-        name="post-increment-clicks",
-    ),
-]
+
+def async_view(view_class, csrf_exempt=False):
+    # ATOMIC_REQUESTS no aplica a vistas async (Django lo rechaza)
+    view = transaction.non_atomic_requests(view_class.as_view())
+    # Como APIView; en Django 4.2 el decorador csrf_exempt no conserva lo async
+    view.csrf_exempt = csrf_exempt
+    return view
+
+
+def build_urlpatterns(use_async):
+    if use_async:
+        post_list = async_view(AsyncPostListView)
+        post_detail = async_view(AsyncPostDetailView)
+        post_heading = async_view(AsyncPostHeadingView)
+        increment_clicks = async_view(AsyncIncrementPostClickView, csrf_exempt=True)
+        time_on_page = async_view(AsyncPostTimeOnPageView, csrf_exempt=True)
+        post_events = async_view(AsyncPostEventsView, csrf_exempt=True)
+        post_trending = async_view(AsyncPostTrendingView)
+    else:
+        post_list = PostListView.as_view()
+        post_detail = PostDetailView.as_view()
+        post_heading = PostHeadingView.as_view()
+        increment_clicks = IncrementPostClickView.as_view()
+        # Sin ATOMIC_REQUESTS: el beacon no abre conexion a la base de datos
+        time_on_page = transaction.non_atomic_requests(PostTimeOnPageView.as_view())
+        post_events = transaction.non_atomic_requests(PostEventsView.as_view())
+        post_trending = PostTrendingView.as_view()
+
+    return [
+        path("categories/tree/", CategoryTreeView.as_view(), name="category-tree"),
+        path(
+            "categories/<str:slug>/posts/",
+            CategoryPostListView.as_view(),
+            name="category-post-list",
+        ),
+        path("posts/", post_list, name="post-list"),
+        path(
+            "posts/autocomplete/",
+            PostAutocompleteView.as_view(),
+            name="post-autocomplete",
+        ),
+        path("posts/search/", PostSearchView.as_view(), name="post-search"),
+        path("posts/headings/", post_heading, name="post-heading"),
+        path("posts/events/", post_events, name="post-events"),
+        path("posts/trending/", post_trending, name="post-trending"),
+        path("posts/<str:slug>/", post_detail, name="post-detail"),
+        path(
+            "posts/<str:slug>/analytics/",
+            PostAnalyticsSeriesView.as_view(),
+            name="post-analytics",
+        ),
+        path(
+            "posts/<slug:slug>/increment_clicks",
+            increment_clicks,
+            name="post-increment-clicks",
+        ),
+        path(
+            "posts/<slug:slug>/time_on_page",
+            time_on_page,
+            name="post-time-on-page",
+        ),
+    ]
+
+
+sync_urlpatterns = build_urlpatterns(use_async=False)
+async_urlpatterns = build_urlpatterns(use_async=True)
+
+urlpatterns = async_urlpatterns if settings.BLOG_ASYNC_VIEWS else sync_urlpatterns
@@ -1,22 +1,59 @@
+from collections import Counter
+from datetime import timedelta
+
 import redis
-from apps.blog.models import Heading, Post, PostAnalytics, PostView
-from apps.blog.serializers import HeadingSerializer, PostListSerializer, PostSerializer
-from apps.blog.tasks import increment_post_impressions
-from apps.blog.utils import get_client_ip
+from apps.blog import autocomplete
+from apps.blog import caching as blog_cache
+from apps.blog import events, read_model, rollups, time_on_page, trending
+from apps.blog.filters import PostFilter
+from apps.blog.models import (
+    Category,
+    Post,
+    PostAnalytics,
+    PostAnalyticsDaily,
+    PostAnalyticsHourly,
+    PostView,
+)
+from apps.blog.pagination import PostCursorPagination, PostSearchPagination
+from apps.blog.search import get_search_backend
+from apps.blog.serializers import (
+    CategoryListSerializer,
+    PostListSerializer,
+    PostSearchSerializer,
+    PostSerializer,
+)
+from apps.blog.tasks import (
+    increment_post_impressions,
+    record_post_impressions,
+    record_time_on_page,
+    record_unique_view,
+)
+from apps.blog.utils import BoundedExecutor, get_client_ip
 from core.permissions import HasValidApiKey
 from django.conf import settings
-from django.core.cache import cache
+from django.db.models import Count
+from django.http import HttpResponse
 from django.shortcuts import render
+from django.utils.cache import get_conditional_response
 from django.utils.decorators import method_decorator
+from django.utils.http import http_date, quote_etag
 from django.views.decorators.cache import cache_page
+from django.views.decorators.http import condition
 from rest_framework import permissions, status
 from rest_framework.exceptions import APIException, NotFound
 from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework_api.pagination import CustomPagination
+from rest_framework_api.serializers import APIResponseSerializer
 from rest_framework_api.views import StandardAPIView
 
 redis_client = redis.StrictRedis(host=settings.REDIS_HOST, port=6379, db=0)
+# Impresiones fuera de la respuesta; si se acumulan, las que sobran se descartan
+impressions_executor = BoundedExecutor(
+    max_workers=2,
+    max_pending=getattr(settings, "BLOG_IMPRESSIONS_MAX_PENDING", 1000),
+)
 
 #  Create your views here.
 # class PostListView(ListAPIView):
@@ -24,63 +61,398 @@ redis_client = redis.StrictRedis(host=settings.REDIS_HOST, port=6379, db=0)
 #     serializer_class = PostListSerializer
 
 
+def check_conditional(request, version, weak=False):
+    """
+    Como @condition para la version de un namespace: devuelve (304/412 o None,
+    cabeceras ETag/Last-Modified). ETag debil si el cuerpo lleva contadores,
+    que cambian sin cambiar la version
+    """
+    etag = quote_etag(str(version))
+    if weak:
+        etag = f"W/{etag}"
+    last_modified = int(version / 1e9)
+    headers = {"ETag": etag, "Last-Modified": http_date(last_modified)}
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    return response, headers
+
+
+def conditional_response(request, namespace, get_response, record_not_modified):
+    """
+    Validacion condicional antes de la vista: un 304 solo registra la vista o
+    las impresiones en redis (record_not_modified) sin armar el cuerpo. Si no
+    puede (la entrada ya salio de la cache), la vista corre para registrarlas
+    """
+    version = blog_cache.get_version(namespace)
+    conditional, headers = check_conditional(request, version, weak=True)
+    if conditional is not None and (
+        conditional.status_code != status.HTTP_304_NOT_MODIFIED or record_not_modified()
+    ):
+        response = conditional
+    else:
+        response = get_response()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        response = conditional or response
+    for name, value in headers.items():
+        response.headers.setdefault(name, value)
+    return response
+
+
+def post_headings_etag(request):
+    slug = request.GET.get("slug")
+    if slug:
+        return str(blog_cache.get_version(blog_cache.post_headings(slug)))
+
+
+def post_headings_last_modified(request):
+    slug = request.GET.get("slug")
+    if slug:
+        return blog_cache.get_last_modified(blog_cache.post_headings(slug))
+
+
 class PostListView(StandardAPIView):
     permission_classes = [HasValidApiKey]
 
+    # ETag/Last-Modified salen de la version de la cache; un 304 solo registra
+    # las impresiones de la pagina
     def get(self, request, *args, **kwargs):
-        try:
-            cached_posts = cache.get("post_list")
-            if cached_posts:
-                for post in cached_posts:
-                    redis_client.incr(f"post:impressions:{post['id']}")
-                return self.paginate(request, cached_posts)
+        return conditional_response(
+            request,
+            blog_cache.POST_LIST,
+            lambda: self.list_posts(request),
+            lambda: self.record_cached_impressions(self.get_cached_page(request)),
+        )
 
-            posts = Post.post_objects.all()
+    def get_filter_values(self, request):
+        return [request.query_params.get(name, "") for name in PostFilter.base_filters]
 
-            if not posts.exists():
-                raise NotFound(detail="Not posts found")
+    def list_posts(self, request):
+        # ?category= / ?keyword= filtran en la BD y agregan facetas por categoria
+        filterset = PostFilter(
+            request.query_params, queryset=Post.post_objects.with_view_count()
+        )
+        filters = self.get_filter_values(request)
+        if any(filters):
+            facets = self.get_category_facets(request.query_params.get("keyword", ""))
+            return self.cursor_paginate(
+                request, filterset.qs, "filter", *filters, extra_data={"facets": facets}
+            )
+
+        # ?cursor= activa la paginacion por cursor (vacio = primera pagina)
+        if "cursor" in request.query_params:
+            return self.cursor_paginate(request)
 
-            serialized_post = PostListSerializer(posts, many=True).data
+        try:
+            serialized_post = blog_cache.get_or_compute(
+                blog_cache.cache_key(blog_cache.POST_LIST, "all"), self.serialize_posts
+            )
+        except NotFound:
+            raise
+        except Post.DoesNotExist:
+            raise NotFound(detail="Not posts found")
+        except Exception as e:
+            raise APIException(
+                detail=f"An unexpected error occurred: {str(e)}", code=500
+            )
 
-            cache.set("post_list", serialized_post, timeout=60 * 5)  # Cache
+        response = self.paginate(request, serialized_post)
+        results = response.data.get("results") or []
+        # Las vistas no estan en la cache: solo las de la pagina, en una consulta
+        if results:
+            response.data["results"] = read_model.with_view_counts(results)
+        self.record_impressions(results)
+        return response
 
-            for post in posts:
-                redis_client.incr(f"post:impressions:{post.id}")
-                # increment_post_impressions.delay(post.id)
+    def serialize_posts(self):
+        # JSON precalculado en el read model, sin serializar en cada peticion
+        posts = read_model.get_list()
 
-        except Post.DoesNotExist:
+        if not posts:
             raise NotFound(detail="Not posts found")
+
+        return posts
+
+    def get_cached_page(self, request):
+        """
+        Posts de la pagina pedida si ya estan en cache, o None
+        """
+        filters = self.get_filter_values(request)
+        if any(filters):
+            return self.get_cached_cursor_page(request, "filter", *filters)
+        if "cursor" in request.query_params:
+            return self.get_cached_cursor_page(request)
+
+        posts = blog_cache.peek(blog_cache.cache_key(blog_cache.POST_LIST, "all"))
+        if posts is None:
+            return None
+        try:
+            return CustomPagination().paginate_data(posts, request)
+        except NotFound:
+            return None
+
+    def get_cached_cursor_page(self, request, *key_parts):
+        page = blog_cache.peek(
+            PostCursorPagination().get_cache_key(request, *key_parts)
+        )
+        return None if page is None else page["results"]
+
+    def record_cached_impressions(self, posts):
+        # Para un 304: sin la pagina en cache hay que correr la vista
+        if posts is None:
+            return False
+        self.record_impressions(posts)
+        return True
+
+    def record_impressions(self, posts):
+        # Solo los posts de la pagina, en un pipeline y fuera de la respuesta
+        post_ids = [post["id"] for post in posts]
+        if post_ids:
+            impressions_executor.submit(record_post_impressions, post_ids)
+
+    def get_category_facets(self, keyword=""):
+        def count_by_category():
+            posts = PostFilter(
+                {"keyword": keyword}, queryset=Post.post_objects.all()
+            ).qs
+            return build_category_facets(posts)
+
+        return blog_cache.get_or_compute(
+            blog_cache.cache_key(blog_cache.POST_LIST, "facets", keyword),
+            count_by_category,
+        )
+
+    def cursor_paginate(self, request, queryset=None, *key_parts, extra_data=None):
+        paginator = PostCursorPagination()
+        if queryset is None:
+            queryset = Post.post_objects.with_view_count()
+
+        def serialize_page():
+            posts = paginator.paginate_queryset(queryset, request, view=self)
+            return {
+                "results": PostListSerializer(posts, many=True).data,
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
+            }
+
+        try:
+            page = blog_cache.get_or_compute(
+                paginator.get_cache_key(request, *key_parts), serialize_page
+            )
+        except NotFound:
+            raise
         except Exception as e:
             raise APIException(
                 detail=f"An unexpected error occurred: {str(e)}", code=500
             )
 
-        return self.paginate(request, serialized_post)
+        self.record_impressions(page["results"])
+        page = {**page, "results": read_model.with_view_counts(page["results"])}
+        if extra_data is not None:
+            page = {**page, "extra_data": extra_data}
+        serializer = APIResponseSerializer(
+            {"success": True, "status": status.HTTP_200_OK, **page}
+        )
+        return Response(serializer.data)
 
 
-# class PostDetailView(RetrieveAPIView):
-#     queryset = Post.objects.all()
-#     serializer_class = PostSerializer
-#     lookup_field = "slug"
+def build_category_facets(posts):
+    """
+    Cantidad de posts por categoria (incluye subcategorias) con un solo GROUP BY
+    """
+    counts = dict(
+        posts.order_by().values_list("category_id").annotate(total=Count("id"))
+    )
+    categories = list(Category.objects.order_by("depth", "name"))
+    by_hex = {category.id.hex: category for category in categories}
 
+    totals = {}
+    for category_id, total in counts.items():
+        # Sumar al post en su categoria y en todos sus ancestros (segun la ruta)
+        for ancestor in by_hex[category_id.hex].path.strip("/").split("/"):
+            totals[ancestor] = totals.get(ancestor, 0) + total
+
+    return [
+        {"name": category.name, "slug": category.slug, "count": totals[key]}
+        for key, category in by_hex.items()
+        if key in totals
+    ]
+
+
+def category_tree_etag(request):
+    return str(blog_cache.get_version(blog_cache.CATEGORY_TREE))
+
+
+def category_tree_last_modified(request):
+    return blog_cache.get_last_modified(blog_cache.CATEGORY_TREE)
+
+
+def build_category_tree():
+    # Una sola consulta; por profundidad, cada padre se procesa antes que sus hijos
+    nodes = {}
+    tree = []
+    for category in Category.objects.order_by("depth", "name"):
+        node = {
+            "id": str(category.id),
+            **CategoryListSerializer(category).data,
+            "children": [],
+        }
+        nodes[category.id] = node
+        siblings = nodes[category.parent_id]["children"] if category.parent_id else tree
+        siblings.append(node)
+    return tree
+
+
+class CategoryTreeView(StandardAPIView):
+    @method_decorator(condition(category_tree_etag, category_tree_last_modified))
+    def get(self, request):
+        tree = blog_cache.get_or_compute(
+            blog_cache.cache_key(blog_cache.CATEGORY_TREE, "tree"), build_category_tree
+        )
+        return self.response(tree)
+
+
+class CategoryPostListView(PostListView):
+    """Posts de una categoria y de todas sus subcategorias (paginacion por cursor)"""
 
-class PostDetailView(StandardAPIView):
-    # @method_decorator(cache_page(60 * 2))
     def get(self, request, slug):
+        category = Category.objects.filter(slug=slug).order_by("depth").first()
+        if category is None:
+            raise NotFound(detail="The requested category does not exist")
+
+        posts = Post.post_objects.with_view_count().filter(
+            category__path__startswith=category.path
+        )
+        return conditional_response(
+            request,
+            blog_cache.POST_LIST,
+            lambda: self.cursor_paginate(request, posts, "category", category.pk),
+            lambda: self.record_cached_impressions(
+                self.get_cached_cursor_page(request, "category", category.pk)
+            ),
+        )
+
+
+class PostSearchView(StandardAPIView):
+    """Busqueda de texto completo ordenada por relevancia, con fragmentos resaltados"""
+
+    permission_classes = [HasValidApiKey]
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+        if not query:
+            return self.response(
+                {"detail": "q parameter is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        paginator = PostSearchPagination()
+        posts = get_search_backend().search(Post.post_objects.with_view_count(), query)
+        page = paginator.paginate_queryset(posts, request, view=self)
+
+        serializer = APIResponseSerializer(
+            {
+                "success": True,
+                "status": status.HTTP_200_OK,
+                "count": paginator.count,
+                "next": paginator.get_next_link(),
+                "previous": paginator.get_previous_link(),
+                "results": PostSearchSerializer(page, many=True).data,
+            }
+        )
+        return Response(serializer.data)
+
+
+class PostAutocompleteView(StandardAPIView):
+    """Sugerencias de titulos por prefijo (indice precalculado en redis)"""
+
+    permission_classes = [HasValidApiKey]
+
+    def get(self, request):
+        query = request.query_params.get("q", "")
         try:
-            post = Post.post_objects.get(slug=slug)
-        except Post.DoesNotExist:
-            raise NotFound(detail="the request post does not exist")
+            limit = int(request.query_params.get("limit", 10))
+        except ValueError:
+            limit = 10
+        limit = min(max(limit, 1), getattr(settings, "MAX_PAGE_SIZE", 100))
+
+        try:
+            suggestions = autocomplete.suggest(query, limit)
         except Exception as e:
             raise APIException(
                 detail=f"An unexpected error occurred: {str(e)}", code=500
             )
-        serialized_post = PostSerializer(post).data
+        return self.response(suggestions)
+
+
+# class PostDetailView(RetrieveAPIView):
+#     queryset = Post.objects.all()
+#     serializer_class = PostSerializer
+#     lookup_field = "slug"
+
+
+def serialize_post_detail(slug):
+    # Una fila del read model con el JSON ya listo
+    row = read_model.get_detail(slug)
+    if row is not None:
+        return {"id": str(row[0]), "json": row[1]}
+
+    try:
+        post = read_model.published_posts().get(slug=slug)
+    except Post.DoesNotExist:
+        raise NotFound(detail="the request post does not exist")
+    except Exception as e:
+        raise APIException(detail=f"An unexpected error occurred: {str(e)}", code=500)
+    read_model.schedule_rebuild([post.pk])
+    return {
+        "id": str(post.pk),
+        "json": read_model.render(
+            read_model.without_volatile(PostSerializer(post).data)
+        ),
+    }
+
+
+class PostDetailView(StandardAPIView):
+    def get(self, request, slug):
+        # Un 304 tambien cuenta la vista, sin leer ni armar el post
+        return conditional_response(
+            request,
+            blog_cache.post_detail(slug),
+            lambda: self.retrieve(request, slug),
+            lambda: self.record_cached_view(request, slug),
+        )
+
+    def record_cached_view(self, request, slug):
+        # El id sale del detalle en cache; la vista va a redis como un evento
+        serialized_post = blog_cache.peek(
+            blog_cache.cache_key(blog_cache.post_detail(slug), "json")
+        )
+        if serialized_post is None:
+            return False
+        events.record_resolved(
+            Counter({("view", slug): 1}),
+            {slug: serialized_post["id"]},
+            get_client_ip(request),
+        )
+        return True
+
+    def retrieve(self, request, slug):
+        serialized_post = blog_cache.get_or_compute(
+            blog_cache.cache_key(blog_cache.post_detail(slug), "json"),
+            lambda: serialize_post_detail(slug),
+        )
+        post_id = serialized_post["id"]
 
         # increment post views count
         try:
-            post_analytics, created = PostAnalytics.objects.get_or_create(post=post)
-            post_analytics.increment_views(request)
+            if settings.BLOG_VIEW_TRACKING == "hll":
+                record_unique_view(post_id, get_client_ip(request))
+                views = read_model.get_view_counts([post_id]).get(post_id, 0)
+            else:
+                post_analytics, created = PostAnalytics.objects.get_or_create(
+                    post_id=post_id
+                )
+                post_analytics.increment_views(request)
+                views = post_analytics.views
         except PostAnalytics.DoesNotExist:
             raise NotFound(detail="the request post analytics does not exist")
         except Exception as e:
@@ -88,7 +460,12 @@ class PostDetailView(StandardAPIView):
                 detail=f"An error ocurred while updating post analytics: {str(e)}",
                 code=500,
             )
-        return self.response(serialized_post, status=status.HTTP_200_OK)
+        # Mismo sobre que self.response(), armado sin volver a serializar el post
+        detail = read_model.merge_detail(serialized_post["json"], views)
+        return HttpResponse(
+            f'{{"success":true,"status":200,"results":{detail}}}',
+            content_type="application/json",
+        )
 
 
 # class PostHeadingView(ListAPIView):
@@ -100,6 +477,7 @@ class PostDetailView(StandardAPIView):
 
 
 class PostHeadingView(StandardAPIView):
+    @method_decorator(condition(post_headings_etag, post_headings_last_modified))
     def get(self, request):
         post_slug = request.query_params.get("slug")
 
@@ -109,15 +487,96 @@ class PostHeadingView(StandardAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Buscar headings directamente
-        heading_objects = Heading.objects.filter(post__slug=post_slug)
+        def serialize_headings():
+            # Tabla de contenidos precalculada al guardar: sin join ni parseo
+            toc = Post.objects.filter(slug=post_slug).values_list("toc", flat=True)
 
-        # Si no hay headings, devolver lista vacía (no error)
-        serialized_headings = HeadingSerializer(heading_objects, many=True).data
+            # Si no hay headings, devolver lista vacía (no error)
+            return toc.first() or []
+
+        serialized_headings = blog_cache.get_or_compute(
+            blog_cache.cache_key(blog_cache.post_headings(post_slug), "list"),
+            serialize_headings,
+        )
 
         return self.response(serialized_headings)
 
 
+class PostAnalyticsSeriesView(StandardAPIView):
+    """
+    Serie temporal de views, unique_viewers, impressions, clicks y ctr de un
+    post por hora o por dia (UTC). Solo lee los rollups.
+    """
+
+    permission_classes = [HasValidApiKey]
+    max_points = 24 * 31
+    default_span = {"hour": timedelta(hours=47), "day": timedelta(days=29)}
+
+    def get(self, request, slug):
+        interval = request.query_params.get("interval", "day")
+        if interval not in self.default_span:
+            return self.response(
+                {"detail": "interval must be 'hour' or 'day'"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        current = rollups.today() if interval == "day" else rollups.truncate_hour()
+        try:
+            end = self.parse(request, "end", interval) or current
+            start = self.parse(request, "start", interval)
+        except ValueError as e:
+            return self.response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        start = start or end - self.default_span[interval]
+        buckets = list(rollups.buckets(start, end, interval))
+        if not buckets or len(buckets) > self.max_points:
+            return self.response(
+                {
+                    "detail": f"start must be before end (at most {self.max_points} points)"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        post_id = (
+            Post.post_objects.filter(slug=slug).values_list("pk", flat=True).first()
+        )
+        if post_id is None:
+            raise NotFound(detail="the request post does not exist")
+
+        model = PostAnalyticsDaily if interval == "day" else PostAnalyticsHourly
+        rows = {
+            row[interval]: row
+            for row in model.objects.filter(
+                post_id=post_id,
+                **{f"{interval}__gte": start, f"{interval}__lte": end},
+            ).values(interval, *rollups.FIELDS)
+        }
+
+        empty = dict.fromkeys(rollups.FIELDS, 0)
+        series = []
+        for bucket in buckets:
+            row = rows.get(bucket, empty)
+            impressions = row["impressions"]
+            series.append(
+                {
+                    "bucket": bucket.isoformat(),
+                    **{field: row[field] for field in rollups.FIELDS},
+                    "ctr": (
+                        round(row["clicks"] * 100 / impressions, 2)
+                        if impressions
+                        else 0
+                    ),
+                }
+            )
+        return self.response({"interval": interval, "series": series})
+
+    def parse(self, request, name, interval):
+        value = request.query_params.get(name)
+        bucket = rollups.parse_bucket(value, interval)
+        if value is not None and bucket is None:
+            raise ValueError(f"{name} must be an ISO 8601 date or datetime")
+        return bucket
+
+
 class IncrementPostClickView(APIView):
     permission_classes = [permissions.AllowAny]
     """Incrementa el contador de clics de un post basado en su slug"""
@@ -135,7 +594,7 @@ class IncrementPostClickView(APIView):
         try:
             # get_or_create devuelve una tupla (obj, created)
             post_analytics, created = PostAnalytics.objects.get_or_create(post=post)
-            post_analytics.increment_click()
+            clicks, impressions, click_through_rate = post_analytics.increment_click()
         except Exception as e:
             raise APIException(
                 detail=f"Error while updating post analytics: {str(e)}",
@@ -145,6 +604,115 @@ class IncrementPostClickView(APIView):
         return Response(
             {
                 "message": "Click incremented successfully!",
-                "clicks": post_analytics.clicks,
+                "clicks": clicks,
+                "click_through_rate": click_through_rate,
             }
         )
+
+
+class PostTimeOnPageView(APIView):
+    """
+    Beacon de tiempo en pagina (navigator.sendBeacon): la muestra va a redis,
+    sin tocar la base de datos; la consolida tasks.aggregate_time_on_page
+    """
+
+    # Sin sesion ni usuario: nada que leer de la base de datos
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request, slug):
+        max_length = Post._meta.get_field("slug").max_length
+        if len(slug) > max_length:
+            return Response(
+                {"detail": f"slug must be at most {max_length} characters"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        seconds = time_on_page.parse_beacon(request.body)
+        if seconds is None:
+            return Response(
+                {"detail": "seconds must be a non-negative number"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        record_time_on_page(slug, seconds)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class PostEventsView(APIView):
+    """
+    Ingesta en lote de eventos impression/click/view (NDJSON o array JSON):
+    una consulta para los slugs y un pipeline de redis por lote
+    """
+
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request):
+        try:
+            counts = events.parse(request)
+        except events.BatchTooLarge as e:
+            return Response(
+                {"detail": str(e)}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+            )
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            result = events.record(counts, get_client_ip(request))
+        except redis.RedisError as e:
+            return Response(
+                {"detail": f"Error while enqueuing events: {str(e)}"},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+            )
+        return Response(result, status=status.HTTP_202_ACCEPTED)
+
+
+class PostTrendingView(StandardAPIView):
+    """
+    Top N de posts en tendencia (global o de una categoria y sus subcategorias)
+    desde los sorted sets de apps.blog.trending, hidratados con el read model
+    """
+
+    permission_classes = [HasValidApiKey]
+    default_limit = 10
+    max_limit = 50
+
+    def get(self, request):
+        limit = self.parse_limit(request.query_params.get("limit"))
+        if limit is None:
+            return self.response(
+                {"detail": f"limit must be between 1 and {self.max_limit}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        scope = trending.ALL
+        slug = request.query_params.get("category")
+        if slug:
+            category_id = (
+                Category.objects.filter(slug=slug)
+                .order_by("depth")
+                .values_list("pk", flat=True)
+                .first()
+            )
+            if category_id is None:
+                raise NotFound(detail="The requested category does not exist")
+            scope = category_id.hex
+
+        ranking = trending.top(scope, limit)
+        items = read_model.get_list_items([post_id for post_id, score in ranking])
+        return self.response(self.with_scores(items, ranking))
+
+    @classmethod
+    def parse_limit(cls, value):
+        try:
+            limit = int(value or cls.default_limit)
+        except ValueError:
+            return None
+        return limit if 0 < limit <= cls.max_limit else None
+
+    @staticmethod
+    def with_scores(items, ranking):
+        scores = {str(post_id): score for post_id, score in ranking}
+        return [
+            {**item, "trending_score": round(scores[item["id"]], 4)} for item in items
+        ]
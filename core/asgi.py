@@ -6,10 +6,16 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
 
 django_asgi_app = get_asgi_application()
 
-from channels.routing import ProtocolTypeRouter
+from apps.blog.routing import websocket_urlpatterns
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import OriginValidator
+from django.conf import settings
 
 application = ProtocolTypeRouter(
     {
         "http": django_asgi_app,
+        "websocket": OriginValidator(
+            URLRouter(websocket_urlpatterns), settings.CHANNELLS_ALLOWED_ORIGINS
+        ),
     }
 )
@@ -47,6 +47,7 @@ THIRD_PARTY_APPS = [
     "django_celery_results",
     "django_celery_beat",
     "rest_framework_api",
+    "django_filters",
 ]
 
 
@@ -54,6 +55,8 @@ INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + PROJECT_APPS
 
 CKEDITOR_CONFIGS = {"default": {"toolbar": "full", "autoParagraph": False}}
 CKEDITOR_UPLOAD_PATH = "media/"
+# Las imagenes subidas se guardan por sha256: una imagen repetida se guarda una vez
+CKEDITOR_STORAGE_BACKEND = "apps.blog.storage.ContentHashStorage"
 
 MIDDLEWARE = [
     # whitenoise
@@ -162,8 +165,8 @@ MAX_PAGE_SIZE = 10
 
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels_redis.cache.RedisChannelLayer",
-        "CONFIG": ["django_redis", 6379],
+        "BACKEND": "channels_redis.core.RedisChannelLayer",
+        "CONFIG": {"hosts": [(env("REDIS_HOST"), 6379)]},
     }
 }
 
@@ -180,8 +183,62 @@ CACHES = {
     }
 }
 
+# TTL de las respuestas del blog; se invalidan por señales al editar
+BLOG_CACHE_TIMEOUT = env.int("BLOG_CACHE_TIMEOUT", default=60 * 60 * 6)
+# Tiempo extra en que se sirve el valor vencido mientras un proceso recalcula
+BLOG_CACHE_STALE_TIMEOUT = env.int("BLOG_CACHE_STALE_TIMEOUT", default=60 * 10)
+
+# Vistas async del blog (lista, detalle, headings, clics) para servir con uvicorn
+BLOG_ASYNC_VIEWS = env.bool("BLOG_ASYNC_VIEWS", default=False)
+# Conexiones maximas del pool de redis.asyncio por event loop
+BLOG_ASYNC_REDIS_POOL_SIZE = env.int("BLOG_ASYNC_REDIS_POOL_SIZE", default=50)
+
 
 CHANNELLS_ALLOWED_ORIGINS = ["*"]
+# Cada cuantos segundos se envian las analiticas en vivo (por WebSocket)
+BLOG_LIVE_ANALYTICS_INTERVAL = env.float("BLOG_LIVE_ANALYTICS_INTERVAL", default=1.0)
+
+# Rollups de analiticas: horas que se reconsolidan en cada ejecucion, dias que
+# se guardan las filas por hora y TTL de los contadores por hora en redis
+BLOG_ROLLUP_HOURS = env.int("BLOG_ROLLUP_HOURS", default=3)
+BLOG_ROLLUP_HOURLY_RETENTION_DAYS = env.int(
+    "BLOG_ROLLUP_HOURLY_RETENTION_DAYS", default=30
+)
+BLOG_ROLLUP_REDIS_TTL = env.int("BLOG_ROLLUP_REDIS_TTL", default=60 * 60 * 24 * 3)
+
+# Dias que se guardan las filas de PostView; las anteriores se compactan en
+# PostViewArchive. Una IP vuelve a contar como vista nueva pasado este plazo
+BLOG_POST_VIEW_RETENTION_DAYS = env.int("BLOG_POST_VIEW_RETENTION_DAYS", default=365)
+
+# Tiempo en pagina: las muestras de los beacons mas largas cuentan como este
+# maximo (segundos)
+BLOG_TIME_ON_PAGE_MAX_SECONDS = env.int(
+    "BLOG_TIME_ON_PAGE_MAX_SECONDS", default=60 * 30
+)
+
+# Ingesta de eventos en lote (posts/events/): eventos y bytes por peticion
+BLOG_EVENTS_MAX_BATCH = env.int("BLOG_EVENTS_MAX_BATCH", default=1000)
+BLOG_EVENTS_MAX_BYTES = env.int("BLOG_EVENTS_MAX_BYTES", default=256 * 1024)
+
+# Posts en tendencia: vida media (segundos) del puntaje de cada evento y peso
+# de cada tipo de evento
+BLOG_TRENDING_HALF_LIFE = env.int("BLOG_TRENDING_HALF_LIFE", default=60 * 60 * 6)
+BLOG_TRENDING_WEIGHTS = {"views": 1.0, "clicks": 2.0, "impressions": 0.1}
+
+# Conteo de vistas: "exact" (PostView por IP) o "hll" (HyperLogLog en redis)
+BLOG_VIEW_TRACKING = env.str("BLOG_VIEW_TRACKING", default="exact")
+# Ventana de visitantes unicos en modo "hll": "" (historico) o "day"
+BLOG_VIEW_WINDOW = env.str("BLOG_VIEW_WINDOW", default="")
+
+# Busqueda: "auto" (PostgreSQL si esta disponible), "postgres" o "simple"
+BLOG_SEARCH_BACKEND = env.str("BLOG_SEARCH_BACKEND", default="auto")
+# Configuracion de texto de PostgreSQL (stemming y stopwords)
+BLOG_SEARCH_CONFIG = env.str("BLOG_SEARCH_CONFIG", default="english")
+
+# Anchos (px) de las variantes WebP/JPEG de las miniaturas
+BLOG_THUMBNAIL_WIDTHS = env.list(
+    "BLOG_THUMBNAIL_WIDTHS", cast=int, default=[320, 640, 1280]
+)
 
 
 CELERY_ACCEPT_CONTENT = ["json"]
@@ -202,4 +259,37 @@ CELERY_IMPORTS = ("core.tasks", "apps.blog.tasks")
 
 
 CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
-CELERY_BEAT_SCHEDULE = {}
+CELERY_BEAT_SCHEDULE = {
+    "rollup-post-analytics": {
+        "task": "apps.blog.tasks.rollup_post_analytics",
+        "schedule": 60 * 15,
+    },
+    "prune-post-views": {
+        "task": "apps.blog.tasks.prune_post_views",
+        "schedule": 60 * 60 * 24,
+    },
+    "sync-impression-to-db": {
+        "task": "apps.blog.tasks.sync_impression_to_db",
+        "schedule": 60,
+    },
+    "sync-clicks-to-db": {
+        "task": "apps.blog.tasks.sync_clicks_to_db",
+        "schedule": 60,
+    },
+    "sync-pending-views": {
+        "task": "apps.blog.tasks.sync_pending_views",
+        "schedule": 60,
+    },
+    "materialize-unique-views": {
+        "task": "apps.blog.tasks.materialize_unique_views",
+        "schedule": 60,
+    },
+    "update-trending": {
+        "task": "apps.blog.tasks.update_trending",
+        "schedule": 30,
+    },
+    "aggregate-time-on-page": {
+        "task": "apps.blog.tasks.aggregate_time_on_page",
+        "schedule": 60,
+    },
+}